@@ -1,20 +1,41 @@
 # compiler/__init__.py
 
-from .parser import Parser
-from .lexical_analyzer import LexicalAnalyzer
-from .syntax_analizer import SyntaxAnalyzer
-from .syntactic_checking import SyntacticChecking
-from .semantic_analyzer import SemanticAnalyzer
-from .intermediate_code_gen import IntermediateCodeGenerator
-from .symbol_tables import VariableSymbolTable, TypeSystem
+# Las fases se importan bajo demanda (PEP 562): 'import compiler' no carga
+# ningún módulo hasta que se usa uno de estos nombres, así una herramienta
+# que solo analiza léxicamente no paga por el análisis semántico ni por la
+# generación de código.
+_LAZY_ATTRIBUTES = {
+    'Parser': '.parser',
+    'LexicalAnalyzer': '.lexical_analyzer',
+    'SyntaxAnalyzer': '.syntax_analizer',
+    'SyntacticChecking': '.syntactic_checking',
+    'SemanticAnalyzer': '.semantic_analyzer',
+    'IntermediateCodeGenerator': '.intermediate_code_gen',
+    'VariableSymbolTable': '.symbol_tables',
+    'TypeSystem': '.symbol_tables',
+}
 
 __all__ = [
     'Parser',
-    'LexicalAnalyzer', 
+    'LexicalAnalyzer',
     'SyntaxAnalyzer',
     'SyntacticChecking',
     'SemanticAnalyzer',
     'IntermediateCodeGenerator',
     'VariableSymbolTable',
     'TypeSystem'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Las siguientes consultas ya no pasan por __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
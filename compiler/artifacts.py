@@ -0,0 +1,396 @@
+# compiler/artifacts.py
+
+import mmap
+import os
+import struct
+
+from .syntax_analizer import Node
+from .tokens import TokenStream
+
+# Formato binario de artefactos de compilación (little endian):
+#
+#   Cabecera:   magic 'CEXA' | versión (u16) | reservado (u16) | nº de secciones (u32)
+#   Directorio: por sección -> etiqueta (4 bytes) | offset (u64) | nº de registros (u32) | reservado (u32)
+#   Secciones:  registros de tamaño fijo, alineados a 8 bytes
+#
+# Todas las cadenas se guardan una sola vez en la sección STRS y los valores
+# con tipo (valores de símbolos, extremos de rangos, constantes) en la sección
+# VALS; el resto de las secciones los referencian por índice, así que un
+# artefacto se puede abrir con mmap y leer registro por registro sin
+# interpretar el archivo completo.
+
+MAGIC = b'CEXA'
+FORMAT_VERSION = 1
+NONE = 0xFFFFFFFF  # Índice de cadena / valor / nodo ausente
+
+HEADER = struct.Struct('<4sHHI')
+DIRECTORY_ENTRY = struct.Struct('<4sQII')
+
+# Registros de cada sección
+STRING_OFFSET = struct.Struct('<I')            # Offsets de la sección STRS (n + 1 valores)
+VALUE_RECORD = struct.Struct('<IIqd')          # etiqueta, texto, valor entero, valor real
+TOKEN_RECORD = struct.Struct('<IIqii')         # tipo, lexema, id de tabla, inicio, fin
+SYMBOL_RECORD = struct.Struct('<qIIiIIIIII')   # id, nombre, tipo, scope, dirección, modo, columna,
+                                               # valor, mínimo, máximo (índices en VALS)
+NODE_RECORD = struct.Struct('<IIIIIII')        # valor, tipo, modo, dirección, izquierdo, derecho, almacenamiento
+TRIPLE_RECORD = struct.Struct('<III')          # operador, operando 1, operando 2
+CONSTANT_RECORD = struct.Struct('<III')        # lexema, tipo, valor (índice en VALS)
+
+# Etiquetas de VALUE_RECORD. Un entero fuera de int64 se guarda como texto
+VALUE_INTEGER, VALUE_REAL, VALUE_BOOLEAN, VALUE_TEXT, VALUE_BIG_INTEGER = range(5)
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+NO_TABLE_ID = -1
+NO_POSITION = -1
+
+
+class _StringPool:
+    """Asigna un índice a cada cadena distinta (en orden de aparición)."""
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, text):
+        if text is None:
+            return NONE
+        text = str(text)
+        if text not in self.index:
+            self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return self.index[text]
+
+
+class _ValuePool:
+    """Registros de la sección VALS, uno por valor (las cadenas van a STRS)."""
+    def __init__(self, strings):
+        self.strings = strings
+        self.records = bytearray()
+        self.count = 0
+
+    def add(self, value):
+        if value is None:
+            return NONE
+        if isinstance(value, bool):
+            fields = (VALUE_BOOLEAN, NONE, int(value), 0.0)
+        elif isinstance(value, int) and INT64_MIN <= value <= INT64_MAX:
+            fields = (VALUE_INTEGER, NONE, value, 0.0)
+        elif isinstance(value, int):
+            fields = (VALUE_BIG_INTEGER, self.strings.add(value), 0, 0.0)
+        elif isinstance(value, float):
+            fields = (VALUE_REAL, NONE, 0, value)
+        else:
+            fields = (VALUE_TEXT, self.strings.add(value), 0, 0.0)
+        self.records += VALUE_RECORD.pack(*fields)
+        self.count += 1
+        return self.count - 1
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def _postorder(root):
+    """Nodos del AST en post-orden (los hijos antes que el padre), sin recursión."""
+    order = []
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.left:
+            stack.append(node.left)
+        if node.right:
+            stack.append(node.right)
+    order.reverse()
+    return order
+
+
+def write_artifact(filename, tokens, symbol_table, ast_root, triples, constant_pool=None):
+    """
+    Escribe el artefacto binario de una compilación: tokens, tabla de
+    símbolos, tabla de constantes, AST anotado y tripletas.
+    """
+    tokens = TokenStream.from_tokens(tokens)
+    strings = _StringPool()
+    values = _ValuePool(strings)
+    sections = []
+
+    # Tokens (con su posición en el código fuente)
+    records = bytearray()
+    for index, (kind, value, table_id) in enumerate(tokens):
+        start, end = tokens.span(index) or (NO_POSITION, NO_POSITION)
+        records += TOKEN_RECORD.pack(strings.add(kind), strings.add(value),
+                                     NO_TABLE_ID if table_id is None else table_id, start, end)
+    sections.append((b'TOKS', len(tokens), records))
+
+    # Tabla de símbolos
+    records = bytearray()
+    symbols = symbol_table.symbols if symbol_table is not None else {}
+    for symbol_id, info in symbols.items():
+        low, high = info.get('range') or (None, None)
+        records += SYMBOL_RECORD.pack(symbol_id, strings.add(info['name']), strings.add(info['type']),
+                                      info['scope'], int(info['address'], 16), strings.add(info['mode']),
+                                      strings.add(info.get('column')), values.add(info.get('value')),
+                                      values.add(low), values.add(high))
+    sections.append((b'SYMS', len(symbols), records))
+
+    # Tabla de constantes (valores ya convertidos, para no volver a interpretarlos)
+    records = bytearray()
+    constants = constant_pool.constants if constant_pool is not None else []
+    for constant in constants:
+        records += CONSTANT_RECORD.pack(strings.add(constant['lexeme']), strings.add(constant['type']),
+                                        values.add(constant['value']))
+    sections.append((b'CNST', len(constants), records))
+
+    # AST anotado (post-orden; la raíz es el último registro)
+    nodes = _postorder(ast_root)
+    positions = {id(node): i for i, node in enumerate(nodes)}
+    records = bytearray()
+    for node in nodes:
+        records += NODE_RECORD.pack(
+            strings.add(node.value),
+            strings.add(getattr(node, 'type', None)),
+            strings.add(getattr(node, 'addressing_mode', None)),
+            strings.add(getattr(node, 'memory_address', None)),
+            positions[id(node.left)] if node.left else NONE,
+            positions[id(node.right)] if node.right else NONE,
+            strings.add(getattr(node, 'storage_type', None)),
+        )
+    sections.append((b'NODE', len(nodes), records))
+
+    # Tripletas
+    records = bytearray()
+    for op, arg1, arg2 in triples:
+        records += TRIPLE_RECORD.pack(strings.add(op), strings.add(arg1), strings.add(arg2))
+    sections.append((b'TRIP', len(triples), records))
+
+    sections.insert(0, (b'VALS', values.count, values.records))
+
+    # Tabla de cadenas (se arma al final, cuando ya se conocen todas)
+    blob = bytearray()
+    offsets = bytearray()
+    for text in strings.strings:
+        offsets += STRING_OFFSET.pack(len(blob))
+        blob += text.encode('utf-8')
+    offsets += STRING_OFFSET.pack(len(blob))
+    sections.insert(0, (b'STRS', len(strings.strings), offsets + blob))
+
+    # Directorio y escritura
+    offset = _align(HEADER.size + DIRECTORY_ENTRY.size * len(sections))
+    directory = bytearray()
+    for tag, count, data in sections:
+        directory += DIRECTORY_ENTRY.pack(tag, offset, count, 0)
+        offset = _align(offset + len(data))
+
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections)))
+        f.write(directory)
+        for tag, count, data in sections:
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            f.write(data)
+    return filename
+
+
+class _RecordView:
+    """Secuencia de registros de una sección, decodificados bajo demanda."""
+    def __init__(self, buffer, offset, count, record, decode):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self._record = record
+        self._decode = decode
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        fields = self._record.unpack_from(self._buffer, self._offset + index * self._record.size)
+        return self._decode(fields)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+
+class Artifact:
+    """
+    Artefacto de compilación abierto con mmap. Las secciones se exponen como
+    secuencias que decodifican cada registro solo cuando se accede a él.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._mmap = None
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"'{self.filename}' no es un artefacto de compilación (archivo truncado)")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, _, section_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"'{self.filename}' no es un artefacto de compilación")
+        if self.version != FORMAT_VERSION:
+            raise ValueError(f"Versión de artefacto no soportada: {self.version}")
+
+        self._check_bounds('el directorio', HEADER.size, DIRECTORY_ENTRY.size * section_count)
+        self._sections = {}
+        for i in range(section_count):
+            tag, offset, count, _ = DIRECTORY_ENTRY.unpack_from(self._mmap, HEADER.size + i * DIRECTORY_ENTRY.size)
+            self._sections[tag] = (offset, count)
+
+        offset, self._string_count = self._sections.get(b'STRS', (0, 0))
+        self._string_offsets = offset
+        self._string_blob = offset + STRING_OFFSET.size * (self._string_count + 1)
+        if self._string_count:
+            self._check_bounds('la sección STRS', offset, self._string_blob - offset)
+            blob_size, = STRING_OFFSET.unpack_from(self._mmap, self._string_blob - STRING_OFFSET.size)
+            self._check_bounds('la sección STRS', self._string_blob, blob_size)
+
+        self._values = self._view(b'VALS', VALUE_RECORD, self._decode_value)
+        self.tokens = self._view(b'TOKS', TOKEN_RECORD, self._decode_token)
+        self.symbols = self._view(b'SYMS', SYMBOL_RECORD, self._decode_symbol)
+        self.constants = self._view(b'CNST', CONSTANT_RECORD, self._decode_constant)
+        self.nodes = self._view(b'NODE', NODE_RECORD, self._decode_node)
+        self.triples = self._view(b'TRIP', TRIPLE_RECORD, self._decode_triple)
+
+    def _check_bounds(self, what, offset, size):
+        if offset + size > len(self._mmap):
+            raise ValueError(f"'{self.filename}' está truncado: {what} termina en el byte {offset + size} "
+                             f"y el archivo tiene {len(self._mmap)}")
+
+    def _view(self, tag, record, decode):
+        offset, count = self._sections.get(tag, (0, 0))
+        self._check_bounds(f"la sección {tag.decode('ascii', 'replace')}", offset, record.size * count)
+        return _RecordView(self._mmap, offset, count, record, decode)
+
+    def string(self, index):
+        """Devuelve la cadena con el índice dado (o None)."""
+        if index == NONE:
+            return None
+        start, end = struct.unpack_from('<II', self._mmap, self._string_offsets + index * STRING_OFFSET.size)
+        return self._mmap[self._string_blob + start:self._string_blob + end].decode('utf-8')
+
+    def value(self, index):
+        """Devuelve el valor con el índice dado en la sección VALS (o None)."""
+        return None if index == NONE else self._values[index]
+
+    # --- Decodificación de registros ---
+    def _decode_value(self, fields):
+        tag, text, int_value, real_value = fields
+        if tag == VALUE_INTEGER:
+            return int_value
+        if tag == VALUE_REAL:
+            return real_value
+        if tag == VALUE_BOOLEAN:
+            return bool(int_value)
+        if tag == VALUE_BIG_INTEGER:
+            return int(self.string(text))
+        return self.string(text)
+
+    def _decode_token(self, fields):
+        kind, value, table_id, _, _ = fields
+        return (self.string(kind), self.string(value), None if table_id == NO_TABLE_ID else table_id)
+
+    def _decode_symbol(self, fields):
+        symbol_id, name, symbol_type, scope, address, mode, column, value, low, high = fields
+        return symbol_id, {
+            'name': self.string(name),
+            'type': self.string(symbol_type),
+            'value': self.value(value),
+            'scope': scope,
+            'address': f"{address:04X}",
+            'mode': self.string(mode),
+            'range': None if low == NONE else (self.value(low), self.value(high)),
+            'column': self.string(column),
+        }
+
+    def _decode_constant(self, fields):
+        lexeme, constant_type, value = fields
+        return {'lexeme': self.string(lexeme), 'type': self.string(constant_type), 'value': self.value(value)}
+
+    def _decode_node(self, fields):
+        value, node_type, mode, address, left, right, storage = fields
+        return {
+            'value': self.string(value),
+            'type': self.string(node_type),
+            'addressing_mode': self.string(mode),
+            'memory_address': self.string(address),
+            'left': None if left == NONE else left,
+            'right': None if right == NONE else right,
+            'storage_type': self.string(storage),
+        }
+
+    def _decode_triple(self, fields):
+        return [self.string(field) for field in fields]
+
+    # --- Reconstrucción ---
+    def symbol_dict(self):
+        return dict(self.symbols)
+
+    def token_stream(self):
+        """Reconstruye la TokenStream, con la posición de cada token en el código fuente."""
+        stream = TokenStream()
+        for kind, value, table_id, start, end in self._view(b'TOKS', TOKEN_RECORD, tuple):
+            span = None if start == NO_POSITION else (start, end)
+            stream.append(self.string(kind), self.string(value), None if table_id == NO_TABLE_ID else table_id, span)
+        return stream
+
+    def build_ast(self):
+        """Reconstruye el AST anotado (la raíz es el último nodo)."""
+        built = []
+        for record in self.nodes:
+            node = Node(record['value'],
+                        built[record['left']] if record['left'] is not None else None,
+                        built[record['right']] if record['right'] is not None else None)
+            for attr in ('type', 'addressing_mode', 'memory_address', 'storage_type'):
+                if record[attr] is not None:
+                    setattr(node, attr, record[attr])
+            built.append(node)
+        return built[-1] if built else None
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_artifact(filename):
+    """Abre un artefacto de compilación con mmap (sin leerlo completo)."""
+    return Artifact(filename)
+
+
+def ast_structure(node):
+    """
+    Representación en tuplas del AST anotado, útil para comparar un
+    artefacto cargado con una compilación en memoria.
+    """
+    if node is None:
+        return None
+    structures = {}
+    for current in _postorder(node):
+        structures[id(current)] = (
+            current.value,
+            getattr(current, 'type', None),
+            getattr(current, 'addressing_mode', None),
+            getattr(current, 'memory_address', None),
+            getattr(current, 'storage_type', None),
+            structures.get(id(current.left)) if current.left else None,
+            structures.get(id(current.right)) if current.right else None,
+        )
+    return structures[id(node)]
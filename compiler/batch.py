@@ -0,0 +1,153 @@
+# compiler/batch.py
+
+import argparse
+
+from .canonical import Canonicalizer
+from .diagnostics import Diagnostic, Diagnostics, summary_lines, summary_markdown
+from .lexical_analyzer import LexicalAnalyzer
+from .parser import Parser
+from .pipeline import compile_expression
+from .symbol_tables import ConstantPool, VariableSymbolTable
+from .syntax_analizer import SyntaxAnalyzer
+
+
+def read_expressions(filename):
+    """Una expresión por línea; se ignoran las líneas vacías y las que empiezan con '#'."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+class BatchEntry:
+    """Resultado de una expresión del lote (compartido con sus duplicados)."""
+    def __init__(self, index, expression, digest, canonical_text, representative, compiled=None, error=None,
+                 diagnostics=()):
+        self.index = index
+        self.expression = expression
+        self.digest = digest
+        self.canonical_text = canonical_text
+        self.representative = representative  # Índice de la expresión que se compiló por todas
+        self.compiled = compiled
+        self.error = error
+        self.diagnostics = list(diagnostics)  # Errores de la expresión (con código y posición)
+
+    @property
+    def is_duplicate(self):
+        return self.representative != self.index
+
+
+class BatchCompiler:
+    """
+    Compila un lote de expresiones una sola vez por forma canónica.
+
+    Cada expresión se lleva hasta el AST, se normaliza (compiler.canonical) y
+    se agrupa por digest; solo la primera expresión de cada grupo se compila
+    y su resultado se comparte con las demás. La tabla de símbolos se congela
+    y se usa como base compartida: cada expresión trabaja sobre su overlay().
+
+    Los errores no interrumpen el lote: cada expresión tiene su colector de
+    diagnósticos (compiler.diagnostics) y sigue la siguiente. 'diagnostics'
+    junta los de todo el lote para el resumen por código.
+    """
+    def __init__(self, symbol_table=None):
+        if symbol_table is None:
+            symbol_table = VariableSymbolTable()
+        if not symbol_table.frozen:
+            symbol_table.freeze()
+        self.symbol_table = symbol_table
+        self.entries = []
+        self.groups = {}  # digest -> índices de las expresiones con esa forma canónica
+        self.diagnostics = []  # Diagnósticos de todo el lote ('source' = índice de la expresión)
+
+    def _canonical_form(self, expression, diagnostics):
+        """Forma canónica de la expresión, o None si tiene errores de las fases 1 a 3."""
+        symbol_table = self.symbol_table.overlay()
+        parser = Parser(expression, diagnostics)
+        tokens = LexicalAnalyzer(parser.parse(), symbol_table, constant_pool=ConstantPool(),
+                                 spans=parser.spans, diagnostics=diagnostics).tokenize()
+        ast_root = SyntaxAnalyzer(tokens, diagnostics=diagnostics).build_ast()
+        if diagnostics.has_errors:
+            return None
+        return Canonicalizer(symbol_table).canonicalize(ast_root)
+
+    def compile(self, expressions):
+        self.entries = []
+        self.groups = {}
+        self.diagnostics = []
+        compiled_by_digest = {}
+        for index, expression in enumerate(expressions):
+            diagnostics = Diagnostics()
+            form = self._canonical_form(expression, diagnostics)
+            if form is None:
+                entry = BatchEntry(index, expression, None, None, index, error=str(diagnostics.items[0]),
+                                   diagnostics=diagnostics)
+            else:
+                group = self.groups.setdefault(form.digest, [])
+                group.append(index)
+                if form.digest not in compiled_by_digest:
+                    compiled_by_digest[form.digest] = compile_expression(expression, self.symbol_table,
+                                                                         diagnostics=Diagnostics())
+                compiled = compiled_by_digest[form.digest]
+                # Los duplicados comparten la compilación, también sus errores semánticos
+                error = str(compiled.diagnostics.items[0]) if compiled.diagnostics.has_errors else None
+                entry = BatchEntry(index, expression, form.digest, form.text, group[0], compiled, error,
+                                   compiled.diagnostics)
+            self.entries.append(entry)
+            self.diagnostics.extend(Diagnostic(d.code, d.message, d.span, d.phase, index)
+                                    for d in entry.diagnostics)
+        return self.entries
+
+    @property
+    def failed(self):
+        """Expresiones con al menos un error."""
+        return sum(1 for entry in self.entries if entry.diagnostics)
+
+    @property
+    def compilations(self):
+        """Compilaciones realizadas (una por forma canónica distinta)."""
+        return len(self.groups)
+
+    @property
+    def dedup_ratio(self):
+        """Fracción de expresiones que no hubo que compilar (0 = ninguna repetida)."""
+        canonicalized = sum(len(group) for group in self.groups.values())
+        return 1 - self.compilations / canonicalized if canonicalized else 0.0
+
+    def generate_markdown(self):
+        md = "## Compilación por Lote\n\n"
+        md += f"- Expresiones: **{len(self.entries)}**\n"
+        md += f"- Formas canónicas distintas (compilaciones): **{self.compilations}**\n"
+        md += f"- Expresiones reutilizadas: **{sum(1 for entry in self.entries if entry.is_duplicate)}**\n"
+        md += f"- Proporción de deduplicación: **{self.dedup_ratio:.1%}**\n\n"
+        md += "| # | Expresión | Forma canónica | Compilada en |\n"
+        md += "|:-:|:----------|:---------------|:------------:|\n"
+        for entry in self.entries:
+            canonical = f"`{entry.canonical_text}`" if entry.canonical_text else f"ERROR: {entry.error}"
+            md += f"| {entry.index} | `{entry.expression}` | {canonical} | {entry.representative} |\n"
+        md += "\n" + summary_markdown(self.diagnostics, lambda d: f"#{d.source}: {d}")
+        return md
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila un lote de expresiones sin repetir formas equivalentes.")
+    parser.add_argument('expressions', help='Archivo con una expresión por línea')
+    parser.add_argument('--report', help='Archivo Markdown para el reporte del lote')
+    args = parser.parse_args(argv)
+
+    batch = BatchCompiler()
+    batch.compile(read_expressions(args.expressions))
+    print(f"{len(batch.entries)} expresiones, {batch.compilations} compilaciones "
+          f"(deduplicación: {batch.dedup_ratio:.1%}), {batch.failed} con errores")
+    for line in summary_lines(batch.diagnostics):
+        print(f"  {line}")
+    if args.report:
+        import os
+        directory = os.path.dirname(args.report)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(batch.generate_markdown())
+        print(f"Reporte guardado en '{args.report}'")
+
+
+if __name__ == '__main__':
+    main()
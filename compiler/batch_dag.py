@@ -0,0 +1,230 @@
+# compiler/batch_dag.py
+
+from itertools import repeat
+
+from .canonical import is_commutative
+from .evaluator import BINARY_OPERATIONS, UNARY_OPERATIONS, BOOLEAN_LITERALS
+from .optimizer import is_reference, is_constant, reference_index, constant_index
+from .symbol_tables import TypeSystem
+
+# Plan de evaluación compartido por un lote de asignaciones: las tripletas de
+# todas las expresiones se unen en un solo DAG (hash-consing), así 'b * c' se
+# calcula una vez por bloque aunque aparezca en cien expresiones.
+#
+# Nodos del DAG:
+#   INPUT    columna de entrada (variable que el lote no asignó antes)
+#   CONSTANT valor constante (se aplica como escalar, sin armar una columna)
+#   OPERATION operador aplicado a otros nodos
+INPUT, CONSTANT, OPERATION = range(3)
+
+
+class BatchDAG:
+    """
+    DAG global de un lote de asignaciones compiladas (compile_expression).
+
+    Las asignaciones se interpretan en orden: una variable leída después de
+    ser asignada es el nodo que se le asignó. Las operaciones iguales (mismo
+    operador y mismos nodos operandos; en operadores conmutativos, en
+    cualquier orden) son un solo nodo, y las operaciones con operandos
+    constantes se pliegan al construir el plan.
+
+    evaluate_chunk() calcula cada nodo una vez por bloque, en orden
+    topológico, y libera cada resultado intermedio apenas lo usó su último
+    consumidor (conteo de referencias calculado al armar el plan).
+    """
+    def __init__(self, compiled_expressions, symbol_table=None):
+        self.compiled = list(compiled_expressions)
+        self.symbol_table = symbol_table
+        self.kinds = []       # Tipo de nodo (INPUT, CONSTANT, OPERATION)
+        self.payloads = []    # INPUT: nombre; CONSTANT: valor; OPERATION: (op, a, b)
+        self.types = []       # Tipo del lenguaje de cada nodo (para la conmutatividad)
+        self._index = {}      # clave -> nodo (hash-consing)
+        self.outputs = {}     # variable asignada -> nodo (la última asignación)
+        self.total_operations = 0  # Tripletas de operación de todas las expresiones
+
+        for compiled in self.compiled:
+            if compiled.errors:
+                raise ValueError(f"Errores semánticos en '{compiled.expression}': {'; '.join(compiled.errors)}")
+            self._add_triples(compiled)
+
+        self.needed = self._reachable()
+        self.schedule, self.release_after = self._plan()
+
+    def __getstate__(self):
+        # Para evaluar en otro proceso solo hace falta el plan, no las expresiones compiladas
+        state = dict(self.__dict__)
+        state.update(compiled=[], symbol_table=None, _index={})
+        return state
+
+    # --- Construcción ---
+    def _node(self, kind, payload, node_type):
+        key = (kind, payload)
+        node = self._index.get(key)
+        if node is None:
+            node = len(self.kinds)
+            self._index[key] = node
+            self.kinds.append(kind)
+            self.payloads.append(payload)
+            self.types.append(node_type)
+        return node
+
+    def _constant(self, value, node_type):
+        # El tipo es parte de la clave: 1 (entero) y 1.0 (real) o True y 1 son constantes distintas
+        return self._node(CONSTANT, (node_type, value), node_type)
+
+    def _variable_type(self, compiled, name):
+        for table in (compiled.symbol_table, self.symbol_table):
+            symbol = table.find_symbol_by_name(name) if table is not None else None
+            if symbol is not None:
+                return symbol.type
+        return None
+
+    def _add_triples(self, compiled):
+        results = []  # Nodo de cada tripleta de esta expresión
+
+        def operand(value):
+            if is_reference(value):
+                return results[reference_index(value)]
+            if is_constant(value):
+                entry = compiled.constant_pool.get(constant_index(value))
+                return self._constant(entry['value'], entry['type'])
+            if value in self.outputs:
+                return self.outputs[value]
+            if value in BOOLEAN_LITERALS:
+                return self._constant(BOOLEAN_LITERALS[value], 'boolean')
+            return self._node(INPUT, value, self._variable_type(compiled, value))
+
+        for op, arg1, arg2 in compiled.triples:
+            if op == ':=':
+                node = operand(arg2)
+                self.outputs[arg1] = node
+            else:
+                self.total_operations += 1
+                left = operand(arg1)
+                right = operand(arg2) if arg2 is not None else None
+                node = self._operation(op, left, right)
+            results.append(node)
+
+    def _operation(self, op, left, right):
+        left_type = self.types[left]
+        right_type = self.types[right] if right is not None else None
+        node_type = TypeSystem.get_result_type(op, left_type, right_type)
+
+        # Plegado: con operandos constantes el resultado también es constante
+        if self.kinds[left] == CONSTANT and (right is None or self.kinds[right] == CONSTANT):
+            try:
+                if right is None:
+                    value = UNARY_OPERATIONS[op](self.payloads[left][1])
+                else:
+                    value = BINARY_OPERATIONS[op](self.payloads[left][1], self.payloads[right][1])
+                return self._constant(value, node_type)
+            except (ArithmeticError, TypeError):
+                pass  # Por ejemplo, división por cero: se deja para la evaluación
+
+        if right is not None and is_commutative(op, left_type, right_type) and right < left:
+            left, right = right, left
+        return self._node(OPERATION, (op, left, right), node_type)
+
+    def _reachable(self):
+        """Marca los nodos de los que depende alguna salida (el resto no se evalúa)."""
+        needed = [False] * len(self.kinds)
+        stack = list(self.outputs.values())
+        while stack:
+            node = stack.pop()
+            if needed[node]:
+                continue
+            needed[node] = True
+            if self.kinds[node] == OPERATION:
+                _, left, right = self.payloads[node]
+                stack.append(left)
+                if right is not None:
+                    stack.append(right)
+        return needed
+
+    def _plan(self):
+        """
+        Orden de evaluación y, para cada paso, los resultados intermedios que
+        se pueden liberar después de él (los que ese paso usó por última vez).
+        """
+        # Los nodos se crean después de sus operandos: el orden de creación es topológico
+        schedule = [node for node, kind in enumerate(self.kinds) if kind == OPERATION and self.needed[node]]
+        last_use = {}
+        for step, node in enumerate(schedule):
+            _, left, right = self.payloads[node]
+            for operand in (left, right):
+                if operand is not None and self.kinds[operand] == OPERATION:
+                    last_use[operand] = step
+        outputs = set(self.outputs.values())
+        release_after = [[] for _ in schedule]
+        for node, step in last_use.items():
+            if node not in outputs:
+                release_after[step].append(node)
+        return schedule, release_after
+
+    # --- Consultas ---
+    @property
+    def inputs(self):
+        """Variables de entrada que usa el plan."""
+        return [self.payloads[node] for node, kind in enumerate(self.kinds) if kind == INPUT and self.needed[node]]
+
+    @property
+    def operations(self):
+        """Operaciones que se calculan por bloque (subexpresiones distintas)."""
+        return len(self.schedule)
+
+    @property
+    def sharing_ratio(self):
+        """Fracción de las operaciones del lote que no hace falta calcular."""
+        return 1 - self.operations / self.total_operations if self.total_operations else 0.0
+
+    @property
+    def peak_live(self):
+        """Máximo de columnas intermedias en memoria a la vez durante un bloque."""
+        live = peak = 0
+        for released in self.release_after:
+            live += 1
+            peak = max(peak, live)
+            live -= len(released)
+        return peak
+
+    # --- Evaluación ---
+    def evaluate_chunk(self, columns):
+        """
+        Evalúa el plan sobre un bloque (nombre -> lista de valores) y devuelve
+        las columnas de las variables asignadas.
+        """
+        length = len(next(iter(columns.values()))) if columns else 0
+        kinds, payloads = self.kinds, self.payloads
+        values = [None] * len(kinds)
+
+        def column(node):
+            kind = kinds[node]
+            if kind == CONSTANT:
+                return repeat(payloads[node][1], length)
+            if kind == INPUT:
+                name = payloads[node]
+                if name not in columns:
+                    raise ValueError(f"La variable '{name}' no tiene valores de entrada")
+                return columns[name]
+            return values[node]
+
+        for node, released in zip(self.schedule, self.release_after):
+            op, left, right = payloads[node]
+            if right is None:
+                values[node] = list(map(UNARY_OPERATIONS[op], column(left)))
+            else:
+                values[node] = list(map(BINARY_OPERATIONS[op], column(left), column(right)))
+            for freed in released:
+                values[freed] = None  # Ya se evaluó su último consumidor
+
+        return {name: list(column(node)) if kinds[node] != OPERATION else values[node]
+                for name, node in self.outputs.items()}
+
+    def generate_markdown(self):
+        md = "## Plan de Evaluación Compartido\n\n"
+        md += f"- Asignaciones: **{len(self.compiled)}**\n"
+        md += f"- Operaciones en las tripletas: **{self.total_operations}**\n"
+        md += f"- Operaciones por bloque (subexpresiones distintas): **{self.operations}**\n"
+        md += f"- Trabajo ahorrado: **{self.sharing_ratio:.1%}**\n"
+        md += f"- Máximo de columnas intermedias en memoria: **{self.peak_live}**\n"
+        return md
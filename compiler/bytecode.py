@@ -0,0 +1,149 @@
+# compiler/bytecode.py
+
+from array import array
+
+from .evaluator import BINARY_OPERATIONS, BOOLEAN_LITERALS
+from .optimizer import is_reference, is_constant, reference_index, constant_index
+from .symbol_tables import OPERATORS
+
+# Formato del bytecode: tres enteros por instrucción (array('i')):
+#
+#   código de operación | operando A | operando B
+#
+# Los códigos de operación son los de la tabla fija OPERATORS (101 ':=',
+# 102 '+', ...). Los operandos son índices en un "marco" plano de valores:
+#
+#   [0, C)             constantes (índices de la tabla de constantes)
+#   [C, C + V)         variables (una ranura por símbolo de la tabla de símbolos)
+#   [C + V, C + V + N) resultados de las instrucciones (la tripleta i usa C + V + i)
+#
+# Así el intérprete no tiene que decodificar etiquetas: cada operando es un
+# acceso directo a una lista. NO_OPERAND marca el operando B de 'not'.
+
+NO_OPERAND = -1
+ASSIGN = OPERATORS[':=']
+NOT = OPERATORS['not']
+
+# Operaciones por código de operación (las mismas del evaluador del AST)
+OPCODE_OPERATIONS = {OPERATORS[op]: operation for op, operation in BINARY_OPERATIONS.items()}
+
+OPCODE_NAMES = {code: op for op, code in OPERATORS.items()}
+
+
+class Bytecode:
+    """Programa codificado: instrucciones, constantes y variables usadas."""
+    def __init__(self, code, constants, variables, symbol_ids, inputs):
+        self.code = code                # array('i'), 3 enteros por instrucción
+        self.constants = constants      # Valores de las constantes (ya convertidos)
+        self.variables = variables      # Nombres de las variables, por ranura
+        self.symbol_ids = symbol_ids    # ID en la tabla de símbolos de cada ranura
+        # Variables que se leen antes de asignarse (necesitan valor de entrada)
+        self.inputs = frozenset(inputs)
+
+    @property
+    def instruction_count(self):
+        return len(self.code) // 3
+
+    @property
+    def result_base(self):
+        return len(self.constants) + len(self.variables)
+
+    def to_bytes(self):
+        return self.code.tobytes()
+
+    def disassemble(self):
+        """Listado legible del bytecode (una línea por instrucción)."""
+        variable_base = len(self.constants)
+        result_base = self.result_base
+
+        def operand(index):
+            if index == NO_OPERAND:
+                return '—'
+            if index < variable_base:
+                return f"#{index}"
+            if index < result_base:
+                return self.variables[index - variable_base]
+            return f"({index - result_base})"
+
+        lines = []
+        for i in range(self.instruction_count):
+            opcode, a, b = self.code[3 * i:3 * i + 3]
+            lines.append(f"({i}) {opcode:>3} {OPCODE_NAMES[opcode]:<4} {operand(a)}, {operand(b)}")
+        return "\n".join(lines)
+
+
+def encode_triples(triples, constant_pool=None, symbol_table=None):
+    """Codifica una secuencia de tripletas como bytecode."""
+    constants = [constant['value'] for constant in constant_pool.constants] if constant_pool else []
+    variables, slots = [], {}
+    inputs, assigned = set(), set()
+
+    # Primero se asignan las ranuras de variables (el marco necesita su tamaño)
+    for op, arg1, arg2 in triples:
+        for operand in (arg1, arg2):
+            if operand is not None and not is_reference(operand) and not is_constant(operand):
+                if operand not in slots:
+                    slots[operand] = len(variables)
+                    variables.append(operand)
+        # En ':=' se lee arg2 y se asigna arg1; en el resto se leen los dos
+        for operand in ((arg2,) if op == ':=' else (arg1, arg2)):
+            if (operand is not None and operand not in assigned and not is_reference(operand)
+                    and not is_constant(operand) and operand not in BOOLEAN_LITERALS):
+                inputs.add(operand)
+        if op == ':=':
+            assigned.add(arg1)
+
+    variable_base = len(constants)
+    result_base = variable_base + len(variables)
+
+    def encode(operand):
+        if operand is None:
+            return NO_OPERAND
+        if is_reference(operand):
+            return result_base + reference_index(operand)
+        if is_constant(operand):
+            return constant_index(operand)
+        return variable_base + slots[operand]
+
+    code = array('i')
+    for op, arg1, arg2 in triples:
+        if op not in OPERATORS:
+            raise ValueError(f"Operador sin código de operación: '{op}'")
+        code.extend((OPERATORS[op], encode(arg1), encode(arg2)))
+
+    symbol_ids = [symbol_table.find_symbol_id(name) if symbol_table else None for name in variables]
+    return Bytecode(code, constants, variables, symbol_ids, inputs)
+
+
+def execute(program, inputs):
+    """
+    Ejecuta el bytecode con los valores de entrada dados (nombre -> valor)
+    y devuelve un diccionario con las variables asignadas. Una variable que
+    se lee antes de asignarse y no tiene valor de entrada es un error.
+    """
+    frame = list(program.constants)
+    for name in program.variables:
+        if name in inputs:
+            frame.append(inputs[name])
+        elif name in program.inputs:
+            raise ValueError(f"La variable '{name}' no tiene valor de entrada")
+        else:
+            frame.append(BOOLEAN_LITERALS.get(name))  # Se asigna antes de leerse (o es true/false)
+    result = len(frame)
+    frame.extend([None] * program.instruction_count)
+
+    code = program.code
+    operations = OPCODE_OPERATIONS
+    assigned = []
+    for opcode, a, b in zip(code[0::3], code[1::3], code[2::3]):
+        if opcode == ASSIGN:
+            frame[a] = frame[result] = frame[b]
+            assigned.append(a)
+        elif opcode == NOT:
+            frame[result] = not frame[a]
+        else:
+            frame[result] = operations[opcode](frame[a], frame[b])
+        result += 1
+
+    variable_base = len(program.constants)
+    return {program.variables[a - variable_base]: frame[a] for a in assigned}
@@ -0,0 +1,173 @@
+# compiler/canonical.py
+
+import hashlib
+
+from .syntax_analizer import Node
+from .symbol_tables import ConstantPool, TypeSystem
+
+# Forma canónica de una expresión: dos expresiones que solo difieren en
+# espacios, paréntesis redundantes u orden de operandos de operadores
+# conmutativos producen el mismo AST normalizado y el mismo digest.
+#
+# Reglas (respetando TypeSystem):
+#   - Operadores conmutativos: los operandos se ordenan. '+' solo es
+#     conmutativo entre números (con cadenas es concatenación y se conserva
+#     el orden); '=' y '<>' siempre; 'and'/'or' entre booleanos.
+#   - Cadenas de un mismo operador asociativo (a + b + c) se aplanan y se
+#     ordenan, pero solo cuando reasociar no cambia el resultado: '+' y '*'
+#     entre enteros, 'and'/'or' entre booleanos. Con reales se mantiene la
+#     forma del árbol porque el redondeo depende del orden de las operaciones.
+#   - 'a > b' se escribe 'b < a' y 'a >= b' se escribe 'b <= a'.
+
+MIRRORED = {'>': '<', '>=': '<='}
+ALWAYS_COMMUTATIVE = ('=', '<>')
+
+
+def is_commutative(op, left_type, right_type):
+    if op in ALWAYS_COMMUTATIVE:
+        return True
+    if op in ('+', '*'):
+        return left_type in ('integer', 'real') and right_type in ('integer', 'real')
+    if op in ('and', 'or'):
+        return left_type == 'boolean' and right_type == 'boolean'
+    return False
+
+
+def _is_reassociable(op, node_type):
+    if op in ('+', '*'):
+        return node_type == 'integer'
+    if op in ('and', 'or'):
+        return node_type == 'boolean'
+    return False
+
+
+def _key(*parts):
+    """Clave de un nodo: hash de su operador y de las claves de sus hijos (árbol de Merkle)."""
+    return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+
+class _Chain:
+    """Cadena aplanada de un operador asociativo; se arma al final, ya ordenada."""
+    __slots__ = ('op', 'type', 'operands')
+
+    def __init__(self, op, node_type, operands):
+        self.op = op
+        self.type = node_type
+        self.operands = operands
+
+
+def _type_of(entry):
+    return entry.type if isinstance(entry, _Chain) else entry[1]
+
+
+class CanonicalForm:
+    """AST normalizado, su texto (con todos los paréntesis) y su digest."""
+    def __init__(self, root, text, digest):
+        self.root = root
+        self.text = text
+        self.digest = digest
+
+
+def canonical_text(root):
+    """Texto de un AST con todos los paréntesis (sin recursión)."""
+    parts = []
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif not item.left and not item.right:
+            parts.append(item.value)
+        elif item.right is None:
+            stack += [")", item.left, f"({item.value} "]
+        else:
+            stack += [")", item.right, f" {item.value} ", item.left, "("]
+    return "".join(parts)
+
+
+class Canonicalizer:
+    """
+    Normaliza ASTs recién construidos por SyntaxAnalyzer. Los tipos de las
+    hojas salen de los literales y de la tabla de símbolos; los de las
+    operaciones, de TypeSystem (igual que en el análisis semántico).
+    """
+    def __init__(self, symbol_table=None):
+        self.symbol_table = symbol_table
+
+    def _leaf_type(self, value):
+        literal = ConstantPool.literal_type(value)
+        if literal is not None:
+            return literal
+        if value in ('true', 'false'):
+            return 'boolean'
+        symbol = self.symbol_table.find_symbol_by_name(value) if self.symbol_table else None
+        return symbol.type if symbol else None
+
+    def canonicalize(self, root):
+        """Devuelve la CanonicalForm del AST (sin modificar el original)."""
+        # Para cada nodo original: (nodo normalizado, tipo, clave) o una _Chain pendiente
+        built = {}
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not node.left and not node.right:
+                built[id(node)] = (Node(node.value), self._leaf_type(node.value), _key('hoja', node.value))
+                continue
+            if not children_done:
+                stack.append((node, True))
+                if node.right:
+                    stack.append((node.right, False))
+                if node.left:
+                    stack.append((node.left, False))
+                continue
+            built[id(node)] = self._normalize(node, built)
+
+        new_root, _, key = self._materialize(built[id(root)])
+        return CanonicalForm(new_root, canonical_text(new_root), key)
+
+    @staticmethod
+    def _materialize(entry):
+        """Arma una cadena pendiente como árbol por la izquierda ((a op b) op c), con operandos ordenados."""
+        if not isinstance(entry, _Chain):
+            return entry
+        operands = sorted(entry.operands, key=lambda operand: operand[2])
+        current = operands[0]
+        for operand in operands[1:]:
+            current = (Node(entry.op, current[0], operand[0]), entry.type, _key(entry.op, current[2], operand[2]))
+        return current
+
+    def _normalize(self, node, built):
+        op = node.value
+        left = built.pop(id(node.left))
+        if node.right is None:  # 'not'
+            left = self._materialize(left)
+            return Node(op, left[0]), TypeSystem.get_result_type(op, left[1], None), _key(op, left[2])
+
+        right = built.pop(id(node.right))
+        if op in MIRRORED:
+            op = MIRRORED[op]
+            left, right = right, left
+        node_type = TypeSystem.get_result_type(op, _type_of(left), _type_of(right))
+
+        # Si se puede reasociar, las cadenas del mismo operador se unen (se ordenan al final)
+        if _is_reassociable(op, node_type):
+            operands = []
+            for operand in (left, right):
+                if isinstance(operand, _Chain) and operand.op == op:
+                    if not operands:
+                        operands = operand.operands  # Se reutiliza la lista: evita copias en cadenas largas
+                    else:
+                        operands.extend(operand.operands)
+                else:
+                    operands.append(self._materialize(operand))
+            return _Chain(op, node_type, operands)
+
+        left, right = self._materialize(left), self._materialize(right)
+        if op != ':=' and is_commutative(op, left[1], right[1]) and right[2] < left[2]:
+            left, right = right, left
+        return Node(op, left[0], right[0]), node_type, _key(op, left[2], right[2])
+
+
+def canonicalize(ast_root, symbol_table=None):
+    """Atajo: forma canónica de un AST."""
+    return Canonicalizer(symbol_table).canonicalize(ast_root)
@@ -0,0 +1,273 @@
+# compiler/columnar.py
+
+import csv
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch_dag import BatchDAG
+from .evaluator import BOOLEAN_LITERALS
+from .optimizer import is_reference, is_constant
+from .range_analysis import WIDEST_STORAGE, storage_type
+
+# Evaluación por columnas: en lugar de evaluar las tripletas fila por fila, cada
+# tripleta se aplica a una columna completa del bloque (una lista por operando).
+#
+# Entradas y salidas:
+#   CSV:     un archivo con encabezado; cada variable se lee de su columna.
+#   Binario: un archivo '<columna>.bin' por variable con los valores crudos
+#            (little endian del sistema), del tipo de almacenamiento de la variable.
+
+DEFAULT_CHUNK_SIZE = 65536
+
+# Códigos de array para cada tipo de almacenamiento
+STORAGE_TYPECODES = {
+    'int8': 'b', 'int16': 'h', 'int32': 'i', 'int64': 'q',
+    'float32': 'f', 'float64': 'd',
+    'boolean': 'b',
+}
+
+BINARY_EXTENSION = '.bin'
+
+# Estado de cada proceso de trabajo: el plan se envía una sola vez, al iniciar
+# el proceso, y después solo viajan los bloques
+_WORKER_STATE = {}
+
+
+def _init_worker(plan, outputs):
+    _WORKER_STATE['plan'] = plan
+    _WORKER_STATE['outputs'] = outputs
+
+
+def _evaluate_in_worker(columns):
+    return _evaluate_plan(_WORKER_STATE['plan'], _WORKER_STATE['outputs'], columns)
+
+
+def _evaluate_plan(plan, outputs, columns):
+    """Evalúa el plan sobre un bloque; 'outputs' es [(variable, es_real), ...]."""
+    columns = plan.evaluate_chunk(columns)
+    # Una variable real guarda valores reales aunque la expresión sea entera
+    return {name: list(map(float, columns[name])) if is_real else columns[name] for name, is_real in outputs}
+
+
+def _parse_boolean(text):
+    text = text.strip().lower()
+    if text in ('true', '1'):
+        return True
+    if text in ('false', '0'):
+        return False
+    raise ValueError(f"'{text}' no es un valor booleano")
+
+# Conversión de los valores de texto (CSV) según el tipo declarado
+COERCIONS = {
+    'integer': int,
+    'real': float,
+    'boolean': _parse_boolean,
+    'char': str,
+    'string': str,
+}
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class ColumnSpec:
+    """Variable de entrada o salida: columna, tipo declarado y tipo de almacenamiento."""
+    def __init__(self, name, column, value_type, storage):
+        self.name = name
+        self.column = column
+        self.type = value_type
+        self.storage = storage
+
+    @property
+    def typecode(self):
+        code = STORAGE_TYPECODES.get(self.storage or self.type)
+        if code is None:
+            raise ValueError(f"La variable '{self.name}' de tipo {self.type} no se puede guardar en binario")
+        return code
+
+
+class ColumnarEvaluator:
+    """
+    Evalúa una o más asignaciones compiladas (compile_expression) sobre
+    archivos de entrada grandes, por bloques de 'chunk_size' filas, y escribe
+    las variables asignadas en archivos de salida. La memoria usada depende
+    del tamaño del bloque, no del tamaño del archivo.
+
+    Las columnas y la conversión de tipos salen de las declaraciones de la
+    tabla de símbolos (tipo, 'column' y 'value_range'). Con 'workers' > 1 los
+    bloques se evalúan en varios procesos (la evaluación usa la CPU, así que
+    los hilos no la aceleran), con a lo sumo 2 * workers bloques en memoria,
+    y se escriben en el orden de entrada.
+
+    Todas las asignaciones se evalúan con un solo plan (BatchDAG): cada
+    subexpresión distinta del lote se calcula una vez por bloque.
+    """
+    def __init__(self, compiled_expressions, symbol_table, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+        self.compiled = list(compiled_expressions)
+        self.symbol_table = symbol_table
+        self.chunk_size = chunk_size
+        self.workers = workers
+        for compiled in self.compiled:
+            if compiled.errors:
+                raise ValueError(f"Errores semánticos en '{compiled.expression}': {'; '.join(compiled.errors)}")
+            if compiled.target is None:
+                raise ValueError(f"La expresión '{compiled.expression}' no es una asignación")
+
+        targets = [compiled.target for compiled in self.compiled]
+        self.outputs = [self._spec(compiled.target, compiled.ast_root) for compiled in self.compiled]
+        self.inputs = []
+        for compiled in self.compiled:
+            for op, arg1, arg2 in compiled.triples:
+                for operand in ((arg2,) if op == ':=' else (arg1, arg2)):
+                    if (operand is None or is_reference(operand) or is_constant(operand)
+                            or operand in BOOLEAN_LITERALS or operand in targets):
+                        continue
+                    if all(spec.name != operand for spec in self.inputs):
+                        self.inputs.append(self._spec(operand))
+        self.plan = BatchDAG(self.compiled, symbol_table)
+        self.rows = 0
+        self.chunks = 0
+
+    def _spec(self, name, assignment=None):
+        symbol = self.symbol_table.find_symbol_by_name(name)
+        if symbol is None:
+            raise ValueError(f"Variable '{name}' no declarada en la tabla de símbolos")
+        if assignment is not None and assignment.right is not None:
+            # Salida: el rango probado del valor asignado. Los reales se calculan
+            # en float64 y se guardan así (un float32 perdería precisión)
+            if symbol.type == 'real':
+                return ColumnSpec(name, symbol.column, symbol.type, WIDEST_STORAGE['real'])
+            value_range = getattr(assignment.right, 'value_range', None)
+        else:
+            value_range = symbol.value_range
+        return ColumnSpec(name, symbol.column, symbol.type, storage_type(symbol.type, value_range))
+
+    def evaluate_chunk(self, columns):
+        """Evalúa todas las asignaciones sobre un bloque (nombre -> lista de valores)."""
+        return _evaluate_plan(self.plan, self._output_types(), columns)
+
+    def _output_types(self):
+        return [(spec.name, spec.type == 'real') for spec in self.outputs]
+
+    def _evaluate_stream(self, chunks):
+        """Evalúa los bloques (en paralelo si se pidió) y los devuelve en orden de entrada."""
+        if not self.workers or self.workers <= 1:
+            for chunk in chunks:
+                yield self.evaluate_chunk(chunk)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.plan, self._output_types())) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_evaluate_in_worker, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _count(self, chunks):
+        for chunk in chunks:
+            self.chunks += 1
+            self.rows += len(next(iter(chunk.values()))) if chunk else 0
+            yield chunk
+
+    # --- CSV ---
+    def iter_csv_chunks(self, filename):
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            positions = []
+            for spec in self.inputs:
+                if spec.column not in header:
+                    raise ValueError(f"La columna '{spec.column}' de la variable '{spec.name}' no está en '{filename}'")
+                positions.append(header.index(spec.column))
+            coercions = [COERCIONS[spec.type] for spec in self.inputs]
+
+            rows = []
+            for row in reader:
+                rows.append(row)
+                if len(rows) == self.chunk_size:
+                    yield self._csv_columns(rows, positions, coercions)
+                    rows = []
+            if rows:
+                yield self._csv_columns(rows, positions, coercions)
+
+    def _csv_columns(self, rows, positions, coercions):
+        return {
+            spec.name: [coerce(row[position]) for row in rows]
+            for spec, position, coerce in zip(self.inputs, positions, coercions)
+        }
+
+    def run_csv(self, input_file, output_file):
+        """Evalúa un CSV de entrada y escribe las variables asignadas en un CSV de salida."""
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([spec.column for spec in self.outputs])
+            for result in self._evaluate_stream(self._count(self.iter_csv_chunks(input_file))):
+                columns = [map(_format_value, result[spec.name]) for spec in self.outputs]
+                writer.writerows(zip(*columns))
+        return output_file
+
+    # --- Binario (un archivo por columna) ---
+    def iter_binary_chunks(self, input_dir):
+        files = [open(os.path.join(input_dir, spec.column + BINARY_EXTENSION), 'rb') for spec in self.inputs]
+        try:
+            while True:
+                chunk = {}
+                for spec, f in zip(self.inputs, files):
+                    values = array(spec.typecode)
+                    data = f.read(self.chunk_size * values.itemsize)
+                    if len(data) % values.itemsize:
+                        raise ValueError(f"'{f.name}' termina con un registro incompleto "
+                                         f"({len(data) % values.itemsize} de {values.itemsize} bytes)")
+                    values.frombytes(data)
+                    chunk[spec.name] = values.tolist() if spec.type != 'boolean' else [bool(v) for v in values]
+                lengths = {len(values) for values in chunk.values()}
+                if len(lengths) > 1:
+                    raise ValueError(f"Las columnas de entrada en '{input_dir}' tienen longitudes distintas")
+                if not chunk or not lengths or 0 in lengths:
+                    return
+                yield chunk
+        finally:
+            for f in files:
+                f.close()
+
+    def run_binary(self, input_dir, output_dir):
+        """Evalúa columnas binarias y escribe cada variable asignada en '<columna>.bin'."""
+        os.makedirs(output_dir, exist_ok=True)
+        files = [open(os.path.join(output_dir, spec.column + BINARY_EXTENSION), 'wb') for spec in self.outputs]
+        try:
+            for result in self._evaluate_stream(self._count(self.iter_binary_chunks(input_dir))):
+                for spec, f in zip(self.outputs, files):
+                    try:
+                        array(spec.typecode, result[spec.name]).tofile(f)
+                    except OverflowError:
+                        raise ValueError(f"Un valor de '{spec.name}' no cabe en {spec.storage}")
+        finally:
+            for f in files:
+                f.close()
+        return output_dir
+
+
+def write_binary_column(filename, values, storage):
+    """Escribe una columna binaria (por ejemplo, para preparar entradas)."""
+    with open(filename, 'wb') as f:
+        array(STORAGE_TYPECODES[storage], values).tofile(f)
+    return filename
+
+
+def read_binary_column(filename, storage):
+    values = array(STORAGE_TYPECODES[storage])
+    with open(filename, 'rb') as f:
+        values.frombytes(f.read())
+    return values.tolist()
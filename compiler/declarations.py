@@ -0,0 +1,353 @@
+# compiler/declarations.py
+
+import argparse
+import csv
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from .symbol_tables import VariableSymbolTable
+
+# Carga de declaraciones de variables desde archivos, para entornos con
+# cientos de miles de variables:
+#
+#   CSV:        encabezado con 'name' y 'type' y, opcionalmente, 'min', 'max'
+#               (rango declarado) y 'column' (columna de entrada/salida).
+#   JSON:       lista de objetos {'name', 'type', 'range': [mín, máx], 'column'}
+#               (el formato de compiler.distributed.symbol_declarations).
+#   Sección var: 'var x, y : integer; z : real;' (como en el lenguaje; una
+#               sección puede tener varias declaraciones y repetir 'var').
+#
+# Los tres formatos producen declaraciones que VariableSymbolTable.add_symbols()
+# agrega en una sola pasada. Una tabla ya cargada se puede guardar como
+# instantánea binaria (write_snapshot) que los trabajadores cargan en
+# milisegundos (load_snapshot).
+
+DECLARABLE_TYPES = ('integer', 'real', 'char', 'string', 'boolean')
+
+SNAPSHOT_EXTENSION = '.symt'
+
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+_NUMBER = re.compile(r'[+-]?\d+')
+_VAR_SECTION = re.compile(
+    r'\s*(?:(?P<var>var)\b|(?P<names>[A-Za-z_]\w*(?:\s*,\s*[A-Za-z_]\w*)*)\s*:\s*(?P<type>[A-Za-z_]\w*)\s*(?:;|\Z))',
+    re.IGNORECASE)
+
+
+def _declaration(name, symbol_type, value_range=None, column=None, where=''):
+    if not isinstance(name, str) or not _IDENTIFIER.fullmatch(name):
+        raise ValueError(f"Nombre de variable inválido {name!r}{where}")
+    symbol_type = str(symbol_type or '').strip().lower()
+    if symbol_type not in DECLARABLE_TYPES:
+        raise ValueError(f"Tipo desconocido '{symbol_type}' para la variable '{name}'{where}")
+    return {'name': name, 'type': symbol_type, 'range': value_range, 'column': column or None}
+
+
+def _number(text):
+    text = text.strip()
+    return int(text) if _NUMBER.fullmatch(text) else float(text)
+
+
+def iter_csv_declarations(f):
+    """Declaraciones de un archivo CSV abierto (una por fila), sin leerlo completo."""
+    reader = csv.DictReader(f)
+    if reader.fieldnames is None or not {'name', 'type'} <= set(reader.fieldnames):
+        raise ValueError("El CSV de declaraciones debe tener las columnas 'name' y 'type'")
+    for line, row in enumerate(reader, start=2):
+        where = f" (línea {line})"
+        low, high = row.get('min') or '', row.get('max') or ''
+        value_range = None
+        if low.strip() or high.strip():
+            try:
+                value_range = (_number(low), _number(high))
+            except ValueError:
+                raise ValueError(f"Rango inválido para '{row['name']}'{where}: '{low}'..'{high}'")
+        yield _declaration((row['name'] or '').strip(), row['type'], value_range, row.get('column'), where)
+
+
+def iter_json_declarations(data):
+    """Declaraciones de una lista JSON ya decodificada."""
+    if not isinstance(data, list):
+        raise ValueError("El JSON de declaraciones debe ser una lista de objetos")
+    for position, item in enumerate(data):
+        value_range = item.get('range')
+        yield _declaration(item.get('name'), item.get('type'), tuple(value_range) if value_range else None,
+                           item.get('column'), f" (elemento {position})")
+
+
+def iter_var_section(text):
+    """Declaraciones de una o varias secciones 'var' ('var x, y : integer; z : real;')."""
+    position = 0
+    in_section = False
+    while position < len(text):
+        match = _VAR_SECTION.match(text, position)
+        if match is None:
+            if not text[position:].strip():
+                return
+            line = text.count('\n', 0, position) + 1
+            fragment = text[position:].strip().split('\n')[0][:30]
+            raise ValueError(f"Declaración inválida en la línea {line}: '{fragment}'")
+        position = match.end()
+        if match.group('var'):
+            in_section = True
+            continue
+        if not in_section:
+            raise ValueError("Las declaraciones deben estar dentro de una sección 'var'")
+        for name in match.group('names').split(','):
+            yield _declaration(name.strip(), match.group('type'))
+
+
+def load_declarations(filename, symbol_table=None):
+    """
+    Carga un archivo de declaraciones (por extensión: .csv, .json, .symt para
+    una instantánea; cualquier otra, sección var) y devuelve la tabla.
+    Con 'symbol_table' las declaraciones se agregan a esa tabla.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == SNAPSHOT_EXTENSION:
+        if symbol_table is not None:
+            raise ValueError("Una instantánea se carga como tabla nueva (no se agrega a otra tabla)")
+        return load_snapshot(filename)
+    if symbol_table is None:
+        symbol_table = VariableSymbolTable()
+    if extension == '.csv':
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            symbol_table.add_symbols(iter_csv_declarations(f))
+    elif extension == '.json':
+        with open(filename, 'r', encoding='utf-8') as f:
+            symbol_table.add_symbols(iter_json_declarations(json.load(f)))
+    else:
+        with open(filename, 'r', encoding='utf-8') as f:
+            symbol_table.add_symbols(iter_var_section(f.read()))
+    return symbol_table
+
+
+def symbol_table_from_var_section(text):
+    """Tabla de símbolos con las declaraciones de una sección var."""
+    symbol_table = VariableSymbolTable()
+    symbol_table.add_symbols(iter_var_section(text))
+    return symbol_table
+
+
+# --- Instantánea binaria ---
+#
+# Formato (little endian):
+#
+#   Cabecera: magic 'SYMT' | versión (u16) | reservado (u16) | nº de símbolos (u32)
+#             | nº de cadenas (u32) | bytes de cadenas (u32) | siguiente dirección (u32)
+#             | siguiente scope (u32)
+#   Columnas: un arreglo por campo, en el orden de SNAPSHOT_COLUMNS, alineados a 8 bytes
+#   Cadenas:  todas las cadenas distintas en UTF-8, separadas por '\0'. Las
+#             primeras son los nombres de los símbolos, en el orden de las filas
+#             (la cadena i es el nombre de la fila i), así el índice por nombre
+#             se arma sin recorrer una columna más.
+#
+# Cargar es copiar los arreglos (array.frombytes) y separar las cadenas con
+# una sola llamada: los diccionarios de cada símbolo se arman recién cuando
+# se consulta ese símbolo (SnapshotSymbols).
+
+SNAPSHOT_MAGIC = b'SYMT'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sHHIIIII')
+NO_STRING = 0xFFFFFFFF
+
+# (campo, código de array); los campos de texto son índices en las cadenas
+SNAPSHOT_COLUMNS = (
+    ('id', 'q'), ('address', 'I'), ('scope', 'i'),
+    ('type', 'I'), ('mode', 'I'), ('value', 'I'), ('range', 'I'), ('column', 'I'),
+)
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def _format_range(value_range):
+    return None if value_range is None else f"{value_range[0]!r} {value_range[1]!r}"
+
+
+def _parse_range(text):
+    low, high = text.split(' ')
+    return (_number(low), _number(high))
+
+
+def write_snapshot(symbol_table, filename):
+    """
+    Guarda la tabla como instantánea binaria. La tabla no puede tener scopes
+    abiertos ni nombres ocultos por otro scope (cada nombre, un símbolo).
+    """
+    if symbol_table._frames:
+        raise ValueError("No se puede guardar una instantánea con scopes abiertos")
+    symbols = dict(symbol_table.symbols)
+    if len(symbol_table._names) != len(symbols):
+        raise ValueError("No se puede guardar una instantánea con nombres declarados en varios scopes")
+
+    strings = {}
+    columns = {field: array(code) for field, code in SNAPSHOT_COLUMNS}
+
+    def string(text):
+        if text is None:
+            return NO_STRING
+        text = str(text)
+        if '\0' in text:
+            raise ValueError(f"La cadena {text!r} no se puede guardar en una instantánea")
+        return strings.setdefault(text, len(strings))
+
+    for info in symbols.values():
+        string(info['name'])  # Nombres distintos: ocupan las cadenas 0 .. n - 1
+    for symbol_id, info in symbols.items():
+        columns['id'].append(symbol_id)
+        columns['address'].append(int(info['address'], 16))
+        columns['scope'].append(info['scope'])
+        columns['type'].append(string(info['type']))
+        columns['mode'].append(string(info['mode']))
+        columns['value'].append(string(info.get('value')))
+        columns['range'].append(string(_format_range(info.get('range'))))
+        columns['column'].append(string(info.get('column')))
+
+    blob = '\0'.join(strings).encode('utf-8')
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(symbols), len(strings), len(blob),
+                                     symbol_table.address_counter, symbol_table._next_scope))
+        for field, _ in SNAPSHOT_COLUMNS:
+            column = columns[field]
+            if sys.byteorder == 'big':
+                column.byteswap()
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            f.write(column.tobytes())
+        f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        f.write(blob)
+    os.replace(temporary, filename)  # Un trabajador nunca lee una instantánea a medio escribir
+    return filename
+
+
+class SnapshotSymbols(Mapping):
+    """
+    Símbolos de una instantánea (ID -> información), de solo lectura. Cada
+    diccionario de información se arma cuando se consulta.
+    """
+    def __init__(self, columns, strings):
+        self._columns = columns
+        self._strings = strings
+        self._rows = dict(zip(columns['id'], range(len(columns['id']))))
+
+    def _string(self, index):
+        return None if index == NO_STRING else self._strings[index]
+
+    def __getitem__(self, symbol_id):
+        row = self._rows[symbol_id]
+        columns, string = self._columns, self._string
+        value_range = string(columns['range'][row])
+        return {
+            'name': self._strings[row],
+            'type': string(columns['type'][row]),
+            'value': string(columns['value'][row]),
+            'scope': columns['scope'][row],
+            'address': f"{columns['address'][row]:04X}",
+            'mode': string(columns['mode'][row]),
+            'range': _parse_range(value_range) if value_range is not None else None,
+            'column': string(columns['column'][row]),
+        }
+
+    def __contains__(self, symbol_id):
+        return symbol_id in self._rows
+
+    def __iter__(self):
+        return iter(self._columns['id'])
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class SnapshotNames(Mapping):
+    """Índice nombre -> pila de IDs de una instantánea (un símbolo por nombre)."""
+    def __init__(self, columns, strings):
+        self._ids = dict(zip(strings, columns['id']))  # Las primeras cadenas son los nombres
+
+    def __getitem__(self, name):
+        return [self._ids[name]]
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+
+def load_snapshot(filename, frozen=True):
+    """
+    Carga una instantánea. Con frozen=True (lo habitual en los trabajadores)
+    la tabla queda congelada y sus símbolos se decodifican bajo demanda; cada
+    compilación trabaja sobre un overlay(). Con frozen=False se arma una
+    tabla común, modificable.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError(f"'{filename}' no es una instantánea de tabla de símbolos")
+    magic, version, _, count, string_count, blob_size, address_counter, next_scope = \
+        SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"'{filename}' no es una instantánea de tabla de símbolos")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Versión de instantánea no soportada: {version}")
+
+    columns = {}
+    offset = SNAPSHOT_HEADER.size
+    for field, code in SNAPSHOT_COLUMNS:
+        column = array(code)
+        offset = _align(offset)
+        end = offset + column.itemsize * count
+        column.frombytes(data[offset:end])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        columns[field] = column
+        offset = end
+    offset = _align(offset)
+    if offset + blob_size != len(data):
+        raise ValueError(f"La instantánea '{filename}' está incompleta o dañada")
+    strings = data[offset:].decode('utf-8').split('\0') if string_count else []
+    if len(strings) != string_count:
+        raise ValueError(f"La instantánea '{filename}' está incompleta o dañada")
+
+    symbol_table = VariableSymbolTable()
+    symbol_table.symbols = SnapshotSymbols(columns, strings)
+    symbol_table._names = SnapshotNames(columns, strings)
+    symbol_table.address_counter = address_counter
+    symbol_table._next_scope = next_scope
+    if frozen:
+        return symbol_table.freeze()
+    symbol_table.symbols = dict(symbol_table.symbols)
+    symbol_table._names = {name: list(stack) for name, stack in symbol_table._names.items()}
+    return symbol_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga declaraciones de variables y guarda una instantánea.")
+    parser.add_argument('declarations', help='Archivo de declaraciones (.csv, .json, sección var o .symt)')
+    parser.add_argument('-o', '--output', help=f"Instantánea a generar (extensión {SNAPSHOT_EXTENSION})")
+    args = parser.parse_args(argv)
+
+    import time
+    start = time.perf_counter()
+    symbol_table = load_declarations(args.declarations)
+    elapsed = time.perf_counter() - start
+    print(f"{len(symbol_table.symbols)} variables cargadas en {elapsed * 1000:.1f} ms")
+    if args.output:
+        write_snapshot(symbol_table, args.output)
+        print(f"Instantánea guardada en '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
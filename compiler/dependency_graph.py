@@ -0,0 +1,174 @@
+# compiler/dependency_graph.py
+
+from .evaluator import evaluate_ast
+
+
+class Assignment:
+    """Una asignación 'destino := expresión' compilada y sus variables de entrada."""
+    def __init__(self, compiled, inputs):
+        self.compiled = compiled
+        self.target = compiled.target
+        self.inputs = inputs  # Variables leídas por la expresión (en orden de aparición)
+
+
+def _read_variables(root):
+    """
+    Variables leídas en el lado derecho de una asignación (sin recursión):
+    las hojas que el análisis semántico resolvió como variables (modo
+    'direct'). No se consulta la tabla de símbolos: las variables de un bloque
+    ya cerrado (compiler.program) no están en ella.
+    """
+    names = []
+    stack = [root.right]
+    while stack:
+        node = stack.pop()
+        if not node.left and not node.right:
+            if getattr(node, 'addressing_mode', None) == 'direct':
+                if node.value not in names:
+                    names.append(node.value)
+            continue
+        if node.right:
+            stack.append(node.right)
+        if node.left:
+            stack.append(node.left)
+    return names
+
+
+class DependencyGraph:
+    """
+    Grafo de dependencias entre asignaciones (como en una hoja de cálculo).
+
+    Cada asignación depende de las asignaciones que calculan sus variables de
+    entrada, sin importar en qué orden aparecen en el programa. Las
+    asignaciones se ordenan topológicamente por niveles (las de un mismo
+    nivel no dependen entre sí) y se evalúan nivel por nivel. Al cambiar una
+    variable, update() reevalúa solo las asignaciones afectadas.
+    """
+    def __init__(self, compiled_expressions, symbol_table):
+        self.symbol_table = symbol_table
+        self.assignments = {}
+        for compiled in compiled_expressions:
+            if compiled.target is None:
+                raise ValueError(f"La expresión '{compiled.expression}' no es una asignación")
+            if compiled.target in self.assignments:
+                raise ValueError(f"La variable '{compiled.target}' se asigna más de una vez")
+            self.assignments[compiled.target] = Assignment(
+                compiled, _read_variables(compiled.ast_root))
+
+        # Aristas: variable -> asignaciones que la leen
+        self.dependents = {}
+        for assignment in self.assignments.values():
+            for name in assignment.inputs:
+                self.dependents.setdefault(name, []).append(assignment.target)
+
+        self.levels = self._schedule()
+        self.env = {}
+        self.evaluations = 0  # Asignaciones evaluadas (para medir la reevaluación incremental)
+
+    def _schedule(self):
+        """Orden topológico por niveles (algoritmo de Kahn)."""
+        pending = {
+            target: sum(1 for name in assignment.inputs if name in self.assignments)
+            for target, assignment in self.assignments.items()
+        }
+        level = [target for target, count in pending.items() if count == 0]
+        levels = []
+        while level:
+            levels.append(level)
+            next_level = []
+            for target in level:
+                for dependent in self.dependents.get(target, ()):
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        next_level.append(dependent)
+            level = next_level
+
+        scheduled = sum(len(level) for level in levels)
+        if scheduled != len(self.assignments):
+            cycle = sorted(target for target, count in pending.items() if count > 0)
+            raise ValueError(f"Dependencia circular entre las asignaciones de: {', '.join(cycle)}")
+        return levels
+
+    def inputs(self):
+        """Variables de entrada del programa (leídas pero nunca asignadas)."""
+        names = []
+        for assignment in self.assignments.values():
+            for name in assignment.inputs:
+                if name not in self.assignments and name not in names:
+                    names.append(name)
+        return names
+
+    def _evaluate(self, target):
+        assignment = self.assignments[target]
+        # La raíz es ':=': evaluate_ast guarda el resultado en self.env
+        evaluate_ast(assignment.compiled.ast_root, self.env, assignment.compiled.constant_pool)
+        self.evaluations += 1
+
+    def _run_levels(self, targets):
+        for level in self.levels:
+            for target in level:
+                if target in targets:
+                    self._evaluate(target)
+
+    def evaluate(self, values):
+        """
+        Evalúa todas las asignaciones con los valores de entrada dados.
+        Devuelve el entorno con las entradas y todas las variables asignadas.
+        """
+        self.env = dict(values)
+        self._run_levels(set(self.assignments))
+        return self.env
+
+    def affected_by(self, names):
+        """Asignaciones que dependen (directa o indirectamente) de las variables dadas."""
+        affected = set()
+        stack = list(names)
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    stack.append(dependent)
+        return affected
+
+    def update(self, changes):
+        """
+        Cambia variables de entrada y reevalúa solo las asignaciones afectadas.
+        Devuelve el conjunto de variables recalculadas.
+        """
+        for name in changes:
+            if name in self.assignments:
+                raise ValueError(f"'{name}' es una variable asignada; solo se pueden cambiar las entradas")
+        self.env.update(changes)
+        affected = self.affected_by(changes)
+        self._run_levels(affected)
+        return affected
+
+    def generate_markdown(self):
+        md = "## Grafo de Dependencias\n\n"
+        md += "| Nivel | Asignación | Depende de |\n"
+        md += "|:-----:|:-----------|:-----------|\n"
+        for number, level in enumerate(self.levels):
+            for target in level:
+                assignment = self.assignments[target]
+                inputs = ', '.join(f"`{name}`" for name in assignment.inputs) or '—'
+                md += f"| {number} | `{assignment.compiled.expression}` | {inputs} |\n"
+
+        md += "\n```mermaid\n"
+        md += "graph LR\n"
+        for name, dependents in self.dependents.items():
+            for dependent in dependents:
+                md += f"    {name} --> {dependent}\n"
+        md += "```\n"
+        return md
+
+
+def compile_program(source, symbol_table=None):
+    """
+    Compila un programa (compiler.program) y construye el grafo de
+    dependencias de sus asignaciones.
+    """
+    from .program import compile_source
+    program = compile_source(source, symbol_table)
+    if program.errors:
+        raise ValueError(f"Errores semánticos: {'; '.join(program.errors)}")
+    return DependencyGraph(program.statements, program.symbol_table)
@@ -0,0 +1,129 @@
+# compiler/diagnostics.py
+
+from .tokens import describe_span
+
+# Códigos de diagnóstico por fase. La primera letra indica la fase:
+# P (parseo), L (léxico), S (sintaxis), G (gramática / árbol de derivación)
+# y T (tipos / análisis semántico).
+CODES = {
+    'P001': "Literal sin cerrar",
+    'L001': "Lexema no reconocido",
+    'S001': "Falta un operador",
+    'S002': "Falta un operando",
+    'S003': "Paréntesis de cierre sin apertura",
+    'S004': "Paréntesis de apertura sin cierre",
+    'S005': "Expresión inválida",
+    'S006': "Varias sentencias en una expresión",
+    'G001': "Token inesperado según la gramática",
+    'T001': "Variable no declarada",
+    'T002': "Operador 'not' sin operando",
+    'T003': "Operador 'not' aplicado a un valor no booleano",
+    'T004': "Operación no permitida entre esos tipos",
+    'T005': "Asignación entre tipos incompatibles",
+}
+
+# Operando que la recuperación de errores inserta donde faltaba uno
+ERROR_OPERAND = '<error>'
+
+
+class Diagnostic:
+    """Un error encontrado por alguna fase: código, mensaje y posición en el código fuente."""
+    __slots__ = ('code', 'message', 'span', 'phase', 'source')
+
+    def __init__(self, code, message, span=None, phase=None, source=None):
+        self.code = code
+        self.message = message
+        self.span = span
+        self.phase = phase
+        self.source = source  # Origen (por ejemplo, el índice de la expresión en un lote)
+
+    @property
+    def column(self):
+        return self.span[0] + 1 if self.span else None
+
+    def __str__(self):
+        return f"[{self.code}] {self.message}{describe_span(self.span)}"
+
+    def __repr__(self):
+        return f"Diagnostic({self.code!r}, {self.message!r}, {self.span!r})"
+
+
+class Diagnostics:
+    """
+    Colector de diagnósticos compartido por todas las fases. Cada fase
+    registra sus errores con error() y se recupera para seguir analizando,
+    así una sola pasada encuentra varios errores por expresión.
+
+    Con strict=True (lo que usan las fases cuando no reciben un colector)
+    el primer error se lanza como ValueError, igual que antes.
+    """
+    def __init__(self, strict=False, limit=None):
+        self.strict = strict
+        self.limit = limit  # Máximo de diagnósticos guardados (None: sin límite)
+        self.items = []
+        self.dropped = 0
+        self._positions = set()  # Inicios ya informados: un solo diagnóstico por posición
+
+    @classmethod
+    def for_phase(cls, diagnostics):
+        """El colector recibido, o uno estricto si la fase se usa sola."""
+        return diagnostics if diagnostics is not None else cls(strict=True)
+
+    def error(self, code, message, span=None, phase=None):
+        if self.strict:
+            raise ValueError(f"{message}{describe_span(span)}")
+        if span is not None:
+            # Dos fases pueden detectar el mismo problema (por ejemplo, el AST y
+            # el árbol de derivación): se conserva el primero
+            if span[0] in self._positions:
+                return
+            self._positions.add(span[0])
+        if self.limit is not None and len(self.items) >= self.limit:
+            self.dropped += 1
+            return
+        self.items.append(Diagnostic(code, message, span, phase))
+
+    @property
+    def has_errors(self):
+        return bool(self.items) or self.dropped > 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def by_code(self):
+        return group_by_code(self.items)
+
+    def generate_markdown(self):
+        md = summary_markdown(self.items)
+        if self.dropped:
+            md += f"\nSe descartaron {self.dropped} diagnósticos (límite: {self.limit}).\n"
+        return md
+
+
+def group_by_code(diagnostics):
+    """{código: [diagnósticos]} ordenado por código (sirve para juntar varios colectores)."""
+    groups = {}
+    for diagnostic in diagnostics:
+        groups.setdefault(diagnostic.code, []).append(diagnostic)
+    return dict(sorted(groups.items()))
+
+
+def summary_lines(diagnostics):
+    """Resumen agrupado por código: una línea por código con la cantidad."""
+    return [f"{code} {CODES.get(code, '')}: {len(items)}" for code, items in group_by_code(diagnostics).items()]
+
+
+def summary_markdown(diagnostics, example=str):
+    """Tabla de diagnósticos agrupados por código, con un ejemplo de cada uno."""
+    md = "### Diagnósticos\n\n"
+    groups = group_by_code(diagnostics)
+    if not groups:
+        return md + "Sin errores.\n"
+    md += "| Código | Descripción | Cantidad | Ejemplo |\n"
+    md += "|:------:|:------------|:--------:|:--------|\n"
+    for code, items in groups.items():
+        md += f"| {code} | {CODES.get(code, '')} | {len(items)} | {example(items[0])} |\n"
+    return md
@@ -0,0 +1,132 @@
+# compiler/diagrams.py
+
+from collections import deque
+
+class DiagramLimits:
+    """
+    Límites de tamaño para los diagramas de árboles.
+    Los subárboles que exceden la profundidad máxima (o que aparecen cuando ya
+    se dibujaron max_nodes nodos) se colapsan en un solo nodo resumen.
+    Un límite en None significa "sin límite".
+    """
+    def __init__(self, max_nodes=300, max_depth=40):
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+
+    def exceeded(self, emitted, depth):
+        if self.max_nodes is not None and emitted >= self.max_nodes:
+            return True
+        return self.max_depth is not None and depth > self.max_depth
+
+
+DEFAULT_LIMITS = DiagramLimits()
+NO_LIMITS = DiagramLimits(None, None)
+
+DIAGRAM_FORMATS = ('mermaid', 'dot', 'json')
+
+
+# --- Acceso a los hijos según el tipo de árbol ---
+def ast_children(node):
+    """Hijos de un nodo del AST (syntax_analizer.Node)."""
+    return [child for child in (node.left, node.right) if child]
+
+def derivation_children(node):
+    """Hijos de un nodo del árbol de derivación (structures.Node)."""
+    return node.children
+
+
+def subtree_size(node, children):
+    """Cuenta los nodos de un subárbol sin usar recursión."""
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(children(current))
+    return count
+
+
+def walk_tree(root, children, limits=None, breadth_first=False):
+    """
+    Recorre el árbol sin recursión y genera tuplas (padre, nodo, colapsados).
+    'colapsados' es None para un nodo normal, o el número de nodos del
+    subárbol que se resume en ese nodo por exceder los límites.
+    """
+    limits = limits or DEFAULT_LIMITS
+    pending = deque([(None, root, 0)])
+    take = pending.popleft if breadth_first else pending.pop
+    emitted = 0
+    while pending:
+        parent, node, depth = take()
+        if parent is not None and limits.exceeded(emitted, depth):
+            yield parent, node, subtree_size(node, children)
+            continue
+        emitted += 1
+        yield parent, node, None
+        kids = children(node)
+        if not breadth_first:
+            kids = reversed(kids)  # Para visitar primero el hijo izquierdo
+        pending.extend((node, child, depth + 1) for child in kids)
+
+
+def _summary_label(collapsed):
+    return f"… {collapsed} nodos"
+
+
+# --- Emisores (generan el texto línea por línea) ---
+def iter_mermaid(root, children, node_line, limits=None, breadth_first=False,
+                 edge='-->', header=()):
+    """
+    Genera las líneas de un diagrama Mermaid.
+    node_line(node) devuelve la declaración Mermaid del nodo.
+    """
+    yield "graph TD\n"
+    for line in header:
+        yield f"    {line}\n"
+    for parent, node, collapsed in walk_tree(root, children, limits, breadth_first):
+        if collapsed is None:
+            yield f"    {node_line(node)}\n"
+        else:
+            yield f"    {node.id}{{{{\"{_summary_label(collapsed)}\"}}}}\n"
+        if parent is not None:
+            yield f"    {parent.id} {edge} {node.id}\n"
+
+
+def iter_dot(root, children, label, limits=None, breadth_first=False, name='G'):
+    """Genera las líneas de un diagrama en formato DOT (Graphviz)."""
+    import json  # Solo se necesita para DOT y JSON (mermaid es el formato por omisión)
+    yield f"digraph {name} {{\n"
+    for parent, node, collapsed in walk_tree(root, children, limits, breadth_first):
+        if collapsed is None:
+            text, shape = label(node), 'box'
+        else:
+            text, shape = _summary_label(collapsed), 'hexagon'
+        yield f"  {node.id} [label={json.dumps(text, ensure_ascii=False)}, shape={shape}];\n"
+        if parent is not None:
+            yield f"  {parent.id} -> {node.id};\n"
+    yield "}\n"
+
+
+def iter_json(root, children, fields, limits=None, breadth_first=False):
+    """
+    Genera un documento JSON {"nodes": [...]} nodo por nodo.
+    fields(node) devuelve un dict con los datos del nodo; cada registro
+    incluye además 'id', 'parent' y, si aplica, 'collapsed'.
+    """
+    import json
+    yield '{"nodes": [\n'
+    first = True
+    for parent, node, collapsed in walk_tree(root, children, limits, breadth_first):
+        record = {'id': node.id, 'parent': parent.id if parent is not None else None}
+        if collapsed is None:
+            record.update(fields(node))
+        else:
+            record['collapsed'] = collapsed
+        yield ("  " if first else ",\n  ") + json.dumps(record, ensure_ascii=False)
+        first = False
+    yield "\n]}\n"
+
+
+def render_block(lines, diagram_format):
+    """Convierte las líneas de un emisor en un bloque de código Markdown."""
+    return f"```{diagram_format}\n" + "".join(lines) + "```\n"
@@ -0,0 +1,377 @@
+# compiler/distributed.py
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+
+from .pipeline import CompilationPipeline
+from .scheduling import CostModel, LoadReport, WorkStealingQueues, cost_chunks
+from .symbol_tables import VariableSymbolTable
+
+# Compilación distribuida: un coordinador divide un archivo de expresiones en
+# bloques y los reparte por TCP a procesos de trabajo que ejecutan
+# CompilationPipeline. Si un trabajador se desconecta (o no responde dentro de
+# 'task_timeout') su bloque vuelve a la cola y lo toma otro. Los resultados se
+# devuelven en el orden de entrada.
+#
+# Los bloques se arman y se reparten según el costo estimado de cada
+# expresión (compiler.scheduling): los bloques tienen costo parecido, los más
+# costosos salen primero y un trabajador sin trabajo roba bloques a otro.
+#
+# Protocolo: cada mensaje es un objeto JSON en UTF-8 precedido por su longitud
+# (u32 big endian).
+#   trabajador -> coordinador: {'type': 'ready'}
+#                              {'type': 'result', 'chunk': k, 'results': [...],
+#                               'seconds': tiempo de compilación del bloque}
+#   coordinador -> trabajador: {'type': 'symbols', 'symbols': [...]}  (una vez, al conectarse)
+#                              {'type': 'chunk', 'chunk': k, 'start': i, 'expressions': [...]}
+#                              {'type': 'done'}
+
+LENGTH = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+DEFAULT_PORT = 7341
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+
+def _receive_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            return None
+        data += part
+    return bytes(data)
+
+
+def receive_message(sock):
+    """Recibe un mensaje completo; devuelve None si la conexión se cerró."""
+    header = _receive_exactly(sock, LENGTH.size)
+    if header is None:
+        return None
+    (size,) = LENGTH.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Mensaje demasiado grande: {size} bytes")
+    data = _receive_exactly(sock, size)
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+
+def symbol_declarations(symbol_table):
+    """Declaraciones de la tabla de símbolos en forma serializable (para enviarlas a los trabajadores)."""
+    if symbol_table is None:
+        return []
+    return [
+        {'name': info['name'], 'type': info['type'], 'range': info.get('range'), 'column': info.get('column')}
+        for info in symbol_table.symbols.values()
+    ]
+
+
+def symbol_table_from_declarations(declarations):
+    symbol_table = VariableSymbolTable()
+    symbol_table.add_symbols(
+        dict(declaration, range=tuple(declaration['range']) if declaration.get('range') else None)
+        for declaration in declarations
+    )
+    return symbol_table.freeze()
+
+
+def compile_chunk(expressions, symbol_table, include_reports=True):
+    """Compila un bloque de expresiones con CompilationPipeline (como lo hace un trabajador)."""
+    results = []
+    for expression in expressions:
+        pipeline = CompilationPipeline(expression, symbol_table, verbose=False)
+        try:
+            pipeline.run()
+        except ValueError as e:
+            results.append({'expression': expression, 'error': str(e), 'errors': [], 'triples': None,
+                            'report': None})
+            continue
+        results.append({
+            'expression': expression,
+            'error': None,
+            'errors': list(pipeline.errors),
+            'triples': [list(triple) for triple in pipeline.triples],
+            'report': str(pipeline.report) if include_reports else None,
+        })
+    return results
+
+
+class Coordinator:
+    """
+    Reparte bloques de expresiones entre los trabajadores conectados y junta
+    los resultados en el orden de entrada.
+
+    Cada bloque tiene a lo sumo 'chunk_size' expresiones y un costo estimado
+    (con 'cost_model', por omisión proporcional a los tokens) no mayor que el
+    de un bloque promedio. Con 'workers' los bloques se asignan con LPT a una
+    cola por trabajador (en orden de conexión) y el que vacía la suya roba
+    bloques; sin 'workers' hay una sola cola, de los más costosos a los más
+    baratos. 'load' informa la carga de cada trabajador.
+    """
+    def __init__(self, expressions, symbol_table=None, chunk_size=16, host='127.0.0.1', port=DEFAULT_PORT,
+                 task_timeout=60.0, cost_model=None, workers=None):
+        self.expressions = list(expressions)
+        self.symbols = symbol_declarations(symbol_table)
+        self.chunk_size = chunk_size
+        self.task_timeout = task_timeout
+        self.cost_model = cost_model if cost_model is not None else CostModel()
+        self.workers = workers
+        costs = [self.cost_model.predict(expression) for expression in self.expressions]
+        target_cost = sum(costs) * chunk_size / len(costs) if costs else None
+        bounds = cost_chunks(costs, chunk_size, target_cost)
+        self.chunks = [(start, self.expressions[start:end]) for start, end in bounds]
+        self.chunk_costs = [sum(costs[start:end]) for start, end in bounds]
+        self._queues = WorkStealingQueues(self.chunk_costs, workers or 1)
+        self._results = {}
+        self._condition = threading.Condition()
+        self._stop = False
+        self.redispatched = 0   # Bloques que se volvieron a repartir por fallas
+        self.workers_seen = 0
+        self.load = LoadReport(workers or 0)
+
+        self._server = socket.create_server((host, port))
+        self._server.settimeout(0.2)
+        self.address = self._server.getsockname()[:2]
+        self._accept_thread = None
+
+    @property
+    def done(self):
+        return len(self._results) == len(self.chunks)
+
+    def start(self):
+        """Empieza a aceptar trabajadores en segundo plano."""
+        self._accept_thread = threading.Thread(target=self._accept_loop, name='Coordinator', daemon=True)
+        self._accept_thread.start()
+        return self
+
+    def _accept_loop(self):
+        while not self._stop:
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with self._condition:
+                worker = self.workers_seen
+                self.workers_seen += 1
+            threading.Thread(target=self._serve, args=(conn, worker), daemon=True).start()
+
+    def _next_chunk(self, queue):
+        """
+        Espera un bloque pendiente (de la cola 'queue' o robado de otra);
+        devuelve (bloque, robado) o None cuando ya no queda trabajo.
+        """
+        with self._condition:
+            while not self._queues and not self.done and not self._stop:
+                self._condition.wait()
+            if self._queues and not self._stop:
+                return self._queues.take(queue)
+            return None
+
+    def _serve(self, conn, worker):
+        chunk_id = None
+        stolen = False
+        sent_at = 0.0
+        # Sin 'workers', todos toman de la única cola (LPT sobre una lista)
+        queue = worker if self.workers else 0
+        conn.settimeout(self.task_timeout)
+        try:
+            while True:
+                message = receive_message(conn)
+                if message is None:
+                    break
+                if message.get('type') == 'ready':
+                    # La tabla de símbolos viaja una sola vez por conexión
+                    send_message(conn, {'type': 'symbols', 'symbols': self.symbols})
+                elif message.get('type') == 'result':
+                    seconds = message.get('seconds', time.monotonic() - sent_at)
+                    with self._condition:
+                        # Un trabajador lento puede responder un bloque que ya se repartió otra vez
+                        if message['chunk'] not in self._results:
+                            self._results[message['chunk']] = message['results']
+                            self.load.record(worker, self.chunk_costs[message['chunk']], seconds, stolen)
+                        self._condition.notify_all()
+                    chunk_id = None
+                task = self._next_chunk(queue)
+                if task is None:
+                    send_message(conn, {'type': 'done'})
+                    break
+                chunk_id, stolen = task
+                sent_at = time.monotonic()
+                start, expressions = self.chunks[chunk_id]
+                send_message(conn, {'type': 'chunk', 'chunk': chunk_id, 'start': start,
+                                    'expressions': expressions})
+        except (OSError, ValueError):
+            pass  # Trabajador caído, sin respuesta o mensaje inválido
+        finally:
+            conn.close()
+            if chunk_id is not None:
+                with self._condition:
+                    if chunk_id not in self._results:
+                        self._queues.retry(chunk_id)
+                        self.redispatched += 1
+                    self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Espera a que se compilen todos los bloques y devuelve los resultados
+        en el orden de entrada (uno por expresión).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self.done:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise ValueError(f"Tiempo agotado: {len(self._results)} de {len(self.chunks)} bloques compilados")
+                self._condition.wait(remaining)
+        return [result for chunk_id in range(len(self.chunks)) for result in self._results[chunk_id]]
+
+    def close(self):
+        with self._condition:
+            self._stop = True
+            self._condition.notify_all()
+        self._server.close()
+        if self._accept_thread is not None:
+            self._accept_thread.join()
+
+    def run(self, timeout=None):
+        """Atiende a los trabajadores hasta terminar y devuelve los resultados ordenados."""
+        self.start()
+        try:
+            return self.wait(timeout)
+        finally:
+            self.close()
+
+
+def run_worker(host='127.0.0.1', port=DEFAULT_PORT, max_chunks=None, include_reports=True, connect_timeout=10.0):
+    """
+    Proceso de trabajo: pide bloques al coordinador, los compila y devuelve
+    los resultados hasta recibir 'done'. Con 'max_chunks' se detiene después
+    de esa cantidad de bloques. Devuelve la cantidad de bloques compilados.
+    """
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+    compiled = 0
+    symbol_table = None  # Se arma una vez, con las declaraciones que envía el coordinador
+    with sock:
+        send_message(sock, {'type': 'ready'})
+        while max_chunks is None or compiled < max_chunks:
+            message = receive_message(sock)
+            if message is None or message.get('type') == 'done':
+                break
+            if message.get('type') == 'symbols':
+                symbol_table = symbol_table_from_declarations(message['symbols'])
+                continue
+            if symbol_table is None:
+                symbol_table = symbol_table_from_declarations([])
+            start = time.perf_counter()
+            results = compile_chunk(message['expressions'], symbol_table, include_reports)
+            send_message(sock, {'type': 'result', 'chunk': message['chunk'], 'results': results,
+                                'seconds': time.perf_counter() - start})
+            compiled += 1
+    return compiled
+
+
+def run_local(expressions, workers=2, symbol_table=None, chunk_size=16, timeout=None, cost_model=None):
+    """
+    Ejecuta el coordinador y 'workers' procesos de trabajo en localhost
+    (útil para pruebas). Devuelve los resultados en el orden de entrada.
+    """
+    import multiprocessing
+
+    coordinator = Coordinator(expressions, symbol_table, chunk_size, port=0, cost_model=cost_model,
+                              workers=workers).start()
+    host, port = coordinator.address
+    processes = [multiprocessing.Process(target=run_worker, args=(host, port), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        return coordinator.wait(timeout)
+    finally:
+        coordinator.close()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compilación distribuida de expresiones.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator_parser = commands.add_parser('coordinator', help='Reparte un archivo de expresiones')
+    coordinator_parser.add_argument('expressions', help='Archivo con una expresión por línea')
+    coordinator_parser.add_argument('--output', default='reports/resultados_distribuidos.jsonl')
+    coordinator_parser.add_argument('--host', default='0.0.0.0')
+    coordinator_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument('--chunk-size', type=int, default=16)
+    coordinator_parser.add_argument('--task-timeout', type=float, default=60.0)
+    coordinator_parser.add_argument('--workers', type=int, help='Trabajadores esperados (una cola LPT por cada uno)')
+    coordinator_parser.add_argument('--calibrate', type=int, default=0, metavar='N',
+                                    help='Calibra el modelo de costo compilando las primeras N expresiones')
+    tables = coordinator_parser.add_mutually_exclusive_group()
+    tables.add_argument('--declarations', metavar='ARCHIVO',
+                        help='Declaraciones de variables (.csv, .json o sección var)')
+    tables.add_argument('--snapshot', metavar='ARCHIVO', help='Instantánea de tabla de símbolos (.symt)')
+
+    worker_parser = commands.add_parser('worker', help='Compila los bloques que reparte un coordinador')
+    worker_parser.add_argument('host')
+    worker_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    args = parser.parse_args(argv)
+    if args.command == 'worker':
+        chunks = run_worker(args.host, args.port)
+        print(f"Bloques compilados: {chunks}")
+        return
+
+    import os
+    from .batch import read_expressions
+    from .declarations import load_declarations, load_snapshot
+    expressions = read_expressions(args.expressions)
+    symbol_table = None
+    if args.declarations:
+        symbol_table = load_declarations(args.declarations)
+    elif args.snapshot:
+        symbol_table = load_snapshot(args.snapshot)
+    cost_model = CostModel()
+    if args.calibrate:
+        cost_model.calibrate(expressions[:args.calibrate], symbol_table)
+    coordinator = Coordinator(expressions, symbol_table, chunk_size=args.chunk_size, host=args.host,
+                              port=args.port, task_timeout=args.task_timeout, cost_model=cost_model,
+                              workers=args.workers)
+    print(f"Coordinador escuchando en {coordinator.address[0]}:{coordinator.address[1]} "
+          f"({len(coordinator.chunks)} bloques)")
+    results = coordinator.run()
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    failed = sum(1 for result in results if result['error'] or result['errors'])
+    print(f"{len(results)} expresiones compiladas ({failed} con errores), "
+          f"{coordinator.redispatched} bloques repartidos otra vez. Resultados en '{args.output}'")
+    for line in coordinator.load.summary_lines():
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# compiler/evaluator.py
+
+import operator
+
+# Operaciones de cada operador del lenguaje (mismas reglas que TypeSystem:
+# '/' siempre produce un real)
+BINARY_OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '=': operator.eq,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    'and': lambda a, b: a and b,
+    'or': lambda a, b: a or b,
+}
+
+UNARY_OPERATIONS = {
+    'not': operator.not_,
+}
+
+BOOLEAN_LITERALS = {'true': True, 'false': False}
+
+
+def operand_value(node, env, constant_pool=None):
+    """Valor de una hoja del AST: constante de la tabla, literal booleano o variable."""
+    if constant_pool is not None and hasattr(node, 'const_index'):
+        return constant_pool.get(node.const_index)['value']
+    if node.value in env:
+        return env[node.value]
+    if node.value in BOOLEAN_LITERALS:
+        return BOOLEAN_LITERALS[node.value]
+    raise ValueError(f"La variable '{node.value}' no tiene valor")
+
+
+def evaluate_ast(root, env, constant_pool=None):
+    """
+    Evalúa un AST anotado recorriéndolo en post-orden (sin recursión).
+    Las asignaciones ':=' guardan el resultado en 'env'. Devuelve el valor de la raíz.
+    """
+    values = {}
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not node.left and not node.right:
+            values[id(node)] = operand_value(node, env, constant_pool)
+            continue
+        if not children_done:
+            stack.append((node, True))
+            if node.right:
+                stack.append((node.right, False))
+            # El destino de una asignación no se evalúa
+            if node.left and node.value != ':=':
+                stack.append((node.left, False))
+            continue
+
+        op = node.value
+        if op == ':=':
+            result = values.pop(id(node.right))
+            env[node.left.value] = result
+        elif op in UNARY_OPERATIONS:
+            result = UNARY_OPERATIONS[op](values.pop(id(node.left)))
+        else:
+            right = values.pop(id(node.right))
+            left = values.pop(id(node.left))
+            result = BINARY_OPERATIONS[op](left, right)
+        values[id(node)] = result
+    return values[id(root)]
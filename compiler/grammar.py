@@ -0,0 +1,466 @@
+# compiler/grammar.py
+
+import hashlib
+import json
+import os
+
+# Gramática del lenguaje como datos. Cada producción es
+# (izquierda, derecha, nodo): 'nodo' es el símbolo del nodo que se agrega al
+# árbol de derivación, o None si la producción solo deja pasar a su único hijo
+# (E -> T no agrega un nivel al árbol, igual que antes). Los delimitadores
+# ( ) : ; , no aparecen en el árbol.
+#
+# Terminales: 'IDENTIFIER', 'CONSTANT', 'STRING' y 'CHAR' (por tipo de token) y los
+# operadores, delimitadores y palabras reservadas por su valor.
+START = 'PROGRAMA'
+
+GRAMMAR = (
+    # Programa: una o varias sentencias separadas por ';'
+    ('PROGRAMA', ('LISTA',), None),
+    ('LISTA', ('ELEMENTO',), None),
+    ('LISTA', ('LISTA', ';', 'ELEMENTO'), 'LISTA'),
+    ('LISTA', ('LISTA', ';'), None),
+    ('ELEMENTO', ('S',), None),
+    ('ELEMENTO', ('DECL',), None),
+    ('ELEMENTO', ('PROC',), None),
+    ('ELEMENTO', ('BLOQUE',), None),
+    # Declaraciones, procedimientos y bloques (RESERVED_WORDS)
+    # 'var x, y : integer; z : real' (como compiler.declarations): después
+    # de 'var', la sección sigue con más declaraciones sin repetirlo
+    ('DECL', ('var', 'IDS', ':', 'TIPO'), 'DECL'),
+    ('DECL', ('IDS', ':', 'TIPO'), 'DECL'),
+    ('IDS', ('IDENTIFIER',), None),
+    ('IDS', ('IDS', ',', 'IDENTIFIER'), 'IDS'),
+    ('TIPO', ('integer',), 'TIPO'),
+    ('TIPO', ('char',), 'TIPO'),
+    ('TIPO', ('real',), 'TIPO'),
+    ('TIPO', ('string',), 'TIPO'),
+    ('TIPO', ('boolean',), 'TIPO'),
+    ('PROC', ('proc', 'IDENTIFIER', ';', 'BLOQUE'), 'PROC'),
+    ('BLOQUE', ('begin', 'LISTA', 'end'), 'BLOQUE'),
+    ('BLOQUE', ('begin', 'end'), 'BLOQUE'),
+    # Asignación: S -> ID := E
+    ('S', ('IDENTIFIER', ':=', 'E'), 'S'),
+    # Jerarquía de operadores (de menor a mayor precedencia)
+    ('E', ('E', 'and', 'T'), 'E'),
+    ('E', ('E', 'or', 'T'), 'E'),
+    ('E', ('T',), None),
+    ('T', ('T', '=', 'F'), 'T'),
+    ('T', ('T', '<', 'F'), 'T'),
+    ('T', ('T', '>', 'F'), 'T'),
+    ('T', ('T', '<=', 'F'), 'T'),
+    ('T', ('T', '>=', 'F'), 'T'),
+    ('T', ('T', '<>', 'F'), 'T'),
+    ('T', ('F',), None),
+    ('F', ('F', '+', 'G'), 'F'),
+    ('F', ('F', '-', 'G'), 'F'),
+    ('F', ('G',), None),
+    ('G', ('G', '*', 'H'), 'G'),
+    ('G', ('G', '/', 'H'), 'G'),
+    ('G', ('H',), None),
+    ('H', ('not', 'H'), 'H'),
+    ('H', ('I',), None),
+    ('I', ('(', 'E', ')'), 'I'),
+    ('I', ('IDENTIFIER',), 'I'),
+    ('I', ('CONSTANT',), 'I'),
+    ('I', ('STRING',), 'I'),
+    ('I', ('CHAR',), 'I'),
+)
+
+# Tipos de token que son terminales por sí mismos (el resto, por su valor)
+TOKEN_TERMINALS = ('IDENTIFIER', 'CONSTANT', 'STRING', 'CHAR')
+END = '$'
+
+# No terminal de las expresiones (la jerarquía de operadores, ver OperatorHierarchy)
+EXPRESSION = 'E'
+
+
+class OperatorHierarchy:
+    """
+    La jerarquía de operadores de una gramática, leída de las producciones
+    de EXPRESSION hacia abajo:
+
+      niveles binarios   E -> E and T | E or T | T   (de menor a mayor precedencia)
+      nivel de prefijos  H -> not H | I
+      primario           I -> ( E ) | IDENTIFIER | CONSTANT | ...
+
+    'levels' son (nodo, operadores) por nivel binario, 'prefixes' el nodo de
+    cada operador prefijo, 'operands' el nodo de cada terminal de token del
+    primario y 'group' (abre, cierra, nodo) la producción con EXPRESSION
+    entre delimitadores. Las producciones que no tienen esta forma son un
+    ValueError (al construir, como los conflictos).
+    """
+    def __init__(self, grammar=GRAMMAR, expression=EXPRESSION):
+        by_left = {}
+        for left, right, node in grammar:
+            by_left.setdefault(left, []).append((tuple(right), node))
+        self.levels = []
+        self.prefixes = {}
+        self.operands = {}
+        self.group = None
+
+        symbol = expression
+        seen = set()
+        while True:
+            rules = by_left.get(symbol)
+            if rules is None or symbol in seen:
+                raise ValueError(f"La jerarquía de operadores no termina en un primario ('{symbol}')")
+            seen.add(symbol)
+            lower = [right[0] for right, node in rules if node is None and len(right) == 1]
+            if len(lower) != 1:
+                break  # Primario
+            lower = lower[0]
+            binary, prefixes = [], []
+            for right, node in rules:
+                if node is None and right == (lower,):
+                    continue
+                if len(right) == 3 and right[0] == symbol and right[2] == lower and node == symbol:
+                    binary.append(right[1])
+                elif len(right) == 2 and right[1] == symbol and node == symbol:
+                    prefixes.append(right[0])
+                else:
+                    raise ValueError(f"La producción {symbol} -> {' '.join(right)} no es de la jerarquía de operadores")
+            if binary and (prefixes or self.prefixes):
+                raise ValueError(f"Los operadores binarios de '{symbol}' tienen que ir antes que los prefijos")
+            if prefixes and self.prefixes:
+                raise ValueError(f"La jerarquía de operadores tiene más de un nivel de prefijos ('{symbol}')")
+            if binary:
+                self.levels.append((symbol, binary))
+            self.prefixes.update(dict.fromkeys(prefixes, symbol))
+            symbol = lower
+
+        for right, node in by_left[symbol]:
+            if node is None:
+                raise ValueError(f"La producción {symbol} -> {' '.join(right)} del primario no agrega un nodo")
+            if len(right) == 1 and right[0] in TOKEN_TERMINALS:
+                self.operands[right[0]] = node
+            elif len(right) == 3 and right[1] == expression and self.group is None:
+                self.group = (right[0], right[2], node)
+            else:
+                raise ValueError(f"La producción {symbol} -> {' '.join(right)} no es de la jerarquía de operadores")
+
+
+# Versión del formato de las tablas en caché
+TABLES_VERSION = 1
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+
+
+def grammar_digest(grammar=GRAMMAR, start=START):
+    data = json.dumps([TABLES_VERSION, start, [list(p[:2]) + [p[2]] for p in grammar]])
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def token_terminal(kind, value):
+    """Terminal de la gramática que corresponde a un token (kind, value)."""
+    if kind in TOKEN_TERMINALS:
+        return kind
+    return value.lower() if kind == 'RESERVED_WORD' else value
+
+
+class LALRTables:
+    """
+    Tablas LALR(1): 'action[estado][terminal]' es un entero (>= 0: desplazar
+    al estado; < 0: reducir por la producción -código - 1) y
+    'goto[estado][no terminal]' es el estado destino. Reducir por la
+    producción aumentada (ACCEPT) es aceptar.
+    """
+    ACCEPT = -1
+
+    def __init__(self, action, goto, digest):
+        self.action = action
+        self.goto = goto
+        self.digest = digest
+
+    @property
+    def state_count(self):
+        return len(self.action)
+
+    def to_json(self):
+        return json.dumps({'digest': self.digest, 'action': self.action, 'goto': self.goto})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data['action'], data['goto'], data['digest'])
+
+    def dense(self, grammar=GRAMMAR, start=START):
+        """Las mismas tablas como arreglos de enteros (DenseTables), armadas una sola vez."""
+        if getattr(self, '_dense', None) is None:
+            self._dense = DenseTables(self, grammar, start)
+        return self._dense
+
+
+# Celda vacía de las tablas densas (error de sintaxis)
+NO_ACTION = -2 ** 31
+
+
+class DenseTables:
+    """
+    Tablas LALR(1) para el bucle del analizador: terminales y no terminales
+    numerados, 'action[estado * width + terminal]' y
+    'goto[estado * goto_width + no terminal]' en listas planas de enteros (sin
+    un diccionario por celda). La última columna de 'action' es la de los
+    terminales que la gramática no conoce: siempre está vacía.
+
+    Por producción (la 0 es la aumentada): 'lefts' (no terminal), 'lengths' y
+    'passes' (producción de paso, E -> T, que no agrega un nivel al árbol).
+
+    Después de una reducción suelen seguir varias reducciones de paso
+    (I -> H -> G -> ...), que solo cambian el estado de la cima.
+    reduce_target() resuelve el goto y toda esa cadena de una vez; el
+    resultado se guarda en 'targets' por (estado de abajo, no terminal, terminal).
+    """
+    def __init__(self, tables, grammar=GRAMMAR, start=START):
+        terminals = sorted({terminal for row in tables.action for terminal in row})
+        nonterminals = sorted({left for left, _, _ in grammar})
+        self.terminal_ids = {terminal: index for index, terminal in enumerate(terminals)}
+        self.unknown = len(terminals)
+        self.width = len(terminals) + 1
+        self.goto_width = len(nonterminals)
+        self.nonterminal_ids = nonterminal_ids = {nonterminal: index for index, nonterminal in enumerate(nonterminals)}
+        self.state_count = len(tables.action)
+
+        self.action = [NO_ACTION] * (self.state_count * self.width)
+        self.goto = [-1] * (self.state_count * self.goto_width)
+        for state, row in enumerate(tables.action):
+            for terminal, entry in row.items():
+                self.action[state * self.width + self.terminal_ids[terminal]] = entry
+        for state, row in enumerate(tables.goto):
+            for nonterminal, target in row.items():
+                self.goto[state * self.goto_width + nonterminal_ids[nonterminal]] = target
+
+        productions = [(start + "'", (start,), None)] + list(grammar)
+        self.lefts = [nonterminal_ids.get(left, -1) for left, _, _ in productions]
+        self.lengths = [len(right) for _, right, _ in productions]
+        self.passes = [node is None and len(right) == 1 for _, right, node in productions]
+        self.passes[0] = False  # Reducir por la aumentada es aceptar
+        self.targets = {}
+        self._by_kind = (None, None)  # (nombres de tipos, terminal fijo de cada tipo)
+
+    def terminal_sequence(self, kinds, lexemes, kind_names):
+        """
+        Terminales (numerados) de una secuencia de tokens, con END al final.
+        'kinds' son códigos de tipo de token; 'kind_names', sus nombres.
+        """
+        ids, unknown = self.terminal_ids, self.unknown
+        names, by_kind = self._by_kind
+        if names is not kind_names:
+            by_kind = [ids.get(name, unknown) if name in TOKEN_TERMINALS else None for name in kind_names]
+            self._by_kind = (kind_names, by_kind)
+        reserved = kind_names.index('RESERVED_WORD')
+        sequence = []
+        for kind, lexeme in zip(kinds, lexemes):
+            terminal = by_kind[kind]
+            if terminal is None:
+                terminal = ids.get(lexeme.lower() if kind == reserved else lexeme, unknown)
+            sequence.append(terminal)
+        sequence.append(ids[END])
+        return sequence
+
+    def reduce_target(self, below, left, terminal):
+        """
+        Estado que queda en la cima al reducir al no terminal 'left' sobre el
+        estado 'below', después de las reducciones de paso que siguen con el
+        terminal dado.
+        """
+        key = (below * self.goto_width + left) * self.width + terminal
+        target = self.targets.get(key)
+        if target is None:
+            target = self.goto[below * self.goto_width + left]
+            while True:
+                entry = self.action[target * self.width + terminal]
+                if entry >= 0 or entry == NO_ACTION or not self.passes[-entry - 1]:
+                    break
+                target = self.goto[below * self.goto_width + self.lefts[-entry - 1]]
+            self.targets[key] = target
+        return target
+
+
+class LALRGenerator:
+    """
+    Construye las tablas LALR(1) de una gramática: arma la colección
+    canónica LR(1) y fusiona los estados con el mismo núcleo. Los conflictos
+    se informan al construir (ValueError), no al analizar.
+    """
+    def __init__(self, grammar=GRAMMAR, start=START):
+        self.grammar = grammar
+        self.start = start
+        # La producción 0 es la aumentada: START' -> START
+        self.productions = [(start + "'", (start,))] + [(left, tuple(right)) for left, right, _ in grammar]
+        self.nonterminals = {left for left, _ in self.productions}
+        self.by_left = {}
+        for index, (left, _) in enumerate(self.productions):
+            self.by_left.setdefault(left, []).append(index)
+        for left, right in self.productions:
+            for symbol in right:
+                if symbol not in self.nonterminals and symbol[:1].isupper() and symbol not in TOKEN_TERMINALS:
+                    raise ValueError(f"Símbolo no definido en la gramática: '{symbol}'")
+        self._compute_first()
+
+    def _compute_first(self):
+        self.nullable = set()
+        self.first = {nonterminal: set() for nonterminal in self.nonterminals}
+        changed = True
+        while changed:
+            changed = False
+            for left, right in self.productions:
+                first = self.first[left]
+                size = len(first)
+                nullable = True
+                for symbol in right:
+                    if symbol in self.nonterminals:
+                        first |= self.first[symbol]
+                        if symbol not in self.nullable:
+                            nullable = False
+                            break
+                    else:
+                        first.add(symbol)
+                        nullable = False
+                        break
+                if nullable and left not in self.nullable:
+                    self.nullable.add(left)
+                    changed = True
+                changed |= len(first) != size
+
+    def _first_of(self, symbols, lookahead):
+        result = set()
+        for symbol in symbols:
+            if symbol not in self.nonterminals:
+                result.add(symbol)
+                return result
+            result |= self.first[symbol]
+            if symbol not in self.nullable:
+                return result
+        result.add(lookahead)
+        return result
+
+    def _closure(self, items):
+        closure = set(items)
+        pending = list(items)
+        while pending:
+            production, dot, lookahead = pending.pop()
+            right = self.productions[production][1]
+            if dot >= len(right) or right[dot] not in self.nonterminals:
+                continue
+            lookaheads = self._first_of(right[dot + 1:], lookahead)
+            for index in self.by_left[right[dot]]:
+                for terminal in lookaheads:
+                    item = (index, 0, terminal)
+                    if item not in closure:
+                        closure.add(item)
+                        pending.append(item)
+        return frozenset(closure)
+
+    def _lr1_collection(self):
+        states = [self._closure({(0, 0, END)})]
+        index = {states[0]: 0}
+        transitions = []
+        position = 0
+        while position < len(states):
+            moves = {}
+            for production, dot, lookahead in states[position]:
+                right = self.productions[production][1]
+                if dot < len(right):
+                    moves.setdefault(right[dot], set()).add((production, dot + 1, lookahead))
+            targets = {}
+            for symbol in sorted(moves):  # Orden fijo: la numeración de estados no depende del hash
+                state = self._closure(moves[symbol])
+                if state not in index:
+                    index[state] = len(states)
+                    states.append(state)
+                targets[symbol] = index[state]
+            transitions.append(targets)
+            position += 1
+        return states, transitions
+
+    def build(self):
+        states, transitions = self._lr1_collection()
+
+        # Fusión LALR: un estado por núcleo (ítems sin lookahead)
+        merged_index = {}
+        merged_of = []
+        for state in states:
+            core = frozenset((production, dot) for production, dot, _ in state)
+            merged_of.append(merged_index.setdefault(core, len(merged_index)))
+        merged_items = [set() for _ in merged_index]
+        merged_moves = [{} for _ in merged_index]
+        for number, state in enumerate(states):
+            merged_items[merged_of[number]] |= state
+            for symbol, target in transitions[number].items():
+                merged_moves[merged_of[number]][symbol] = merged_of[target]
+
+        action = [{} for _ in merged_index]
+        goto = [{} for _ in merged_index]
+        conflicts = []
+        for number, items in enumerate(merged_items):
+            for symbol, target in merged_moves[number].items():
+                if symbol in self.nonterminals:
+                    goto[number][symbol] = target
+                else:
+                    self._set_action(action[number], number, symbol, target, conflicts)
+            for production, dot, lookahead in items:
+                if dot == len(self.productions[production][1]):
+                    self._set_action(action[number], number, lookahead, -production - 1, conflicts)
+        if conflicts:
+            raise ValueError("Conflictos en la gramática:\n" + "\n".join(conflicts))
+        return LALRTables(action, goto, grammar_digest(self.grammar, self.start))
+
+    def _describe(self, entry):
+        if entry == LALRTables.ACCEPT:
+            return "aceptar"
+        if entry >= 0:
+            return f"desplazar a {entry}"
+        left, right = self.productions[-entry - 1]
+        return f"reducir {left} -> {' '.join(right)}"
+
+    def _set_action(self, row, state, terminal, entry, conflicts):
+        previous = row.get(terminal)
+        if previous is not None and previous != entry:
+            kind = 'desplazar/reducir' if previous >= 0 or entry >= 0 else 'reducir/reducir'
+            conflicts.append(f"  estado {state}, con '{terminal}' ({kind}): "
+                             f"{self._describe(previous)} / {self._describe(entry)}")
+            return
+        row[terminal] = entry
+
+
+def _cache_path(digest):
+    return os.path.join(CACHE_DIRECTORY, f"lalr-{digest[:16]}.json")
+
+
+def build_tables(grammar=GRAMMAR, start=START, use_cache=True):
+    """
+    Tablas LALR(1) de la gramática. Se guardan en __pycache__ con el hash de
+    la gramática en el nombre: solo se vuelven a generar si la gramática cambia.
+    """
+    digest = grammar_digest(grammar, start)
+    path = _cache_path(digest)
+    if use_cache:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tables = LALRTables.from_json(f.read())
+            if tables.digest == digest:
+                return tables
+        except (OSError, ValueError, KeyError):
+            pass  # Sin caché o caché inválida: se regeneran
+
+    tables = LALRGenerator(grammar, start).build()
+    if use_cache:
+        try:
+            os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.write(tables.to_json())
+            os.replace(temporary, path)  # Otro proceso nunca lee un archivo a medio escribir
+        except OSError:
+            pass  # Directorio de solo lectura: se usan las tablas en memoria
+    return tables
+
+
+# Las tablas de GRAMMAR se cargan la primera vez que se analiza algo
+_TABLES_CACHE = []
+
+
+def language_tables():
+    if not _TABLES_CACHE:
+        _TABLES_CACHE.append(build_tables())
+    return _TABLES_CACHE[0]
@@ -1,39 +1,60 @@
 # compiler/intermediate_code_gen.py
 
 from .syntax_analizer import Node # Importamos la clase Node del analizador sintáctico
+from .passes import ASTPass, PassManager
 
 class IntermediateCodeGenerator:
     """
     Genera código intermedio (postfijo y tripletas) a partir de un
     Árbol de Sintaxis Abstracta (AST).
     """
-    def __init__(self, ast_root: Node):
+    def __init__(self, ast_root: Node, constant_pool=None):
         self.ast_root = ast_root
+        self.constant_pool = constant_pool
         self.triples = []
+        self.postfix = []
         self.temp_counter = 0 # Para futuras cuádruplas
+        self._results = {}    # id(nodo) -> nombre de su resultado
 
     def generate(self):
         """Genera el reporte de código intermedio."""
-        # Generamos las tripletas caminando por el árbol.
-        self._walk_ast(self.ast_root)
-        
-        # Generamos la notación postfija a partir del AST para evitar redundancia.
-        postfix = self._generate_postfix_from_ast(self.ast_root)
-        
-        return self._generate_markdown(postfix, self.triples)
+        # Tripletas y notación postfija se generan en un solo recorrido del árbol.
+        PassManager(self.passes()).run(self.ast_root)
+        return self.build_report()
 
-    def _walk_ast(self, node: Node):
+    def passes(self, after=()):
         """
-        Recorre el AST de forma recursiva (post-orden) para generar las tripletas.
-        Devuelve el 'nombre' del resultado (una variable, un número o una referencia a una tripleta).
+        Fases de este generador para el PassManager (ambas en post-orden).
+        'after' indica las fases que deben anotar cada nodo antes (p. ej. 'tipos').
         """
-        # Caso base: si el nodo es una hoja (operando), devolvemos su valor.
+        self.triples = []
+        self.postfix = []
+        self._results = {}
+        return [
+            ASTPass('tripletas', leave=self._emit_triple, after=after),
+            ASTPass('postfija', leave=self._append_postfix, after=after),
+        ]
+
+    def build_report(self):
+        self._results = {}  # Ya no se necesitan los resultados intermedios
+        return self._generate_markdown(self.postfix, self.triples)
+
+    def _emit_triple(self, node: Node):
+        """
+        Genera la tripleta del nodo (post-orden: los hijos ya tienen resultado).
+        El resultado es una variable, un literal o una referencia a una tripleta.
+        """
+        # Caso base: si el nodo es una hoja (operando), su resultado es su valor.
+        # Los literales se referencian por su índice en la tabla de constantes ('#k').
         if not node.left and not node.right:
-            return node.value
+            if hasattr(node, 'const_index'):
+                self._results[id(node)] = f'#{node.const_index}'
+            else:
+                self._results[id(node)] = node.value
+            return
 
-        # Paso recursivo: procesar los hijos primero.
-        left_result = self._walk_ast(node.left)
-        right_result = self._walk_ast(node.right)
+        left_result = self._results[id(node.left)] if node.left else None
+        right_result = self._results[id(node.right)] if node.right else None  # None en 'not'
         
         # Emitir la tripleta para el nodo actual.
         op = node.value
@@ -41,17 +62,11 @@ class IntermediateCodeGenerator:
         self.triples.append([op, left_result, right_result])
         
         # El "resultado" de esta operación es una referencia a la tripleta que acabamos de crear.
-        return f'({index})'
+        self._results[id(node)] = f'({index})'
 
-    def _generate_postfix_from_ast(self, node: Node):
-        """Genera la notación postfija recorriendo el AST en post-orden."""
-        if not node:
-            return []
-        
-        left = self._generate_postfix_from_ast(node.left)
-        right = self._generate_postfix_from_ast(node.right)
-        
-        return left + right + [node.value]
+    def _append_postfix(self, node: Node):
+        """Notación postfija: cada nodo se agrega después de sus hijos."""
+        self.postfix.append(node.value)
 
     def _generate_markdown(self, postfix_list, triples_list):
         md = "### Notación Postfija (Polaca Inversa)\n"
@@ -62,4 +77,7 @@ class IntermediateCodeGenerator:
         md += "|---|----------|------------|------------|\n"
         for i, (op, arg1, arg2) in enumerate(triples_list):
             md += f"|({i})| `{op}`     | `{arg1}`     | `{arg2}`     |\n"
+        if self.constant_pool is not None and len(self.constant_pool):
+            md += "\nLos operandos `#k` hacen referencia a la tabla de constantes:\n\n"
+            md += self.constant_pool.generate_markdown_report()
         return md
\ No newline at end of file
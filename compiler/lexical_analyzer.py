@@ -1,16 +1,52 @@
 # compiler/lexical_analyzer.py
 
 import re
-from .symbol_tables import RESERVED_WORDS, OPERATORS, DELIMITERS, VariableSymbolTable
+from .symbol_tables import RESERVED_WORDS, OPERATORS, DELIMITERS, VariableSymbolTable, ConstantPool
+from .tokens import TokenStream
+from .diagnostics import Diagnostics
+
+# Tipo de token de cada tipo de literal
+LITERAL_KINDS = {'integer': 'CONSTANT', 'real': 'CONSTANT', 'char': 'CHAR', 'string': 'STRING'}
+
+def _render_fixed_table():
+    md = "#### a) Tabla fija (Palabras reservadas y operadores)\n\n"
+    md += "| Código | Token | Tipo |\n"
+    md += "|:------:|:-----:|:----:|\n"
+    for word, code in RESERVED_WORDS.items():
+        md += f"| {code} | `{word}` | palabra reservada |\n"
+    for op, code in OPERATORS.items():
+        md += f"| {code} | `{op}` | operador |\n"
+    for delim, code in DELIMITERS.items():
+        md += f"| {code} | `{delim}` | delimitador |\n"
+    return md
+
+# La tabla fija no cambia: se genera una sola vez, la primera vez que se usa
+_FIXED_TABLE_CACHE = []
+
+
+def fixed_table_markdown():
+    if not _FIXED_TABLE_CACHE:
+        _FIXED_TABLE_CACHE.append(_render_fixed_table())
+    return _FIXED_TABLE_CACHE[0]
+
 
 class LexicalAnalyzer:
     """
     Convierte una lista de lexemas en tokens usando tablas fijas y variables.
     """
-    def __init__(self, lexemes, symbol_table=None):
+    def __init__(self, lexemes, symbol_table=None, tables_ref=None, constant_pool=None, spans=None,
+                 diagnostics=None):
         self.lexemes = lexemes
-        self.tokens = []
+        # Colector de errores; sin él, el primer error se lanza como ValueError
+        self.diagnostics = Diagnostics.for_phase(diagnostics)
+        # Posiciones de los lexemas en el código fuente (Parser.spans), si se conocen
+        self.spans = spans
+        # Ruta del documento compartido de tablas del lenguaje (reportes por lote)
+        self.tables_ref = tables_ref
+        self.tokens = TokenStream()
         self.symbol_table = symbol_table if symbol_table is not None else VariableSymbolTable()
+        # Los literales van a la tabla de constantes, no a la tabla de símbolos
+        self.constant_pool = constant_pool if constant_pool is not None else ConstantPool()
 
     def analyze(self):
         """Realiza el análisis y devuelve los tokens y el reporte."""
@@ -18,39 +54,44 @@ class LexicalAnalyzer:
         report = self._generate_markdown()
         return self.tokens, report
 
+    def tokenize(self):
+        """Realiza el análisis sin generar el reporte y devuelve los tokens."""
+        self._tokenize()
+        return self.tokens
+
     def _tokenize(self):
-        """Genera una lista de tokens a partir de la lista de lexemas."""
-        for lexeme in self.lexemes:
+        """Genera la secuencia de tokens a partir de la lista de lexemas."""
+        tokens = self.tokens
+        for position, lexeme in enumerate(self.lexemes):
+            span = self.spans[position] if self.spans else None
             # Verificar si es palabra reservada
-            if lexeme.upper() in RESERVED_WORDS:
-                self.tokens.append(('RESERVED_WORD', lexeme, RESERVED_WORDS[lexeme.upper()]))
+            if lexeme.lower() in RESERVED_WORDS:
+                # 'begin'/'end' no abren ni cierran scopes aquí: cerrar el scope al
+                # leer 'end' borraría sus símbolos antes del análisis semántico.
+                # Los scopes los abre y cierra compiler.program al compilar
+                # cada bloque (VariableSymbolTable.enter_scope / exit_scope).
+                tokens.append('RESERVED_WORD', lexeme, RESERVED_WORDS[lexeme.lower()], span)
             # Verificar si es operador
             elif lexeme in OPERATORS:
-                self.tokens.append(('OPERATOR', lexeme, OPERATORS[lexeme]))
+                tokens.append('OPERATOR', lexeme, OPERATORS[lexeme], span)
             # Verificar si es delimitador
             elif lexeme in DELIMITERS:
-                self.tokens.append(('DELIMITER', lexeme, DELIMITERS[lexeme]))
-            # Verificar si es número entero
-            elif lexeme.isdigit():
-                self.tokens.append(('CONSTANT', lexeme, None))
-                # Agregar a la tabla de símbolos si no existe
-                if not self.symbol_table.find_symbol_by_name(lexeme):
-                    self.symbol_table.add_symbol(lexeme, 'integer', value=lexeme)
+                tokens.append('DELIMITER', lexeme, DELIMITERS[lexeme], span)
+            # Verificar si es un literal (entero, real, carácter o cadena)
+            elif ConstantPool.literal_type(lexeme):
+                constant_index = self.constant_pool.add_constant(lexeme)
+                kind = LITERAL_KINDS[ConstantPool.literal_type(lexeme)]
+                tokens.append(kind, lexeme, constant_index, span)
             # Verificar si es identificador (comienza con letra o _)
             elif re.match(r'[a-zA-Z_][a-zA-Z0-9_]*', lexeme):
-                # Si no está en la tabla de símbolos, agregarlo
-                if not self.symbol_table.find_symbol_by_name(lexeme):
-                    self.symbol_table.add_symbol(lexeme, 'integer')  # Por defecto integer
-                # Buscar el ID del símbolo
-                symbol_id = None
-                for sid, info in self.symbol_table.symbols.items():
-                    if info['name'] == lexeme:
-                        symbol_id = sid
-                        break
-                self.tokens.append(('IDENTIFIER', lexeme, symbol_id))
+                # Buscar el ID del símbolo; si no está en la tabla, agregarlo
+                symbol_id = self.symbol_table.find_symbol_id(lexeme)
+                if symbol_id is None:
+                    symbol_id = self.symbol_table.add_symbol(lexeme, 'integer')  # Por defecto integer
+                tokens.append('IDENTIFIER', lexeme, symbol_id, span)
             else:
-                # No se reconoce el lexema
-                raise ValueError(f"Lexema no reconocido: '{lexeme}'")
+                # No se reconoce el lexema: se informa y se descarta
+                self.diagnostics.error('L001', f"Lexema no reconocido: '{lexeme}'", span, 'léxico')
 
     def _generate_markdown(self):
         md = "## 2. Análisis Lexicográfico\n\n"
@@ -63,22 +104,21 @@ class LexicalAnalyzer:
         md += "---\n\n"
         md += "### Tablas consultadas\n\n"
         
-        md += "#### a) Tabla fija (Palabras reservadas y operadores)\n\n"
-        md += "| Código | Token | Tipo |\n"
-        md += "|:------:|:-----:|:----:|\n"
-        for word, code in RESERVED_WORDS.items():
-            md += f"| {code} | `{word}` | palabra reservada |\n"
-        for op, code in OPERATORS.items():
-            md += f"| {code} | `{op}` | operador |\n"
-        for delim, code in DELIMITERS.items():
-            md += f"| {code} | `{delim}` | delimitador |\n"
+        if self.tables_ref:
+            md += "#### a) Tabla fija (Palabras reservadas y operadores)\n\n"
+            md += f"Ver [Tablas del Lenguaje]({self.tables_ref}).\n"
+        else:
+            md += fixed_table_markdown()
         
-        md += "\n#### b) Tabla variable (Identificadores y constantes)\n\n"
+        md += "\n#### b) Tabla variable (Identificadores)\n\n"
         md += "| Posición | Lexema | Tipo | Valor |\n"
         md += "|:--------:|:------:|:----:|:-----:|\n"
         for symbol_id, info in self.symbol_table.symbols.items():
             md += f"| {symbol_id} | `{info['name']}` | {info['type']} | {info.get('value', '—')} |\n"
         
+        md += "\n#### c) Tabla de constantes (Literales)\n\n"
+        md += self.constant_pool.generate_markdown_report()
+        
         md += "\n---\n\n"
         md += "### Tokens generados\n\n"
         md += "| Tipo | Valor |\n"
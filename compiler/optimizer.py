@@ -0,0 +1,221 @@
+# compiler/optimizer.py
+
+from .evaluator import BINARY_OPERATIONS, UNARY_OPERATIONS
+
+# Operandos de una tripleta:
+#   '(k)'  referencia al resultado de la tripleta k
+#   '#k'   constante k de la tabla de constantes
+#   otro   nombre de variable (o None en el segundo operando de 'not')
+
+def is_reference(operand):
+    return isinstance(operand, str) and operand.startswith('(')
+
+def is_constant(operand):
+    return isinstance(operand, str) and operand.startswith('#')
+
+def is_variable(operand):
+    return operand is not None and not is_reference(operand) and not is_constant(operand)
+
+def reference_index(operand):
+    return int(operand[1:-1])
+
+def constant_index(operand):
+    return int(operand[1:])
+
+
+class GlobalOptimizer:
+    """
+    Optimización global sobre las tripletas de varias asignaciones compiladas
+    juntas (todas con la misma tabla de constantes):
+
+    1. Propagación de copias y de constantes entre sentencias: después de
+       'y := x' (o 'y := #k') los usos de 'y' se reemplazan por 'x' (o '#k')
+       hasta que alguna de las dos variables se vuelve a asignar.
+    2. Plegado de constantes: las operaciones con operandos constantes se
+       calculan y su resultado se agrega a la tabla de constantes.
+    3. Eliminación de asignaciones muertas: una asignación cuyo destino se
+       vuelve a asignar antes de leerse (o que no está en 'live_out') se
+       elimina junto con las tripletas que solo servían para calcularla.
+
+    Por omisión todas las variables asignadas se consideran vivas al final.
+    """
+    def __init__(self, programs, constant_pool, live_out=None, labels=None):
+        self.programs = [list(map(list, triples)) for triples in programs]
+        self.constant_pool = constant_pool
+        self.live_out = live_out
+        self.labels = labels or [None] * len(self.programs)
+        self.triples = []              # Flujo combinado (con referencias globales)
+        self.statement_of = []         # Sentencia a la que pertenece cada tripleta
+        self.optimized = []            # Flujo optimizado y renumerado
+        self.folded = []               # Tripletas plegadas a constantes
+        self.propagated = 0            # Operandos reemplazados por copias/constantes
+        self.eliminated_statements = []
+        self.eliminated_triples = []
+
+    @classmethod
+    def from_compiled(cls, compiled_expressions, live_out=None):
+        """Crea el optimizador a partir de resultados de compile_expression()."""
+        compiled_expressions = list(compiled_expressions)
+        pools = {id(compiled.constant_pool) for compiled in compiled_expressions}
+        if len(pools) > 1:
+            raise ValueError("Las expresiones deben compartir la misma tabla de constantes")
+        return cls([compiled.triples for compiled in compiled_expressions],
+                   compiled_expressions[0].constant_pool if compiled_expressions else None,
+                   live_out, [compiled.expression for compiled in compiled_expressions])
+
+    def optimize(self):
+        self._combine()
+        self._propagate_and_fold()
+        live = self._eliminate_dead()
+        self._renumber(live)
+        return self.optimized
+
+    def _combine(self):
+        """Une los flujos ajustando las referencias '(k)' al índice global."""
+        self.triples, self.statement_of = [], []
+        for statement, triples in enumerate(self.programs):
+            offset = len(self.triples)
+            for op, arg1, arg2 in triples:
+                if is_reference(arg1):
+                    arg1 = f'({reference_index(arg1) + offset})'
+                if is_reference(arg2):
+                    arg2 = f'({reference_index(arg2) + offset})'
+                self.triples.append([op, arg1, arg2])
+                self.statement_of.append(statement)
+
+    def _propagate_and_fold(self):
+        copies = {}       # variable -> operando equivalente (variable o constante)
+        copied_from = {}  # variable -> variables que son copia de ella
+        folded = {}       # índice de tripleta -> '#k' con su valor
+
+        def substitute(operand):
+            if is_variable(operand) and operand in copies:
+                self.propagated += 1
+                return copies[operand]
+            if is_reference(operand) and reference_index(operand) in folded:
+                return folded[reference_index(operand)]
+            return operand
+
+        def forget(variable):
+            """La variable cambió: sus copias (en ambos sentidos) dejan de ser válidas."""
+            source = copies.pop(variable, None)
+            if is_variable(source):
+                copied_from.get(source, set()).discard(variable)
+            for target in copied_from.pop(variable, ()):
+                copies.pop(target, None)
+
+        for index, triple in enumerate(self.triples):
+            op, arg1, arg2 = triple
+            if op == ':=':
+                value = substitute(arg2)
+                triple[2] = value
+                forget(arg1)
+                if (is_variable(value) and value != arg1) or is_constant(value):
+                    copies[arg1] = value
+                    if is_variable(value):
+                        copied_from.setdefault(value, set()).add(arg1)
+                continue
+
+            arg1, arg2 = substitute(arg1), substitute(arg2)
+            triple[1], triple[2] = arg1, arg2
+            value = self._fold(op, arg1, arg2)
+            if value is not None:
+                folded[index] = f'#{self.constant_pool.add_value(value)}'
+                self.folded.append(index)
+
+    def _fold(self, op, arg1, arg2):
+        """Calcula la operación si todos sus operandos son constantes (o devuelve None)."""
+        if self.constant_pool is None or not is_constant(arg1):
+            return None
+        left = self.constant_pool.get(constant_index(arg1))['value']
+        try:
+            if op in UNARY_OPERATIONS:
+                return UNARY_OPERATIONS[op](left)
+            if op in BINARY_OPERATIONS and is_constant(arg2):
+                right = self.constant_pool.get(constant_index(arg2))['value']
+                return BINARY_OPERATIONS[op](left, right)
+        except (ArithmeticError, TypeError):
+            return None  # Por ejemplo, división entre cero: se deja para tiempo de ejecución
+        return None
+
+    def _eliminate_dead(self):
+        """Recorrido hacia atrás: marca las tripletas vivas y elimina el resto."""
+        if self.live_out is None:
+            live_variables = {arg1 for op, arg1, _ in self.triples if op == ':='}
+        else:
+            live_variables = set(self.live_out)
+        needed = set()
+        live = [False] * len(self.triples)
+        folded = set(self.folded)
+
+        for index in range(len(self.triples) - 1, -1, -1):
+            op, arg1, arg2 = self.triples[index]
+            if op == ':=':
+                if arg1 not in live_variables:
+                    self.eliminated_statements.append(self.statement_of[index])
+                    self.eliminated_triples.append(index)
+                    continue
+                live_variables.discard(arg1)
+                operands = (arg2,)
+            elif index in needed and index not in folded:
+                operands = (arg1, arg2)
+            else:
+                self.eliminated_triples.append(index)
+                continue
+
+            live[index] = True
+            for operand in operands:
+                if is_reference(operand):
+                    needed.add(reference_index(operand))
+                elif is_variable(operand):
+                    live_variables.add(operand)
+
+        self.eliminated_statements.reverse()
+        self.eliminated_triples.reverse()
+        return live
+
+    def _renumber(self, live):
+        new_index = {}
+        self.optimized = []
+        for index, triple in enumerate(self.triples):
+            if not live[index]:
+                continue
+            op, arg1, arg2 = triple
+            if is_reference(arg1):
+                arg1 = f'({new_index[reference_index(arg1)]})'
+            if is_reference(arg2):
+                arg2 = f'({new_index[reference_index(arg2)]})'
+            new_index[index] = len(self.optimized)
+            self.optimized.append([op, arg1, arg2])
+
+    def generate_markdown(self):
+        total = len(self.triples)
+        md = "## Optimización Global (entre sentencias)\n\n"
+        md += f"- Tripletas antes: **{total}**\n"
+        md += f"- Tripletas después: **{len(self.optimized)}**\n"
+        md += f"- Operandos propagados (copias y constantes): **{self.propagated}**\n"
+        md += f"- Tripletas plegadas a constantes: **{len(self.folded)}**\n"
+        md += f"- Asignaciones eliminadas: **{len(self.eliminated_statements)}**\n\n"
+
+        if self.eliminated_statements:
+            md += "### Asignaciones eliminadas\n\n"
+            for statement in self.eliminated_statements:
+                label = self.labels[statement] or f"sentencia {statement}"
+                md += f"- `{label}`\n"
+            md += "\n"
+
+        if self.eliminated_triples:
+            md += "### Tripletas eliminadas\n\n"
+            md += "| # | Operador | Operando 1 | Operando 2 |\n"
+            md += "|---|----------|------------|------------|\n"
+            for index in self.eliminated_triples:
+                op, arg1, arg2 = self.triples[index]
+                md += f"|({index})| `{op}` | `{arg1}` | `{arg2}` |\n"
+            md += "\n"
+
+        md += "### Tripletas optimizadas\n\n"
+        md += "| # | Operador | Operando 1 | Operando 2 |\n"
+        md += "|---|----------|------------|------------|\n"
+        for i, (op, arg1, arg2) in enumerate(self.optimized):
+            md += f"|({i})| `{op}` | `{arg1}` | `{arg2}` |\n"
+        return md
@@ -1,14 +1,23 @@
 # compiler/parser.py
 
+from .diagnostics import Diagnostics
+
 class Parser:
     """
     Realiza el parseo (lectura de caracteres) del código fuente.
     Segmenta el flujo de caracteres en lexemas usando delimitadores.
     """
-    def __init__(self, code_string):
+    def __init__(self, code_string, diagnostics=None):
         self.code = code_string
+        # Colector de errores; sin él, el primer error se lanza como ValueError
+        self.diagnostics = Diagnostics.for_phase(diagnostics)
         self.characters = []
         self.lexemes = []
+        self.spans = []  # (inicio, fin) de cada lexema en el código fuente
+
+    def _add_lexeme(self, start, end):
+        self.lexemes.append(self.code[start:end])
+        self.spans.append((start, end))
 
     def parse(self):
         """Realiza el parseo y devuelve la lista de lexemas."""
@@ -16,33 +25,48 @@ class Parser:
         self.characters = list(self.code)
         
         # Segmentar en lexemas usando delimitadores
-        current_lexeme = ''
+        lexeme_start = None  # Inicio del lexema en curso
         i = 0
         while i < len(self.code):
             char = self.code[i]
-            
-            if char in [' ', ':', '=', '+', '-', '*', '/', '(', ')', ';']:
+
+            # Literales entre comillas: se leen completos (pueden contener espacios)
+            if char in ('"', "'") and lexeme_start is None:
+                end = self.code.find(char, i + 1)
+                if end == -1:
+                    self.diagnostics.error('P001', f"Literal sin cerrar: {self.code[i:]}", (i, len(self.code)),
+                                           'parseo')
+                    # Recuperación: se cierra el literal al final del código
+                    self.lexemes.append(self.code[i:] + char)
+                    self.spans.append((i, len(self.code)))
+                    break
+                self._add_lexeme(i, end + 1)
+                i = end + 1
+                continue
+
+            if char.isspace() or char in [':', '=', '+', '-', '*', '/', '(', ')', ';', ',']:
                 # Si encontramos un delimitador, añadimos el lexema actual (si existe)
-                if current_lexeme:
-                    self.lexemes.append(current_lexeme)
-                    current_lexeme = ''
+                if lexeme_start is not None:
+                    self._add_lexeme(lexeme_start, i)
+                    lexeme_start = None
                 
                 # Caso especial: operador de asignación ':=' 
                 if char == ':' and i + 1 < len(self.code) and self.code[i + 1] == '=':
-                    self.lexemes.append(':=')
+                    self._add_lexeme(i, i + 2)
                     i += 2  # Saltar el siguiente carácter '='
                     continue
-                elif char != ' ':  # Los espacios no se incluyen como lexemas
-                    self.lexemes.append(char)
+                elif not char.isspace():  # Los espacios (y saltos de línea) no se incluyen como lexemas
+                    self._add_lexeme(i, i + 1)
                 
                 i += 1
             else:
-                current_lexeme += char
+                if lexeme_start is None:
+                    lexeme_start = i
                 i += 1
         
         # Añadir el último lexema si existe
-        if current_lexeme:
-            self.lexemes.append(current_lexeme)
+        if lexeme_start is not None:
+            self._add_lexeme(lexeme_start, len(self.code))
             
         return self.lexemes
 
@@ -0,0 +1,96 @@
+# compiler/passes.py
+
+class ASTPass:
+    """
+    Fase que se ejecuta sobre el AST mediante callbacks por nodo.
+
+    - enter(node): se llama en pre-orden (antes de visitar los hijos).
+    - leave(node): se llama en post-orden (después de visitar los hijos).
+    - finish(): se llama al terminar el recorrido completo.
+
+    'after' lista las fases que deben procesar cada nodo antes que esta; se
+    pueden ejecutar en el mismo recorrido. 'requires' lista las fases que deben
+    haber terminado por completo, lo que obliga a un recorrido nuevo.
+    """
+    def __init__(self, name, enter=None, leave=None, finish=None, after=(), requires=()):
+        self.name = name
+        self.enter = enter
+        self.leave = leave
+        self.finish = finish
+        self.after = tuple(after)
+        self.requires = tuple(requires)
+
+
+class PassManager:
+    """
+    Agrupa las fases en la menor cantidad de recorridos posible (según sus
+    dependencias) y ejecuta cada grupo en un único recorrido iterativo del AST.
+    """
+    def __init__(self, passes):
+        self.passes = list(passes)
+        self.walks = 0  # Recorridos completos realizados por run()
+
+    def schedule(self):
+        """Devuelve la lista de grupos; cada grupo se ejecuta en un solo recorrido."""
+        by_name = {ast_pass.name: ast_pass for ast_pass in self.passes}
+        for ast_pass in self.passes:
+            for dependency in ast_pass.after + ast_pass.requires:
+                if dependency not in by_name:
+                    raise ValueError(f"La fase '{ast_pass.name}' depende de '{dependency}', que no está registrada")
+
+        # Orden topológico: cada fase queda después de sus dependencias
+        ordered, group_of, visiting = [], {}, set()
+
+        def place(ast_pass):
+            if ast_pass.name in group_of:
+                return group_of[ast_pass.name]
+            if ast_pass.name in visiting:
+                raise ValueError(f"Dependencia circular en la fase '{ast_pass.name}'")
+            visiting.add(ast_pass.name)
+            group = 0
+            for dependency in ast_pass.after:
+                group = max(group, place(by_name[dependency]))
+            for dependency in ast_pass.requires:
+                group = max(group, place(by_name[dependency]) + 1)
+            visiting.discard(ast_pass.name)
+            group_of[ast_pass.name] = group
+            ordered.append(ast_pass)
+            return group
+
+        for ast_pass in self.passes:
+            place(ast_pass)
+
+        groups = [[] for _ in range(max(group_of.values(), default=-1) + 1)]
+        for ast_pass in ordered:
+            groups[group_of[ast_pass.name]].append(ast_pass)
+        return groups
+
+    def run(self, root):
+        for group in self.schedule():
+            self._walk(root, group)
+            self.walks += 1
+            for ast_pass in group:
+                if ast_pass.finish:
+                    ast_pass.finish()
+
+    @staticmethod
+    def _walk(root, group):
+        """Recorrido iterativo (sin límite de recursión) que llama a todas las fases del grupo."""
+        enters = [ast_pass.enter for ast_pass in group if ast_pass.enter]
+        leaves = [ast_pass.leave for ast_pass in group if ast_pass.leave]
+        if root is None:
+            return
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                for leave in leaves:
+                    leave(node)
+                continue
+            for enter in enters:
+                enter(node)
+            stack.append((node, True))
+            if node.right:
+                stack.append((node.right, False))
+            if node.left:
+                stack.append((node.left, False))
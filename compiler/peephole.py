@@ -0,0 +1,362 @@
+# compiler/peephole.py
+
+import json
+
+from .optimizer import is_reference, is_constant, reference_index, constant_index
+from .symbol_tables import TypeSystem
+
+# --- Forma de bajo nivel (C.O.F. -> ensamblador simbólico) ---
+#
+# Máquina de acumulador con un solo registro 'R'. Cada tripleta (i) se baja a:
+#   aritmética:   LOAD R, a   | ADD R, b   (FADD/FSUB/... para reales)   | STORE %t<i>, R
+#   comparación:  LOAD R, a   | CMP R, b   | SET<cc> R                   | STORE %t<i>, R
+#   and / or:     LOAD R, a   | TEST R | JZ/JNZ L<i> | <código de b> | LOAD R, b | LABEL L<i> | STORE %t<i>, R
+#   not:          LOAD R, a   | NOT R                                    | STORE %t<i>, R
+#   asignación:   LOAD R, b   | STORE x, R
+# Los operandos inmediatos se escriben '=valor'. Los temporales llevan el
+# prefijo '%', que el analizador léxico no acepta en un identificador: así no
+# se confunden con una variable del usuario que se llame 't1'.
+#
+# En and / or el segundo operando se calcula después del salto (cortocircuito)
+# si sus tripletas no se usan en otro lado. Así la comparación del primer
+# operando queda pegada al TEST y las reglas de comparar y saltar se aplican.
+
+class Imm:
+    """Operando inmediato (valor constante)."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Imm) and type(self.value) is type(other.value) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self.value), self.value))
+
+    def __repr__(self):
+        return f"={self.value!r}"
+
+
+TEMPORARY_PREFIX = '%t'
+
+
+def temporary(index):
+    """Nombre del temporal que guarda el resultado de la tripleta (index)."""
+    return f"{TEMPORARY_PREFIX}{index}"
+
+
+def is_temporary(name):
+    return isinstance(name, str) and name.startswith(TEMPORARY_PREFIX) and name[len(TEMPORARY_PREFIX):].isdigit()
+
+
+ARITHMETIC = {'+': 'ADD', '-': 'SUB', '*': 'MUL', '/': 'DIV'}
+CONDITIONS = {'=': 'EQ', '<>': 'NE', '<': 'LT', '>': 'GT', '<=': 'LE', '>=': 'GE'}
+NEGATED = {'EQ': 'NE', 'NE': 'EQ', 'LT': 'GE', 'GE': 'LT', 'GT': 'LE', 'LE': 'GT'}
+
+
+def _infer_types(triples, constant_pool, symbol_table):
+    """Tipo del resultado de cada tripleta (con TypeSystem, como el análisis semántico)."""
+    types = []
+
+    def operand_type(operand):
+        if is_reference(operand):
+            return types[reference_index(operand)]
+        if is_constant(operand):
+            return constant_pool.get(constant_index(operand))['type'] if constant_pool else None
+        symbol = symbol_table.find_symbol_by_name(operand) if symbol_table and operand else None
+        return symbol.type if symbol else None
+
+    for op, arg1, arg2 in triples:
+        left, right = operand_type(arg1), operand_type(arg2)
+        if op == '/' and left and right:
+            types.append('real')
+        else:
+            types.append(TypeSystem.get_result_type(op, left, right))
+    return types
+
+
+def _short_circuit_operands(triples):
+    """
+    Tripletas que se calculan dentro de un and / or, después del salto: las
+    del segundo operando que solo se usan para calcularlo. Devuelve
+    {tripleta: and / or más interno que la calcula}.
+    """
+    uses = [0] * len(triples)
+    for _, arg1, arg2 in triples:
+        for operand in (arg1, arg2):
+            if is_reference(operand):
+                uses[reference_index(operand)] += 1
+
+    owner = {}
+    # Del último al primero: un and / or anidado queda como dueño de sus propias tripletas
+    for i in reversed(range(len(triples))):
+        op, _, arg2 = triples[i]
+        if op not in ('and', 'or') or not is_reference(arg2) or uses[reference_index(arg2)] != 1:
+            continue
+        stack = [reference_index(arg2)]
+        while stack:
+            index = stack.pop()
+            owner[index] = i
+            for operand in triples[index][1:]:
+                if is_reference(operand) and uses[reference_index(operand)] == 1:
+                    stack.append(reference_index(operand))
+    return owner
+
+
+def lower_triples(triples, constant_pool=None, symbol_table=None):
+    """Baja una secuencia de tripletas a instrucciones de la máquina de acumulador."""
+    types = _infer_types(triples, constant_pool, symbol_table)
+    owner = _short_circuit_operands(triples)
+    deferred = {}  # and / or -> tripletas que calcula después del salto (en orden)
+    for index in sorted(owner):
+        deferred.setdefault(owner[index], []).append(index)
+
+    def operand(value):
+        if is_reference(value):
+            return temporary(reference_index(value))
+        if is_constant(value) and constant_pool is not None:
+            return Imm(constant_pool.get(constant_index(value))['value'])
+        return value
+
+    code = []
+
+    def emit(i):
+        op, arg1, arg2 = triples[i]
+        if op == ':=':
+            code.extend([('LOAD', 'R', operand(arg2)), ('STORE', arg1, 'R')])
+            return
+        code.append(('LOAD', 'R', operand(arg1)))
+        if op in ARITHMETIC:
+            if op == '+' and types[i] == 'string':
+                mnemonic = 'CONCAT'
+            elif types[i] == 'real':
+                mnemonic = 'F' + ARITHMETIC[op]
+            else:
+                mnemonic = ARITHMETIC[op]
+            code.append((mnemonic, 'R', operand(arg2)))
+        elif op in CONDITIONS:
+            code.extend([('CMP', 'R', operand(arg2)), ('SET' + CONDITIONS[op], 'R')])
+        elif op in ('and', 'or'):
+            # Evaluación en cortocircuito: si el primer operando decide, se salta el segundo
+            label = f"L{i}"
+            code.extend([('TEST', 'R'), ('JZ' if op == 'and' else 'JNZ', label)])
+            for index in deferred.get(i, ()):
+                if owner[index] == i:
+                    emit(index)
+            code.extend([('LOAD', 'R', operand(arg2)), ('LABEL', label)])
+        elif op == 'not':
+            code.append(('NOT', 'R'))
+        else:
+            raise ValueError(f"Operador sin traducción a bajo nivel: '{op}'")
+        code.append(('STORE', temporary(i), 'R'))
+
+    for i in range(len(triples)):
+        if i not in owner:
+            emit(i)
+    return code
+
+
+def format_instruction(instruction):
+    opcode, *operands = instruction
+    if opcode == 'LABEL':
+        return f"{operands[0]}:"
+    return f"    {opcode:<7}" + ", ".join(str(o) if not isinstance(o, Imm) else repr(o) for o in operands)
+
+
+# --- Tabla declarativa de reglas ---
+#
+# Cada regla tiene:
+#   'pattern': secuencia de instrucciones; '?x' es una variable del patrón
+#              (también puede ocupar el lugar del código de operación).
+#   'where':   condiciones [predicado, argumentos...] que deben cumplirse.
+#   'replace': instrucciones resultantes; un argumento [función, argumentos...]
+#              se calcula con la tabla FUNCTIONS.
+# Las reglas son datos (compatibles con JSON): se pueden agregar nuevas sin
+# modificar el código mientras usen los predicados y funciones existentes.
+
+PEEPHOLE_RULES = [
+    {   # STORE m, R ; LOAD R, m  ->  el registro ya tiene el valor
+        'name': 'carga_redundante',
+        'pattern': [['STORE', '?m', '?r'], ['LOAD', '?r', '?m']],
+        'replace': [['STORE', '?m', '?r']],
+    },
+    {   # LOAD R, m ; STORE m, R  ->  la memoria ya tiene el valor
+        'name': 'almacenamiento_redundante',
+        'pattern': [['LOAD', '?r', '?m'], ['STORE', '?m', '?r']],
+        'replace': [['LOAD', '?r', '?m']],
+    },
+    {   # Temporal que nadie vuelve a leer
+        'name': 'temporal_sin_uso',
+        'pattern': [['STORE', '?t', '?r']],
+        'where': [['temporal_sin_lecturas', '?t']],
+        'replace': [],
+    },
+    {   # x * 1  ->  x
+        'name': 'multiplicar_por_uno',
+        'pattern': [['MUL', '?r', '?k']],
+        'where': [['es_inmediato', '?k', 1]],
+        'replace': [],
+    },
+    {   # x * 2  ->  x + x
+        'name': 'multiplicar_por_dos',
+        'pattern': [['MUL', '?r', '?k']],
+        'where': [['es_inmediato', '?k', 2]],
+        'replace': [['ADD', '?r', '?r']],
+    },
+    {   # x * 2^k  ->  x << k  (solo enteros)
+        'name': 'multiplicar_por_potencia_de_dos',
+        'pattern': [['MUL', '?r', '?k']],
+        'where': [['potencia_de_dos', '?k']],
+        'replace': [['SHL', '?r', ['log2', '?k']]],
+    },
+    {   # SET<cc> R ; NOT R  ->  SET<cc negada> R
+        'name': 'negar_comparacion',
+        'pattern': [['?set', '?r'], ['NOT', '?r']],
+        'where': [['es_set', '?set']],
+        'replace': [[['set_negado', '?set'], '?r']],
+    },
+    {   # SET<cc> R ; TEST R ; JZ L  ->  SET<cc> R ; J<cc negada> L   (comparar y saltar)
+        'name': 'comparar_y_saltar_si_falso',
+        'pattern': [['?set', '?r'], ['TEST', '?r'], ['JZ', '?l']],
+        'where': [['es_set', '?set']],
+        'replace': [['?set', '?r'], [['salto_negado', '?set'], '?l']],
+    },
+    {   # SET<cc> R ; TEST R ; JNZ L  ->  SET<cc> R ; J<cc> L
+        'name': 'comparar_y_saltar_si_verdadero',
+        'pattern': [['?set', '?r'], ['TEST', '?r'], ['JNZ', '?l']],
+        'where': [['es_set', '?set']],
+        'replace': [['?set', '?r'], [['salto', '?set'], '?l']],
+    },
+]
+
+
+def _is_power_of_two(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 2 and value & (value - 1) == 0
+
+PREDICATES = {
+    'es_inmediato': lambda optimizer, operand, value: operand == Imm(value),
+    'potencia_de_dos': lambda optimizer, operand: isinstance(operand, Imm) and _is_power_of_two(operand.value),
+    'es_set': lambda optimizer, opcode: isinstance(opcode, str) and opcode[3:] in NEGATED and opcode.startswith('SET'),
+    'temporal_sin_lecturas': lambda optimizer, name: optimizer.is_unread_temporary(name),
+}
+
+FUNCTIONS = {
+    'log2': lambda operand: operand.value.bit_length() - 1,
+    'set_negado': lambda opcode: 'SET' + NEGATED[opcode[3:]],
+    'salto': lambda opcode: 'J' + opcode[3:],
+    'salto_negado': lambda opcode: 'J' + NEGATED[opcode[3:]],
+}
+
+
+def load_rules(filename):
+    """Carga una tabla de reglas desde un archivo JSON (mismo formato que PEEPHOLE_RULES)."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class PeepholeOptimizer:
+    """
+    Optimizador de mirilla guiado por una tabla de reglas. Aplica las reglas
+    sobre una ventana deslizante hasta que ninguna cambia el código, y cuenta
+    cuántas veces se aplicó cada una.
+    """
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else PEEPHOLE_RULES
+        self.fired = {rule['name']: 0 for rule in self.rules}
+        self.code = []
+        self.original_size = 0
+        self._reads = {}  # Nombre -> lecturas en self.code (se actualiza con cada cambio)
+
+    def optimize(self, code):
+        self.code = [tuple(instruction) for instruction in code]
+        self.original_size = len(self.code)
+        self._count_reads()
+        changed = True
+        while changed:
+            changed = False
+            i = 0
+            while i < len(self.code):
+                if self._apply_at(i):
+                    changed = True
+                    i = max(0, i - 2)  # Volver un poco: el cambio puede habilitar otra regla
+                else:
+                    i += 1
+        return self.code
+
+    def is_unread_temporary(self, name):
+        return is_temporary(name) and not self._reads.get(name)
+
+    def _count_reads(self):
+        """Cuántas veces se lee cada nombre (cualquier aparición que no sea destino de STORE)."""
+        self._reads = {}
+        self._add_reads(self.code, 1)
+
+    def _add_reads(self, instructions, delta):
+        reads = self._reads
+        for opcode, *operands in instructions:
+            for position, operand in enumerate(operands):
+                if opcode == 'STORE' and position == 0:
+                    continue
+                if isinstance(operand, str):
+                    reads[operand] = reads.get(operand, 0) + delta
+
+    def _apply_at(self, i):
+        for rule in self.rules:
+            pattern = rule['pattern']
+            window = self.code[i:i + len(pattern)]
+            if len(window) < len(pattern):
+                continue
+            bindings = {}
+            if not all(self._match(p, instruction, bindings) for p, instruction in zip(pattern, window)):
+                continue
+            if not all(self._check(condition, bindings) for condition in rule.get('where', ())):
+                continue
+            replacement = [tuple(self._build(field, bindings) for field in template)
+                           for template in rule['replace']]
+            self.code[i:i + len(pattern)] = replacement
+            self.fired[rule['name']] = self.fired.get(rule['name'], 0) + 1
+            # Solo cambian las lecturas de la ventana reemplazada
+            self._add_reads(window, -1)
+            self._add_reads(replacement, 1)
+            return True
+        return False
+
+    @staticmethod
+    def _match(pattern, instruction, bindings):
+        if len(pattern) != len(instruction):
+            return False
+        for field, value in zip(pattern, instruction):
+            if isinstance(field, str) and field.startswith('?'):
+                if field in bindings and bindings[field] != value:
+                    return False
+                bindings[field] = value
+            elif field != value:
+                return False
+        return True
+
+    def _check(self, condition, bindings):
+        name, *args = condition
+        args = [bindings.get(arg, arg) if isinstance(arg, str) else arg for arg in args]
+        return PREDICATES[name](self, *args)
+
+    @staticmethod
+    def _build(field, bindings):
+        if isinstance(field, list):  # [función, argumentos...]
+            name, *args = field
+            return FUNCTIONS[name](*(bindings.get(arg, arg) for arg in args))
+        if isinstance(field, str) and field.startswith('?'):
+            return bindings[field]
+        return field
+
+    def generate_markdown(self):
+        md = "## Optimización de Mirilla (Peephole)\n\n"
+        md += f"Instrucciones: **{self.original_size}** → **{len(self.code)}**\n\n"
+        md += "| Regla | Aplicaciones |\n"
+        md += "|:------|:------------:|\n"
+        for name, count in self.fired.items():
+            md += f"| `{name}` | {count} |\n"
+        md += "\n```asm\n"
+        md += "\n".join(format_instruction(instruction) for instruction in self.code)
+        md += "\n```\n"
+        return md
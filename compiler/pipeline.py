@@ -1,83 +1,286 @@
 # compiler/pipeline.py
 
-from .parser import Parser
-from .lexical_analyzer import LexicalAnalyzer
-from .syntax_analizer import SyntaxAnalyzer
-from .syntactic_checking import SyntacticChecking
-from .semantic_analyzer import SemanticAnalyzer
-from .intermediate_code_gen import IntermediateCodeGenerator
-from .symbol_tables import generate_fixed_tables_report
+import time
+
+from .symbol_tables import generate_language_tables_document, ConstantPool, VariableSymbolTable
+from .report import Report
+
+# Las fases se importan dentro de compile_expression() y run(): importar este
+# módulo no carga el análisis semántico ni la generación de código hasta que
+# se compila algo.
+
+# Conclusión fija de todos los reportes (se genera una sola vez al importar)
+CONCLUSION_MARKDOWN = (
+    "\n# Conclusión\n\n"
+    "El proceso de compilación consta de **etapas secuenciales**, donde cada una garantiza la corrección del código antes de pasar a la siguiente:\n\n"
+    "| Etapa | Propósito | Ejemplo |\n"
+    "|:------|:----------|:--------|\n"
+    "| **Parseo** | Lee caracteres y forma palabras | `x := 1 + a + (b * c) + 3` |\n"
+    "| **Análisis Léxico** | Clasifica tokens | `ID`, `NUM`, `+`, `*`, `:=` |\n"
+    "| **Análisis Sintáctico** | Verifica reglas gramaticales | Árbol de expresión |\n"
+    "| **Análisis Semántico** | Verifica tipos y operaciones | Error o validación de tipos |\n"
+    "| **Síntesis** | Genera código intermedio | Tripletas o cuádruplas |\n\n"
+    "---\n"
+)
+
+# Fases que mide CompilationPipeline.run() (ver 'timings'); las fases 4 y 5
+# se miden juntas porque se ejecutan en un solo recorrido del AST
+PIPELINE_PHASES = ('parseo', 'léxico', 'ast', 'gramática', 'semántico')
+
+
+def save_language_tables(filename="reports/tablas_lenguaje.md"):
+    """
+    Guarda el documento compartido con las tablas del lenguaje. Los reportes
+    creados con tables_ref apuntan a este archivo en lugar de repetir las tablas.
+    """
+    import os
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(generate_language_tables_document())
+    return filename
+
+
+class CompiledExpression:
+    """Resultados de compile_expression() (una compilación sin reporte)."""
+    def __init__(self, expression, tokens, ast_root, triples, postfix, errors, symbol_table, constant_pool,
+                 diagnostics=None):
+        self.expression = expression
+        self.tokens = tokens
+        self.ast_root = ast_root
+        self.triples = triples
+        self.postfix = postfix
+        self.errors = errors
+        self.symbol_table = symbol_table
+        self.constant_pool = constant_pool
+        self.diagnostics = diagnostics
+
+    @property
+    def target(self):
+        """Variable asignada (None si la raíz no es ':=')."""
+        if self.ast_root is not None and self.ast_root.value == ':=' and self.ast_root.left:
+            return self.ast_root.left.value
+        return None
+
+
+def compile_expression(expression, symbol_table=None, constant_pool=None, diagnostics=None):
+    """
+    Compila una expresión sin generar reportes: parseo, análisis léxico,
+    AST, análisis semántico, análisis de rangos y tripletas (estas tres últimas
+    en un solo recorrido).
+    Los errores de las fases 1 a 3 se lanzan como ValueError; los errores
+    semánticos se devuelven en 'errors'. Con un colector 'diagnostics'
+    (compiler.diagnostics) no se lanza nada: todas las fases informan ahí sus
+    errores, con código y posición, y se recuperan para seguir analizando.
+    """
+    if symbol_table is None:
+        symbol_table = VariableSymbolTable()
+    elif symbol_table.frozen:
+        symbol_table = symbol_table.overlay()
+    if constant_pool is None:
+        constant_pool = ConstantPool()
+    from .parser import Parser
+    from .lexical_analyzer import LexicalAnalyzer
+    from .syntax_analizer import SyntaxAnalyzer
+    from .semantic_analyzer import SemanticAnalyzer
+    from .range_analysis import RangeAnalyzer
+    from .intermediate_code_gen import IntermediateCodeGenerator
+    from .passes import PassManager
+
+    parser = Parser(expression, diagnostics)
+    tokens = LexicalAnalyzer(parser.parse(), symbol_table, constant_pool=constant_pool,
+                             spans=parser.spans, diagnostics=diagnostics).tokenize()
+    ast_root = SyntaxAnalyzer(tokens, diagnostics=diagnostics).build_ast()
+
+    semantic_analyzer = SemanticAnalyzer(ast_root, symbol_table, constant_pool=constant_pool,
+                                         diagnostics=diagnostics)
+    range_analyzer = RangeAnalyzer(symbol_table, constant_pool)
+    icg = IntermediateCodeGenerator(ast_root, constant_pool)
+    PassManager(semantic_analyzer.passes() + range_analyzer.passes() +
+                icg.passes(after=('tipos',))).run(ast_root)
+    return CompiledExpression(expression, tokens, ast_root, icg.triples, icg.postfix,
+                              semantic_analyzer.errors, symbol_table, constant_pool, diagnostics)
+
 
 class CompilationPipeline:
-    def __init__(self, expression, symbol_table=None):
+    def __init__(self, expression, symbol_table=None, diagram_limits=None, diagram_format='mermaid',
+                 tables_ref=None, constant_pool=None, verbose=True, diagnostics=None):
         self.expression = expression
+        # Colector de errores compartido por las fases (None: el primer error de
+        # las fases 1 a 3 se lanza como ValueError)
+        self.diagnostics = diagnostics
+        # Con verbose=False no se imprime el avance (por ejemplo, en procesos de trabajo)
+        self.verbose = verbose
+        # Una tabla congelada es una base compartida: se compila sobre una capa propia
+        if symbol_table is not None and symbol_table.frozen:
+            symbol_table = symbol_table.overlay()
         self.symbol_table = symbol_table
-        self.report = "# Proceso de Compilación\n\n"
+        # Tabla de constantes (se puede compartir entre varias compilaciones)
+        self.constant_pool = constant_pool if constant_pool is not None else ConstantPool()
+        # Si se indica, las tablas fijas se referencian (ver save_language_tables)
+        self.tables_ref = tables_ref
+        # Resultados de la compilación (disponibles después de run())
+        self.tokens = None
+        self.ast_root = None
+        self.triples = None
+        self.errors = []    # Errores semánticos
+        self.low_level_code = None  # Código de bajo nivel tras la optimización de mirilla
+        self.ast_walks = 0  # Recorridos completos del AST durante la compilación
+        self.timings = {}   # Segundos por fase (PIPELINE_PHASES), medidos en run()
+        # Opciones de los diagramas (límites de tamaño y formato: mermaid, dot o json)
+        self.diagram_limits = diagram_limits
+        self.diagram_format = diagram_format
+        # El reporte se arma por partes; los diagramas se generan al guardarlo
+        self.report = Report("# Proceso de Compilación\n\n")
         self.report += f"**Expresión:** `{expression}`\n\n"
         self.report += "---\n"
 
     def run(self):
+        from .parser import Parser
+        from .lexical_analyzer import LexicalAnalyzer
+        from .syntax_analizer import SyntaxAnalyzer
+        from .syntactic_checking import SyntacticChecking
+        from .semantic_analyzer import SemanticAnalyzer
+        from .range_analysis import RangeAnalyzer
+        from .intermediate_code_gen import IntermediateCodeGenerator
+        from .peephole import PeepholeOptimizer, lower_triples
+        from .passes import PassManager
+
         # Fase 1: Parseo
         self.report += "\n"
-        print("Iniciando Fase 1: Parseo...")
-        parser = Parser(self.expression)
+        self._log("Iniciando Fase 1: Parseo...")
+        start = time.perf_counter()
+        parser = Parser(self.expression, self.diagnostics)
         lexemes = parser.parse()
         self.report += parser.generate_markdown() + "\n"
+        start = self._lap('parseo', start)
 
         # Fase 2: Análisis Lexicográfico
         self.report += "\n"
-        print("Iniciando Fase 2: Análisis Lexicográfico...")
-        lex_analyzer = LexicalAnalyzer(lexemes, self.symbol_table)
+        self._log("Iniciando Fase 2: Análisis Lexicográfico...")
+        lex_analyzer = LexicalAnalyzer(lexemes, self.symbol_table, self.tables_ref, self.constant_pool,
+                                       spans=parser.spans, diagnostics=self.diagnostics)
         tokens, lex_report = lex_analyzer.analyze()
+        self.tokens = tokens
+        self.symbol_table = lex_analyzer.symbol_table
         self.report += lex_report + "\n"
+        start = self._lap('léxico', start)
 
         # Fase 3: Análisis Sintáctico
         self.report += "\n## 3. Análisis Sintáctico\n\n"
-        print("Iniciando Fase 3: Análisis Sintáctico...")
+        self._log("Iniciando Fase 3: Análisis Sintáctico...")
 
         # 3.1 Generación de Árbol de Expresión (AST)
-        print("Iniciando Fase 3.1: Generación de Árbol de Expresión...")
-        syntax_tokens = [(kind, value) for kind, value, _ in tokens]
-        syntax_analyzer = SyntaxAnalyzer(syntax_tokens)
+        self._log("Iniciando Fase 3.1: Generación de Árbol de Expresión...")
+        # Todas las fases comparten la misma TokenStream (sin copiarla)
+        syntax_analyzer = SyntaxAnalyzer(tokens, self.diagram_limits, self.diagram_format, self.diagnostics)
         ast_root, syntax_report = syntax_analyzer.analyze()
         self.report += syntax_report + "\n"
+        start = self._lap('ast', start)
 
         # 3.2 Comprobación Sintáctica (Árbol de Derivación)
         self.report += "\n### 3.2. Comprobación Sintáctica / Comprobación de Tipos\n\n"
-        print("Iniciando Fase 3.2: Comprobación Sintáctica...")
-        sc_analizer = SyntacticChecking(syntax_tokens)
+        self._log("Iniciando Fase 3.2: Comprobación Sintáctica...")
+        sc_analizer = SyntacticChecking(tokens, self.diagram_limits, self.diagram_format, self.diagnostics)
         parse_tree, sc_report = sc_analizer.analyze()
         self.report += sc_report + "\n"
+        start = self._lap('gramática', start)
+
+        # Fases 4 y 5 sobre el AST: la anotación de tipos, el conteo de tipos,
+        # el análisis de rangos, las tripletas y la notación postfija se
+        # ejecutan en un solo recorrido.
+        self._log("Iniciando Fase 4: Análisis Semántico...")
+        self._log("Iniciando Fase 5: Generación de Código Intermedio...")
+        semantic_analyzer = SemanticAnalyzer(ast_root, lex_analyzer.symbol_table,
+                                             self.diagram_limits, self.diagram_format, self.tables_ref,
+                                             self.constant_pool, self.diagnostics)
+        range_analyzer = RangeAnalyzer(lex_analyzer.symbol_table, self.constant_pool)
+        icg = IntermediateCodeGenerator(ast_root, self.constant_pool)
+        pass_manager = PassManager(semantic_analyzer.passes() + range_analyzer.passes() +
+                                   icg.passes(after=('tipos',)))
+        pass_manager.run(ast_root)
+        self.ast_walks = pass_manager.walks
+        self.ast_root = ast_root
+        self.triples = icg.triples
+        self.errors = semantic_analyzer.errors
 
         # Fase 4: Análisis Semántico
         self.report += "\n## 4. Análisis Semántico\n\n"
-        print("Iniciando Fase 4: Análisis Semántico...")
-        semantic_analyzer = SemanticAnalyzer(ast_root, lex_analyzer.symbol_table)
-        annotated_ast, semantic_report = semantic_analyzer.analyze()
-        self.report += semantic_report + "\n"
+        self.report += semantic_analyzer.build_report() + "\n"
+        self.report += "\n" + range_analyzer.generate_markdown() + "\n"
 
         # Fase 5: Síntesis (Generación de Código Intermedio)
         self.report += "\n## 5. Síntesis (Generación de Código Intermedio)\n\n"
-        print("Iniciando Fase 5: Generación de Código Intermedio...")
-        icg = IntermediateCodeGenerator(annotated_ast)
-        icg_report = icg.generate()
-        self.report += icg_report
+        self.report += icg.build_report()
+
+        # Código de bajo nivel, optimizado con la mirilla (solo si no hubo errores)
+        if not self.errors and (self.diagnostics is None or not self.diagnostics.has_errors):
+            peephole = PeepholeOptimizer()
+            self.low_level_code = peephole.optimize(
+                lower_triples(self.triples, self.constant_pool, lex_analyzer.symbol_table))
+            self.report += "\n" + peephole.generate_markdown() + "\n"
+        self._lap('semántico', start)
+
+        # Errores de todas las fases (solo si se compiló con un colector)
+        if self.diagnostics is not None:
+            self.report += "\n" + self.diagnostics.generate_markdown() + "\n"
 
         # Conclusión
-        self.report += "\n# Conclusión\n\n"
-        self.report += "El proceso de compilación consta de **etapas secuenciales**, donde cada una garantiza la corrección del código antes de pasar a la siguiente:\n\n"
-        self.report += "| Etapa | Propósito | Ejemplo |\n"
-        self.report += "|:------|:----------|:--------|\n"
-        self.report += "| **Parseo** | Lee caracteres y forma palabras | `x := 1 + a + (b * c) + 3` |\n"
-        self.report += "| **Análisis Léxico** | Clasifica tokens | `ID`, `NUM`, `+`, `*`, `:=` |\n"
-        self.report += "| **Análisis Sintáctico** | Verifica reglas gramaticales | Árbol de expresión |\n"
-        self.report += "| **Análisis Semántico** | Verifica tipos y operaciones | Error o validación de tipos |\n"
-        self.report += "| **Síntesis** | Genera código intermedio | Tripletas o cuádruplas |\n\n"
-        self.report += "---\n"
+        self.report += CONCLUSION_MARKDOWN
 
-    def save_report(self, filename="reports/reporte_compilacion.md"):
+    def _lap(self, phase, start):
+        """Registra el tiempo de una fase y devuelve el inicio de la siguiente."""
+        now = time.perf_counter()
+        self.timings[phase] = now - start
+        return now
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def save_report(self, filename="reports/reporte_compilacion.md", archive=None, expression_id=None,
+                    writer=None):
+        """
+        Guarda el reporte en un archivo Markdown o, si se indica un
+        ReportArchive, lo agrega al final de ese archivo de reportes.
+        Con un BackgroundWriter la escritura se encola y se hace en segundo plano.
+        """
+        if writer is not None:
+            if archive is not None:
+                writer.append_report(archive, self.expression, self.report, expression_id)
+            else:
+                writer.write_file(filename, self.report)
+            return expression_id
+        if archive is not None:
+            expression_id = archive.append(self.expression, str(self.report), expression_id)
+            self._log(f"\n ¡Reporte '{expression_id}' agregado a '{archive.path}'!")
+            return expression_id
         import os
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write(self.report)
-        print(f"\n ¡Reporte guardado exitosamente en '{filename}'!")
\ No newline at end of file
+            f.writelines(self.report.iter_text())
+        self._log(f"\n ¡Reporte guardado exitosamente en '{filename}'!")
+
+    def save_artifact(self, filename="reports/artefacto_compilacion.cexa", writer=None):
+        """
+        Guarda los resultados de la compilación (tokens, tabla de símbolos,
+        tabla de constantes, AST anotado con tipos de almacenamiento y tripletas)
+        en el formato binario
+        de compiler.artifacts. Con un BackgroundWriter se escribe en segundo plano.
+        """
+        import os
+        from .artifacts import write_artifact
+        if self.ast_root is None:
+            raise ValueError("No hay resultados de compilación: ejecute run() antes de guardar el artefacto")
+
+        def job():
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            write_artifact(filename, self.tokens, self.symbol_table, self.ast_root, self.triples,
+                           self.constant_pool)
+
+        if writer is not None:
+            writer.submit(job, filename)
+            return
+        job()
+        self._log(f"\n ¡Artefacto guardado exitosamente en '{filename}'!")
@@ -0,0 +1,270 @@
+# compiler/program.py
+
+import argparse
+import json
+
+from .dependency_graph import DependencyGraph
+from .lexical_analyzer import LexicalAnalyzer
+from .optimizer import GlobalOptimizer
+from .parser import Parser
+from .pipeline import compile_expression
+from .symbol_tables import ConstantPool, VariableSymbolTable
+from .syntactic_checking import SyntacticChecking
+from .tokens import DELIMITER, RESERVED_WORD
+
+# Compilación de un programa completo (la gramática de compiler.grammar):
+# sentencias separadas por ';', secciones 'var', bloques begin/end y
+# procedimientos 'proc nombre; begin ... end'.
+#
+# Cada bloque abre un scope en la tabla de símbolos (enter_scope) y lo cierra
+# en su 'end' (exit_scope). Las sentencias se compilan mientras su scope está
+# abierto, así cada nombre se resuelve contra las declaraciones visibles en
+# ese punto del programa. Al compilarla, las variables de un scope interno se
+# renombran 'nombre@scope' en el AST y en las tripletas ('@' no aparece en un
+# identificador): las fases que trabajan sobre todo el programa no las
+# confunden con las variables externas del mismo nombre.
+#
+# Si ninguna sentencia tiene errores, las tripletas de todo el programa pasan
+# por la optimización global (compiler.optimizer.GlobalOptimizer). Al final
+# del programa solo siguen vivas las variables del scope global: las de los
+# bloques ya no se pueden leer.
+#
+# dependency_graph() arma el grafo de dependencias de las asignaciones
+# (compiler.dependency_graph): el programa se evalúa como una hoja de
+# cálculo, cada variable se asigna una sola vez y el orden de evaluación lo
+# dan las dependencias, no el orden de las sentencias.
+
+SCOPE_SEPARATOR = '@'
+
+
+def _leaves(root):
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        if not node.left and not node.right:
+            yield node
+        if node.right:
+            stack.append(node.right)
+        if node.left:
+            stack.append(node.left)
+
+
+class ProgramCompiler:
+    """
+    Compila un programa sentencia por sentencia con una tabla de símbolos y
+    una tabla de constantes compartidas. 'statements' son los resultados de
+    compile_expression() en orden de aparición y 'scopes', el scope en el
+    que se compiló cada uno.
+
+    Los errores de las fases 1 a 3 (y de la gramática del programa) se lanzan
+    como ValueError; los errores semánticos quedan en cada sentencia ('errors').
+    Sin errores, 'optimizer' es la optimización global del programa y
+    'optimized' sus tripletas optimizadas.
+    """
+    def __init__(self, symbol_table=None):
+        if symbol_table is None:
+            symbol_table = VariableSymbolTable()
+        elif symbol_table.frozen:
+            symbol_table = symbol_table.overlay()
+        self.symbol_table = symbol_table
+        self.constant_pool = ConstantPool()
+        self.source = None
+        self.statements = []
+        self.scopes = []
+        self.procedures = []
+        self.optimizer = None
+        self.optimized = None
+
+    def compile(self, source):
+        self.source = source
+        self.statements = []
+        self.scopes = []
+        self.procedures = []
+        self.optimizer = None
+        self.optimized = None
+        tokens = self._check_grammar(source)
+        self._global_scope = self.symbol_table.scope_stack[-1]
+        kinds, lexemes = tokens.kinds, tokens.lexemes
+        depth = 0
+        index = 0
+        try:
+            while index < len(kinds):
+                word = lexemes[index].lower() if kinds[index] == RESERVED_WORD else None
+                if word == 'begin':
+                    self.symbol_table.enter_scope()
+                    depth += 1
+                    index += 1
+                elif word == 'end':
+                    self.symbol_table.exit_scope()
+                    depth -= 1
+                    index += 1
+                elif word == 'var':
+                    index = self._declare(tokens, index + 1)
+                elif index + 1 < len(kinds) and kinds[index + 1] == DELIMITER and lexemes[index + 1] in (',', ':'):
+                    index = self._declare(tokens, index)  # La sección 'var' sigue: 'y, z : real'
+                elif word == 'proc':
+                    self.procedures.append(lexemes[index + 1])
+                    index += 3  # proc nombre ;
+                elif kinds[index] == DELIMITER and lexemes[index] == ';':
+                    index += 1
+                else:
+                    index = self._compile_statement(tokens, index)
+        finally:
+            # Un error a mitad de un bloque no deja scopes abiertos en la tabla
+            for _ in range(depth):
+                self.symbol_table.exit_scope()
+        if self.statements and not self.errors:
+            self.optimize()
+        return self.statements
+
+    def optimize(self, live_out=None):
+        """
+        Optimización global de las tripletas del programa. Por omisión siguen
+        vivas al final las variables globales asignadas (las de los bloques
+        tienen el nombre calificado con SCOPE_SEPARATOR).
+        """
+        if live_out is None:
+            live_out = {compiled.target for compiled in self.statements
+                        if compiled.target is not None and SCOPE_SEPARATOR not in compiled.target}
+        self.optimizer = GlobalOptimizer.from_compiled(self.statements, live_out)
+        self.optimized = self.optimizer.optimize()
+        return self.optimized
+
+    def dependency_graph(self):
+        """Grafo de dependencias de las asignaciones del programa (ver DependencyGraph)."""
+        if self.errors:
+            raise ValueError(f"Errores semánticos: {'; '.join(self.errors)}")
+        return DependencyGraph(self.statements, self.symbol_table)
+
+    def _check_grammar(self, source):
+        """Tokens del programa completo, validados con la gramática."""
+        # Tabla y constantes descartables: las declaraciones todavía no se procesaron
+        parser = Parser(source)
+        tokens = LexicalAnalyzer(parser.parse(), VariableSymbolTable(), constant_pool=ConstantPool(),
+                                 spans=parser.spans).tokenize()
+        checker = SyntacticChecking(tokens)
+        checker.analyze()
+        if checker.errors:
+            raise ValueError(checker.errors[0])
+        return tokens
+
+    def _declare(self, tokens, index):
+        """nombre (, nombre)* : tipo (después de 'var') -> símbolos del scope actual. Devuelve el índice siguiente."""
+        lexemes = tokens.lexemes
+        names = []
+        while lexemes[index] != ':':
+            if lexemes[index] != ',':
+                names.append(lexemes[index])
+            index += 1
+        symbol_type = lexemes[index + 1].lower()
+        for name in names:
+            self.symbol_table.add_symbol(name, symbol_type)
+        return index + 2
+
+    def _compile_statement(self, tokens, start):
+        kinds, lexemes = tokens.kinds, tokens.lexemes
+        end = start
+        while end < len(kinds) and not (kinds[end] == DELIMITER and lexemes[end] == ';') \
+                and not (kinds[end] == RESERVED_WORD and lexemes[end].lower() == 'end'):
+            end += 1
+        text = self.source[tokens.span(start)[0]:tokens.span(end - 1)[1]]
+        compiled = compile_expression(text, self.symbol_table, self.constant_pool)
+        scope = self.symbol_table.scope_stack[-1]
+        self._qualify(compiled)
+        self.statements.append(compiled)
+        self.scopes.append(scope)
+        return end
+
+    def _qualify(self, compiled):
+        """Renombra las variables de scopes internos (mientras su scope sigue abierto)."""
+        renames = {}
+        symbols = self.symbol_table.symbols
+        for kind, name, symbol_id in compiled.tokens:
+            if kind == 'IDENTIFIER' and symbol_id in symbols:
+                scope = symbols[symbol_id]['scope']
+                if scope != self._global_scope:
+                    renames[name] = f"{name}{SCOPE_SEPARATOR}{scope}"
+        if not renames:
+            return
+        for node in _leaves(compiled.ast_root):
+            if node.value in renames and not hasattr(node, 'const_index'):
+                node.value = renames[node.value]
+        compiled.triples = [[op, renames.get(arg1, arg1), renames.get(arg2, arg2)]
+                            for op, arg1, arg2 in compiled.triples]
+
+    @property
+    def errors(self):
+        """Errores semánticos de todas las sentencias ('sentencia: error')."""
+        return [f"{compiled.expression}: {error}" for compiled in self.statements for error in compiled.errors]
+
+    def generate_markdown(self):
+        md = "## Programa\n\n"
+        md += f"- Sentencias: **{len(self.statements)}**\n"
+        md += f"- Procedimientos: **{len(self.procedures)}**\n\n"
+        md += "| # | Sentencia | Scope | Tripletas |\n"
+        md += "|:-:|:----------|:-----:|:----------|\n"
+        for index, (compiled, scope) in enumerate(zip(self.statements, self.scopes)):
+            triples = "; ".join(f"({i}) {op} {arg1}, {arg2}" for i, (op, arg1, arg2) in enumerate(compiled.triples))
+            md += f"| {index} | `{compiled.expression}` | {scope} | `{triples}` |\n"
+        if self.errors:
+            md += "\n### Errores semánticos\n\n"
+            md += "".join(f"- {error}\n" for error in self.errors)
+        if self.optimizer is not None:
+            md += "\n" + self.optimizer.generate_markdown()
+        return md
+
+
+def compile_source(source, symbol_table=None):
+    """Compila un programa completo (ver ProgramCompiler)."""
+    program = ProgramCompiler(symbol_table)
+    program.compile(source)
+    return program
+
+
+def _input_value(item):
+    """'nombre=valor' -> (nombre, valor); el valor se lee como JSON (3, 2.5, true, "texto")."""
+    name, separator, text = item.partition('=')
+    if not separator:
+        raise ValueError(f"Entrada inválida '{item}': se esperaba NOMBRE=VALOR")
+    try:
+        return name, json.loads(text)
+    except ValueError:
+        return name, text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila un programa (sentencias, declaraciones y bloques).")
+    parser.add_argument('source', help='Archivo con el código fuente del programa')
+    parser.add_argument('--report', help='Archivo Markdown para el reporte del programa')
+    parser.add_argument('--evaluate', nargs='*', metavar='NOMBRE=VALOR',
+                        help='Evalúa el programa (en el orden de sus dependencias) con estas entradas')
+    args = parser.parse_args(argv)
+
+    with open(args.source, 'r', encoding='utf-8') as f:
+        program = compile_source(f.read())
+    print(f"{len(program.statements)} sentencias, {len(program.errors)} errores semánticos")
+    if program.optimizer is not None:
+        print(f"Optimización global: {len(program.optimizer.triples)} -> {len(program.optimized)} tripletas")
+    for error in program.errors:
+        print(f"  {error}")
+    graph = None
+    if args.evaluate is not None:
+        graph = program.dependency_graph()
+        env = graph.evaluate(dict(_input_value(item) for item in args.evaluate))
+        for level in graph.levels:
+            for target in level:
+                print(f"  {target} = {env[target]!r}")
+    if args.report:
+        import os
+        directory = os.path.dirname(args.report)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(program.generate_markdown())
+            if graph is not None:
+                f.write("\n" + graph.generate_markdown())
+        print(f"Reporte guardado en '{args.report}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+# compiler/range_analysis.py
+
+import struct
+
+from .passes import ASTPass
+
+# Tipos de almacenamiento enteros, del más angosto al más ancho, con el rango
+# de valores que pueden representar sin pérdida. Un rango no alcanza para
+# probar que un real cabe exacto en float32 (0.1 no es representable aunque
+# esté en [0, 1]): float32 se usa solo para un valor único que lo sea.
+INTEGER_STORAGE = [
+    ('int8', -2 ** 7, 2 ** 7 - 1),
+    ('int16', -2 ** 15, 2 ** 15 - 1),
+    ('int32', -2 ** 31, 2 ** 31 - 1),
+]
+_FLOAT32 = struct.Struct('<f')
+
+# Tipo usado cuando no se puede acotar el valor (rango desconocido o demasiado grande)
+WIDEST_STORAGE = {'integer': 'int64', 'real': 'float64'}
+
+STORAGE_ORDER = ['int8', 'int16', 'int32', 'int64', 'float32', 'float64']
+NUMERIC_TYPES = ('integer', 'real')
+
+
+def storage_type(value_type, value_range):
+    """Tipo de almacenamiento más angosto para un valor del tipo y rango dados."""
+    if value_type not in NUMERIC_TYPES:
+        return None
+    if value_range is None:
+        return WIDEST_STORAGE[value_type]
+    low, high = value_range
+    if value_type == 'integer':
+        for name, minimum, maximum in INTEGER_STORAGE:
+            if minimum <= low and high <= maximum:
+                return name
+        return WIDEST_STORAGE['integer']
+    if low == high and _float32_exact(low):
+        return 'float32'
+    return WIDEST_STORAGE['real']
+
+
+def _float32_exact(value):
+    """True si 'value' se representa en float32 sin pérdida."""
+    try:
+        return _FLOAT32.unpack(_FLOAT32.pack(value))[0] == value
+    except (OverflowError, struct.error):
+        return False
+
+
+def interval_operation(op, left, right):
+    """
+    Aritmética de intervalos: rango del resultado de 'left op right'
+    (None si alguno de los operandos no está acotado o si el divisor puede ser 0).
+    """
+    if left is None or right is None:
+        return None
+    (a, b), (c, d) = left, right
+    if op == '+':
+        return (a + c, b + d)
+    if op == '-':
+        return (a - d, b - c)
+    if op == '*':
+        products = (a * c, a * d, b * c, b * d)
+        return (min(products), max(products))
+    if op == '/':
+        if c <= 0 <= d:
+            return None
+        quotients = (a / c, a / d, b / c, b / d)
+        return (min(quotients), max(quotients))
+    return None
+
+
+def _unbounded_reason(node):
+    """Por qué no se pudo acotar el resultado de una operación binaria."""
+    for side, child in (('izquierdo', node.left), ('derecho', node.right)):
+        if child.value_range is None:
+            operand = f" '{child.value}'" if not child.left and not child.right else ''
+            return f"el operando {side}{operand} no tiene rango acotado"
+    if node.value == '/':
+        return 'el divisor puede ser cero'
+    return 'rango sin acotar'
+
+
+def _format_range(value_range):
+    if value_range is None:
+        return 'sin acotar'
+    return f"[{value_range[0]}, {value_range[1]}]"
+
+
+class RangeAnalyzer:
+    """
+    Análisis de rangos de valores sobre el AST anotado por el análisis semántico.
+
+    A partir de las constantes y de los rangos declarados en la tabla de
+    símbolos (add_symbol(..., value_range=(mínimo, máximo))) calcula un rango
+    para cada subexpresión numérica y elige el tipo de almacenamiento más
+    angosto que lo contiene (node.value_range, node.storage_type). Se registran
+    las promociones: operaciones cuyo resultado necesita un tipo más ancho que
+    el de sus operandos y asignaciones que exceden el rango declarado del destino.
+    """
+    def __init__(self, symbol_table, constant_pool=None):
+        self.symbol_table = symbol_table
+        self.constant_pool = constant_pool
+        self.nodes = []        # Nodos numéricos analizados (en post-orden)
+        self.promotions = []   # {'node', 'operation', 'from', 'to', 'range', 'reason'}
+
+    def passes(self, after=('tipos',)):
+        """Fase para el PassManager; necesita los tipos, así que va después de 'tipos'."""
+        self.nodes = []
+        self.promotions = []
+        return [ASTPass('rangos', leave=self._analyze_node, after=after)]
+
+    def _leaf_range(self, node):
+        if self.constant_pool is not None and hasattr(node, 'const_index'):
+            value = self.constant_pool.get(node.const_index)['value']
+            return (value, value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+        symbol = self.symbol_table.find_symbol_by_name(node.value) if self.symbol_table else None
+        if symbol is not None:
+            return getattr(symbol, 'value_range', None)
+        try:
+            value = float(node.value) if '.' in node.value else int(node.value)
+        except ValueError:
+            return None
+        return (value, value)
+
+    def _analyze_node(self, node):
+        node_type = getattr(node, 'type', None)
+        if not node.left and not node.right:
+            node.value_range = self._leaf_range(node) if node_type in NUMERIC_TYPES else None
+            node.storage_type = storage_type(node_type, node.value_range)
+            if node.storage_type:
+                self.nodes.append(node)
+            return
+
+        if node.value == ':=':
+            self._analyze_assignment(node)
+            return
+
+        if node_type not in NUMERIC_TYPES or node.right is None:
+            node.value_range = None
+            node.storage_type = None
+            return
+
+        node.value_range = interval_operation(node.value, node.left.value_range, node.right.value_range)
+        node.storage_type = storage_type(node_type, node.value_range)
+        self.nodes.append(node)
+
+        operands = [child.storage_type for child in (node.left, node.right) if child.storage_type]
+        if operands:
+            widest = max(operands, key=STORAGE_ORDER.index)
+            if STORAGE_ORDER.index(node.storage_type) > STORAGE_ORDER.index(widest):
+                if node.value_range is None and node.value == '/':
+                    reason = _unbounded_reason(node)
+                elif node.type == 'real' and widest.startswith('int'):
+                    reason = 'el resultado es real'
+                elif node.value_range is None:
+                    reason = _unbounded_reason(node)
+                else:
+                    reason = f"el resultado no cabe en {widest}"
+                self.promotions.append({
+                    'node': len(self.nodes) - 1,
+                    'operation': f"{node.left.storage_type or node.left.type} {node.value} "
+                                 f"{node.right.storage_type or node.right.type}",
+                    'from': widest,
+                    'to': node.storage_type,
+                    'range': node.value_range,
+                    'reason': reason,
+                })
+
+    def _analyze_assignment(self, node):
+        target, value = node.left, node.right
+        node.value_range = value.value_range
+        node.storage_type = value.storage_type
+        if target.storage_type is None or value.storage_type is None:
+            return
+        declared = target.value_range
+        fits = declared is not None and value.value_range is not None and \
+            declared[0] <= value.value_range[0] and value.value_range[1] <= declared[1]
+        if declared is not None and not fits:
+            self.promotions.append({
+                'node': None,
+                'operation': f"{target.value} :=",
+                'from': target.storage_type,
+                'to': max(target.storage_type, value.storage_type, key=STORAGE_ORDER.index),
+                'range': value.value_range,
+                'reason': f"el valor asignado excede el rango declarado {_format_range(declared)}",
+            })
+
+    def generate_markdown(self):
+        md = "## Análisis de Rangos (tipos de almacenamiento)\n\n"
+        md += "| # | Nodo | Tipo | Rango | Almacenamiento |\n"
+        md += "|:-:|:-----|:----:|:-----:|:--------------:|\n"
+        for index, node in enumerate(self.nodes):
+            md += (f"| {index} | `{node.value}` | {node.type} | {_format_range(node.value_range)} | "
+                   f"{node.storage_type} |\n")
+
+        if self.promotions:
+            md += "\n### Promociones requeridas\n\n"
+            md += "| # | Operación | De | A | Rango | Motivo |\n"
+            md += "|:-:|:----------|:--:|:-:|:-----:|:-------|\n"
+            for promotion in self.promotions:
+                index = '—' if promotion['node'] is None else promotion['node']
+                md += (f"| {index} | `{promotion['operation']}` | {promotion['from']} | {promotion['to']} | "
+                       f"{_format_range(promotion['range'])} | {promotion['reason']} |\n")
+        else:
+            md += "\nNo se requieren promociones.\n"
+        return md
@@ -0,0 +1,57 @@
+# compiler/report.py
+
+class LazySection:
+    """
+    Sección del reporte que solo se genera cuando se accede a su texto.
+    El resultado se guarda para no volver a generarlo.
+    """
+    def __init__(self, render):
+        self._render = render
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = self._render()
+            self._render = None  # Liberar referencias (por ejemplo, al AST)
+        return self._text
+
+    @property
+    def rendered(self):
+        return self._text is not None
+
+
+class Report:
+    """
+    Reporte Markdown formado por partes (texto fijo o secciones perezosas).
+    Se puede concatenar con '+' y '+=' igual que un string, pero las
+    secciones perezosas solo se generan al convertirlo a texto.
+    """
+    def __init__(self, *parts):
+        self.parts = []
+        for part in parts:
+            self += part
+
+    def __iadd__(self, other):
+        if isinstance(other, Report):
+            self.parts.extend(other.parts)
+        elif other:
+            self.parts.append(other)
+        return self
+
+    def __add__(self, other):
+        result = Report(*self.parts)
+        result += other
+        return result
+
+    def __radd__(self, other):
+        result = Report(other)
+        result += self
+        return result
+
+    def iter_text(self):
+        """Genera el texto parte por parte (para escribirlo sin concatenar todo)."""
+        for part in self.parts:
+            yield str(part)
+
+    def __str__(self):
+        return "".join(self.iter_text())
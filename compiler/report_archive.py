@@ -0,0 +1,125 @@
+# compiler/report_archive.py
+
+import hashlib
+import os
+import zlib
+
+def expression_hash(expression):
+    """Hash estable de una expresión (identifica su reporte en el archivo)."""
+    return hashlib.sha1(expression.encode('utf-8')).hexdigest()
+
+
+class ReportArchive:
+    """
+    Archivo de reportes de solo anexado.
+
+    Los reportes de un lote se escriben uno tras otro en un único archivo
+    '.pack' (opcionalmente comprimidos con zlib, cada uno por separado) y un
+    índice '.idx' guarda, por cada reporte, su ID de expresión, el hash de la
+    expresión y su posición en el pack. Al abrir el archivo el índice se carga
+    en diccionarios, así que recuperar un reporte es O(1): una búsqueda en el
+    diccionario, un seek y una lectura.
+
+    Formato del índice (una línea por reporte, separada por tabuladores):
+        id_expresion  hash  offset  longitud  comprimido(0/1)
+    """
+    def __init__(self, path="reports/reportes.pack", compress=False):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.compress = compress
+        self._by_id = {}    # id de expresión -> (offset, longitud, comprimido)
+        self._by_hash = {}  # hash de la expresión -> id de expresión
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._pack = open(path, 'a+b')
+        self._load_index()
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        pack_size = os.path.getsize(self.path)
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) != 5:
+                    continue  # Línea incompleta (escritura interrumpida)
+                expression_id, digest, offset, length, compressed = fields
+                offset, length = int(offset), int(length)
+                if offset + length > pack_size:
+                    continue  # El reporte no llegó a escribirse completo
+                self._by_id[expression_id] = (offset, length, compressed == '1')
+                self._by_hash[digest] = expression_id
+
+    def append(self, expression, report_text, expression_id=None):
+        """
+        Agrega un reporte al final del pack y devuelve su ID.
+        Si no se indica un ID, se usa el número de reporte dentro del archivo.
+        """
+        if expression_id is None:
+            expression_id = str(len(self._by_id))
+        expression_id = str(expression_id)
+        if '\t' in expression_id or '\n' in expression_id:
+            raise ValueError(f"ID de expresión inválido: {expression_id!r}")
+
+        data = report_text.encode('utf-8')
+        if self.compress:
+            data = zlib.compress(data)
+
+        self._pack.seek(0, os.SEEK_END)
+        offset = self._pack.tell()
+        self._pack.write(data)
+        self._pack.flush()
+
+        digest = expression_hash(expression)
+        self._index.write(f"{expression_id}\t{digest}\t{offset}\t{len(data)}\t{int(self.compress)}\n")
+        self._index.flush()
+
+        self._by_id[expression_id] = (offset, len(data), self.compress)
+        self._by_hash[digest] = expression_id
+        return expression_id
+
+    def get(self, expression_id):
+        """Devuelve el reporte con el ID de expresión dado."""
+        offset, length, compressed = self._by_id[str(expression_id)]
+        self._pack.seek(offset)
+        data = self._pack.read(length)
+        if compressed:
+            data = zlib.decompress(data)
+        return data.decode('utf-8')
+
+    def get_by_expression(self, expression):
+        """Devuelve el último reporte guardado para la expresión dada."""
+        return self.get_by_hash(expression_hash(expression))
+
+    def get_by_hash(self, digest):
+        return self.get(self._by_hash[digest])
+
+    def ids(self):
+        return list(self._by_id)
+
+    def __contains__(self, expression_id):
+        return str(expression_id) in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def flush(self):
+        """Fuerza la escritura a disco del pack y del índice."""
+        for f in (self._pack, self._index):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        if not self._pack.closed:
+            self.flush()
+            self._pack.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,146 @@
+# compiler/report_writer.py
+
+import os
+import queue
+import threading
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Escritor en segundo plano para reportes y artefactos.
+
+    Las escrituras se encolan en una cola acotada y un hilo las ejecuta por
+    lotes. Si el disco se atrasa y la cola se llena, submit() bloquea al hilo
+    de compilación hasta que haya espacio (contrapresión). flush() espera a
+    que se escriba todo lo encolado y lo sincroniza con el disco (fsync);
+    close() hace lo mismo y termina el hilo.
+
+    Si una escritura falla, las que siguen en la cola no se ejecutan: el error
+    se lanza en el siguiente submit()/flush() con la lista de las escrituras
+    descartadas (también en 'dropped').
+    """
+    def __init__(self, max_pending=64, batch_size=16):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._failed = None     # Descripción de la escritura que falló
+        self.dropped = []       # Escrituras descartadas después de un error
+        self._written = set()   # Archivos escritos desde el último flush()
+        self._archives = set()  # ReportArchive usados desde el último flush()
+        self._closed = False
+        self.jobs_done = 0
+        self.batches_done = 0
+        self._thread = threading.Thread(target=self._run, name='BackgroundWriter', daemon=True)
+        self._thread.start()
+
+    # --- API para el hilo de compilación ---
+    def submit(self, job, filename=None, description=None):
+        """
+        Encola una escritura (una función sin argumentos). Si la escritura crea
+        'filename', el archivo se sincroniza con el disco en el próximo flush().
+        'description' identifica la escritura en los errores (por omisión, el archivo).
+        """
+        if self._closed:
+            raise ValueError("El escritor ya está cerrado")
+        self._raise_pending_error()
+        if filename is not None:
+            def tracked(job=job):
+                job()
+                self._written.add(filename)
+            job = tracked
+        self._queue.put((job, description or filename or 'escritura sin nombre'))
+
+    def write_file(self, filename, content):
+        """
+        Escribe un archivo de texto. 'content' puede ser un string o un Report;
+        los diagramas perezosos del Report se generan en el hilo del escritor.
+        """
+        def job():
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(filename, 'w', encoding='utf-8') as f:
+                if isinstance(content, str):
+                    f.write(content)
+                else:
+                    f.writelines(content.iter_text())
+        self.submit(job, filename)
+
+    def append_report(self, archive, expression, content, expression_id=None):
+        """Agrega un reporte a un ReportArchive desde el hilo del escritor."""
+        def job():
+            archive.append(expression, str(content), expression_id)
+            self._archives.add(archive)
+        self.submit(job, description=f"reporte de '{expression}'")
+
+    def flush(self):
+        """Espera a que se escriba todo lo encolado y lo sincroniza con el disco."""
+        self._queue.put((self._sync, 'sincronización con el disco'))
+        self._queue.join()
+        self._raise_pending_error()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            error.add_note(f"Falló la escritura: {self._failed}")
+            if self.dropped:
+                error.add_note(f"Escrituras descartadas ({len(self.dropped)}): {', '.join(self.dropped)}")
+            self._failed, self.dropped = None, []
+            raise error
+
+    # --- Hilo del escritor ---
+    def _sync(self):
+        for filename in self._written:
+            with open(filename, 'rb') as f:
+                os.fsync(f.fileno())
+        for archive in self._archives:
+            archive.flush()
+        self._written.clear()
+        self._archives.clear()
+
+    def _run(self):
+        while True:
+            # Tomar un lote: el primer trabajo (bloqueante) y los que ya estén en cola
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                    self._queue.task_done()
+                    continue
+                job, description = item
+                if self._error is None:
+                    try:
+                        job()
+                        self.jobs_done += 1
+                    except Exception as e:  # Se informa en el siguiente submit()/flush()
+                        self._error = e
+                        self._failed = description
+                elif job != self._sync:
+                    self.dropped.append(description)
+                self._queue.task_done()
+            self.batches_done += 1
+            if stop:
+                return
@@ -0,0 +1,304 @@
+# compiler/scheduling.py
+
+import json
+import re
+from collections import deque
+from heapq import heapify, heappop, heappush
+
+# Reparto de lotes entre trabajadores según un modelo de costo.
+#
+# El tamaño de las expresiones de un lote varía en varios órdenes de magnitud:
+# repartir bloques de la misma cantidad de expresiones deja trabajadores
+# ociosos mientras otro compila unas pocas expresiones enormes. Aquí:
+#
+#   1. estimate_features() mide cada expresión sin compilarla (cantidad de
+#      tokens y profundidad de paréntesis, con una sola expresión regular).
+#   2. CostModel predice el costo de compilarla con un modelo lineal por fase,
+#      calibrado con los tiempos por fase de CompilationPipeline (timings).
+#   3. cost_chunks() arma bloques contiguos de costo parecido y
+#      WorkStealingQueues los reparte con LPT (el más costoso primero, al
+#      trabajador menos cargado); un trabajador que vacía su cola roba el
+#      bloque más chico de la cola con más trabajo pendiente.
+#   4. LoadReport resume qué tan parejo quedó el reparto.
+
+_TOKEN = re.compile(r"""'[^']*'?|"[^"]*"?|:=|<=|>=|<>|[A-Za-z_]\w*|\d+(?:\.\d+)?|[^\s\w]""")
+
+# Coeficientes de un modelo sin calibrar: el costo es la cantidad de tokens
+DEFAULT_COEFFICIENTS = {'total': (0.0, 1.0, 0.0)}
+
+# Regularización de los mínimos cuadrados (evita sistemas singulares cuando
+# las muestras tienen todas la misma profundidad, por ejemplo)
+RIDGE = 1e-9
+
+
+def estimate_features(expression):
+    """
+    (tokens, profundidad) de una expresión, sin parsearla: la cantidad de
+    tokens aproximada y el máximo anidamiento de paréntesis.
+    """
+    tokens = depth = deepest = 0
+    for match in _TOKEN.finditer(expression):
+        tokens += 1
+        text = match.group()
+        if text == '(':
+            depth += 1
+            deepest = max(deepest, depth)
+        elif text == ')':
+            depth = max(depth - 1, 0)
+    return tokens, deepest
+
+
+def _solve(matrix, vector):
+    """Resuelve un sistema lineal chico por eliminación de Gauss con pivoteo."""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        if abs(rows[column][column]) < 1e-300:
+            raise ValueError("No se puede calibrar el modelo de costo: muestras insuficientes")
+        for row in range(column + 1, size):
+            factor = rows[row][column] / rows[column][column]
+            for k in range(column, size + 1):
+                rows[row][k] -= factor * rows[column][k]
+    solution = [0.0] * size
+    for row in reversed(range(size)):
+        solution[row] = (rows[row][size] - sum(rows[row][k] * solution[k] for k in range(row + 1, size))) \
+            / rows[row][row]
+    return solution
+
+
+def _features(tokens, depth):
+    return (1.0, float(tokens), float(depth))
+
+
+class CostModel:
+    """
+    Predice el costo (en segundos, si está calibrado) de compilar una
+    expresión a partir de sus tokens y su profundidad. Cada fase tiene su
+    propio modelo lineal costo = a + b * tokens + c * profundidad; el costo
+    de la expresión es la suma de las fases.
+    """
+    def __init__(self, coefficients=None):
+        self.coefficients = dict(coefficients or DEFAULT_COEFFICIENTS)
+        self.samples = 0  # Expresiones usadas para calibrar
+
+    @property
+    def calibrated(self):
+        return self.samples > 0
+
+    def phase_costs(self, expression):
+        """Costo estimado de cada fase (nunca negativo)."""
+        features = _features(*estimate_features(expression))
+        return {phase: max(0.0, sum(c * f for c, f in zip(coefficients, features)))
+                for phase, coefficients in self.coefficients.items()}
+
+    def predict(self, expression):
+        return sum(self.phase_costs(expression).values())
+
+    def fit(self, samples):
+        """
+        Ajusta el modelo con mínimos cuadrados. 'samples' son pares
+        (expresión, {fase: segundos}), como los 'timings' de CompilationPipeline.
+        """
+        samples = list(samples)
+        if not samples:
+            raise ValueError("No se puede calibrar el modelo de costo sin muestras")
+        rows = [_features(*estimate_features(expression)) for expression, _ in samples]
+        phases = []
+        for _, timings in samples:
+            phases.extend(phase for phase in timings if phase not in phases)
+        normal = [[sum(row[i] * row[j] for row in rows) + (RIDGE if i == j else 0.0) for j in range(3)]
+                  for i in range(3)]
+        self.coefficients = {}
+        for phase in phases:
+            target = [sum(row[i] * timings.get(phase, 0.0) for row, (_, timings) in zip(rows, samples))
+                      for i in range(3)]
+            self.coefficients[phase] = tuple(_solve(normal, target))
+        self.samples = len(samples)
+        return self
+
+    def calibrate(self, expressions, symbol_table=None, warmup=1):
+        """
+        Compila 'expressions' con CompilationPipeline (sin imprimir) y ajusta el
+        modelo con los tiempos medidos de cada fase. Las primeras 'warmup'
+        compilaciones no se usan (cargan módulos y tablas).
+        """
+        from .pipeline import CompilationPipeline
+
+        samples = []
+        for position, expression in enumerate(expressions):
+            pipeline = CompilationPipeline(expression, symbol_table, verbose=False)
+            try:
+                pipeline.run()
+            except ValueError:
+                continue  # Una expresión con errores no representa una compilación completa
+            if position >= warmup:
+                samples.append((expression, pipeline.timings))
+        return self.fit(samples)
+
+    def to_json(self):
+        return json.dumps({'samples': self.samples, 'coefficients': self.coefficients}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        model = cls({phase: tuple(values) for phase, values in data['coefficients'].items()})
+        model.samples = data.get('samples', 0)
+        return model
+
+    def generate_markdown(self):
+        md = "### Modelo de Costo\n\n"
+        md += f"Calibrado con **{self.samples}** compilaciones.\n\n" if self.calibrated else "Sin calibrar.\n\n"
+        md += "| Fase | Fijo | Por token | Por nivel de anidamiento |\n"
+        md += "|:-----|-----:|----------:|-------------------------:|\n"
+        for phase, (fixed, per_token, per_level) in self.coefficients.items():
+            md += f"| {phase} | {fixed:.3g} | {per_token:.3g} | {per_level:.3g} |\n"
+        return md
+
+
+def cost_chunks(costs, max_size, target_cost=None):
+    """
+    Divide los índices 0 .. n - 1 en bloques contiguos de a lo sumo 'max_size'
+    expresiones y, si se indica, de costo cercano a 'target_cost': una
+    expresión enorme queda sola en su bloque. Devuelve [(inicio, fin)].
+    """
+    chunks = []
+    start = 0
+    cost = 0.0
+    for index, item_cost in enumerate(costs):
+        if index > start and (index - start >= max_size or
+                              (target_cost is not None and cost + item_cost > target_cost)):
+            chunks.append((start, index))
+            start, cost = index, 0.0
+        cost += item_cost
+    if start < len(costs):
+        chunks.append((start, len(costs)))
+    return chunks
+
+
+def lpt_assignment(costs, workers):
+    """
+    Longest processing time first: las tareas, de la más costosa a la más
+    barata, van al trabajador con menos carga. Devuelve una lista de tareas
+    (índices, en orden de ejecución) por trabajador.
+    """
+    if workers < 1:
+        raise ValueError(f"Cantidad de trabajadores inválida: {workers}")
+    loads = [(0.0, worker) for worker in range(workers)]
+    heapify(loads)
+    queues = [[] for _ in range(workers)]
+    for task in sorted(range(len(costs)), key=lambda task: (-costs[task], task)):
+        load, worker = heappop(loads)
+        queues[worker].append(task)
+        heappush(loads, (load + costs[task], worker))
+    return queues
+
+
+class WorkStealingQueues:
+    """
+    Colas por trabajador armadas con LPT. take(worker) devuelve la siguiente
+    tarea de su cola (la más costosa primero); si está vacía, roba la tarea
+    más barata de la cola con más costo pendiente. Las tareas devueltas con
+    retry() (por ejemplo, de un trabajador caído) se entregan antes que el resto.
+
+    No es thread-safe: quien la comparte entre hilos la protege con su lock.
+    """
+    def __init__(self, costs, workers):
+        self.costs = list(costs)
+        self.queues = [deque(queue) for queue in lpt_assignment(self.costs, workers)]
+        self.pending_cost = [sum(self.costs[task] for task in queue) for queue in self.queues]
+        self.retries = deque()
+        self.steals = 0
+
+    def __len__(self):
+        return len(self.retries) + sum(len(queue) for queue in self.queues)
+
+    def take(self, worker):
+        """Devuelve (tarea, robada) o None si no queda trabajo."""
+        if self.retries:
+            return self.retries.popleft(), False
+        own = worker if 0 <= worker < len(self.queues) else None
+        if own is not None and self.queues[own]:
+            task = self.queues[own].popleft()
+            self.pending_cost[own] -= self.costs[task]
+            return task, False
+        candidates = [victim for victim in range(len(self.queues)) if self.queues[victim]]
+        if not candidates:
+            return None
+        victim = max(candidates, key=lambda victim: self.pending_cost[victim])
+        task = self.queues[victim].pop()
+        self.pending_cost[victim] -= self.costs[task]
+        self.steals += 1
+        return task, True
+
+    def retry(self, task):
+        self.retries.append(task)
+
+
+class LoadReport:
+    """
+    Carga de cada trabajador en una ejecución: tareas, costo estimado y
+    segundos medidos. 'balance' es carga media / carga máxima (1.0 es un
+    reparto perfecto); 'imbalance' es su inversa.
+    """
+    def __init__(self, workers=0):
+        self.tasks = [0] * workers
+        self.predicted = [0.0] * workers
+        self.seconds = [0.0] * workers
+        self.steals = 0
+
+    def _grow(self, worker):
+        while len(self.tasks) <= worker:
+            self.tasks.append(0)
+            self.predicted.append(0.0)
+            self.seconds.append(0.0)
+
+    def record(self, worker, predicted, seconds, stolen=False):
+        self._grow(worker)
+        self.tasks[worker] += 1
+        self.predicted[worker] += predicted
+        self.seconds[worker] += seconds
+        self.steals += bool(stolen)
+
+    @staticmethod
+    def _ratio(loads):
+        if not loads or max(loads) <= 0:
+            return 1.0
+        return sum(loads) / len(loads) / max(loads)
+
+    @property
+    def makespan(self):
+        return max(self.seconds, default=0.0)
+
+    @property
+    def balance(self):
+        """Carga media / carga máxima (segundos medidos)."""
+        return self._ratio(self.seconds)
+
+    @property
+    def predicted_balance(self):
+        return self._ratio(self.predicted)
+
+    @property
+    def imbalance(self):
+        balance = self.balance
+        return 1 / balance if balance else float('inf')
+
+    def summary_lines(self):
+        lines = [f"Balance de carga: {self.balance:.1%} (estimado {self.predicted_balance:.1%}), "
+                 f"{self.steals} robos, tiempo máximo {self.makespan:.3f} s"]
+        for worker, (tasks, seconds) in enumerate(zip(self.tasks, self.seconds)):
+            lines.append(f"  trabajador {worker}: {tasks} bloques, {seconds:.3f} s")
+        return lines
+
+    def generate_markdown(self):
+        md = "### Balance de Carga\n\n"
+        md += f"- Balance (carga media / máxima): **{self.balance:.1%}** (estimado: {self.predicted_balance:.1%})\n"
+        md += f"- Desbalance (máxima / media): **{self.imbalance:.2f}**\n"
+        md += f"- Bloques robados: **{self.steals}**\n\n"
+        md += "| Trabajador | Bloques | Costo estimado | Segundos |\n"
+        md += "|:----------:|:-------:|---------------:|---------:|\n"
+        for worker in range(len(self.tasks)):
+            md += f"| {worker} | {self.tasks[worker]} | {self.predicted[worker]:.4g} | {self.seconds[worker]:.3f} |\n"
+        return md
@@ -2,33 +2,69 @@
 
 from .syntax_analizer import Node
 from .symbol_tables import VariableSymbolTable, TypeSystem
+from .diagrams import DIAGRAM_FORMATS, ast_children, iter_mermaid, iter_dot, iter_json, render_block
+from .report import LazySection, Report
+from .passes import ASTPass, PassManager
+from .tokens import describe_span
+from .diagnostics import ERROR_OPERAND
 
 class SemanticAnalyzer:
-    def __init__(self, ast_root: Node, symbol_table: VariableSymbolTable):
+    def __init__(self, ast_root: Node, symbol_table: VariableSymbolTable,
+                 diagram_limits=None, diagram_format='mermaid', tables_ref=None, constant_pool=None,
+                 diagnostics=None):
         self.ast_root = ast_root
+        # Colector compartido (opcional): los errores de tipos se informan con código y posición
+        self.diagnostics = diagnostics
         self.symbol_table = symbol_table
+        self.constant_pool = constant_pool
         self.errors = []
+        self.type_count = {}
+        if diagram_format not in DIAGRAM_FORMATS:
+            raise ValueError(f"Formato de diagrama no soportado: '{diagram_format}'")
+        self.diagram_limits = diagram_limits
+        self.diagram_format = diagram_format
+        # Ruta del documento compartido de tablas del lenguaje (reportes por lote)
+        self.tables_ref = tables_ref
 
     def analyze(self):
         """
         Ejecuta el análisis de tipos y devuelve el AST anotado y un reporte.
         """
-        self.errors = []
-        self._annotate_tree(self.ast_root)
-        report = self._generate_markdown()
+        PassManager(self.passes()).run(self.ast_root)
+        report = self.build_report()
         return self.ast_root, report
 
-    def _annotate_tree(self, node: Node):
+    def passes(self):
         """
-        Recorre el árbol (post-orden) para asignar y verificar tipos.
+        Fases de este analizador para el PassManager: anotación de tipos y
+        conteo de tipos, ambas en post-orden (se fusionan en un solo recorrido).
         """
-        if not node:
-            return
+        self.errors = []
+        self.type_count = {}
+        return [
+            ASTPass('tipos', leave=self._annotate_node),
+            ASTPass('conteo_tipos', leave=self._count_type, after=('tipos',)),
+        ]
+
+    def build_report(self):
+        """Genera el reporte a partir del AST ya anotado por passes()."""
+        return self._generate_markdown()
 
+    def _annotate_node(self, node: Node):
+        """
+        Asigna y verifica el tipo de un nodo. Se llama en post-orden,
+        así que los hijos ya están anotados.
+        """
         # Si es una hoja (operando)
         if not node.left and not node.right:
+            # Los literales registrados en la tabla de constantes ya tienen su tipo
+            constant_index = self.constant_pool.find(node.value) if self.constant_pool else None
+            if constant_index is not None:
+                node.type = self.constant_pool.get(constant_index)['type']
+                node.addressing_mode = 'immediate'
+                node.const_index = constant_index
             # Detección de tipos (código existente)
-            if node.value.isdigit():
+            elif node.value.isdigit():
                 node.type = 'integer'
                 node.addressing_mode = 'immediate'
             elif (node.value.replace('.', '').replace('-', '').isdigit() and 
@@ -36,6 +72,11 @@ class SemanticAnalyzer:
                   (node.value[0] == '-' or node.value[0].isdigit())):
                 node.type = 'real'
                 node.addressing_mode = 'immediate'
+            elif node.value == ERROR_OPERAND:
+                # Operando insertado por la recuperación del análisis sintáctico (ya informado)
+                node.type = 'ERROR: Falta un operando'
+                node.addressing_mode = 'error'
+                self.errors.append(node.type)
             elif node.value in ['true', 'false']:
                 node.type = 'boolean'
                 node.addressing_mode = 'immediate'
@@ -53,32 +94,25 @@ class SemanticAnalyzer:
                     node.addressing_mode = symbol.mode
                     node.memory_address = symbol.address
                 else:
-                    node.type = f'ERROR: Variable \'{node.value}\' no declarada'
+                    self._error(node, 'T001', f'ERROR: Variable \'{node.value}\' no declarada')
                     node.addressing_mode = 'error'
-                    self.errors.append(node.type)
             return
 
-        # Recorrer recursivamente los hijos primero
-        self._annotate_tree(node.left)
-        if node.right:  # Solo si existe hijo derecho (operadores binarios)
-            self._annotate_tree(node.right)
-
         # --- Verificación de tipos usando el sistema de tipos ---
         op = node.value
         
         # Manejar operador unario 'not'
         if op == 'not':
             if not node.left:
-                node.type = 'ERROR: Operador unario "not" requiere un operando'
-                self.errors.append(node.type)
+                self._error(node, 'T002', 'ERROR: Operador unario "not" requiere un operando')
                 return
                 
             operand_type = node.left.type
             if operand_type == 'boolean':
                 node.type = 'boolean'
             else:
-                node.type = f'ERROR: Operador "not" no puede aplicarse a {operand_type}'
-                self.errors.append(node.type)
+                self._error(node, 'T003', f'ERROR: Operador "not" no puede aplicarse a {operand_type}',
+                            caused_by=(operand_type,))
             
             node.addressing_mode = 'register'
             return
@@ -93,8 +127,8 @@ class SemanticAnalyzer:
         if result_type:
             node.type = result_type
         else:
-            node.type = f'ERROR: Operación \'{op}\' no permitida entre {left_type} y {right_type}'
-            self.errors.append(node.type)
+            self._error(node, 'T004', f'ERROR: Operación \'{op}\' no permitida entre {left_type} y {right_type}',
+                        caused_by=(left_type, right_type))
 
         # --- Determinación de modo de direccionamiento ---
         if node.value in ['+', '-', '*', '/', '=', '<>', '<', '>', '<=', '>=', 'and', 'or']:
@@ -102,15 +136,76 @@ class SemanticAnalyzer:
         elif node.value == ':=':
             # Verificar compatibilidad de asignación
             if not TypeSystem.can_convert(right_type, left_type) and not 'ERROR' in left_type and not 'ERROR' in right_type:
-                node.type = f'ERROR: No se puede asignar {right_type} a {left_type}'
-                self.errors.append(node.type)
+                self._error(node, 'T005', f'ERROR: No se puede asignar {right_type} a {left_type}')
             node.addressing_mode = 'direct'
         elif not hasattr(node, 'addressing_mode'):
             node.addressing_mode = 'direct'
 
-    # ... (el resto del código se mantiene igual)
+    def _error(self, node: Node, code, message, caused_by=()):
+        """
+        Marca el nodo con el error (y la columna del token que lo originó) y lo
+        registra. Al colector solo van los errores de origen: si un operando ya
+        tenía error ('caused_by'), este es una consecuencia y no se informa.
+        """
+        span = getattr(node, 'span', None)
+        node.type = message + describe_span(span)
+        self.errors.append(node.type)
+        if self.diagnostics is not None and not any('ERROR' in str(t) for t in caused_by):
+            self.diagnostics.error(code, message.replace('ERROR: ', '', 1), span, 'semántica')
+
+    def _count_type(self, node: Node):
+        if getattr(node, 'type', None) and "ERROR" not in node.type:
+            self.type_count[node.type] = self.type_count.get(node.type, 0) + 1
+
+    def iter_diagram(self, diagram_format=None):
+        """Genera el diagrama del AST anotado línea por línea en el formato indicado."""
+        diagram_format = diagram_format or self.diagram_format
+
+        def node_type(node):
+            return getattr(node, 'type', None) or "indefinido"
+
+        if diagram_format == 'dot':
+            return iter_dot(self.ast_root, ast_children,
+                            lambda node: f"{node.value}\n{node_type(node)}", self.diagram_limits,
+                            name='AST_anotado')
+        if diagram_format == 'json':
+            def fields(node):
+                return {
+                    'value': node.value,
+                    'type': node_type(node),
+                    'addressing_mode': getattr(node, 'addressing_mode', None),
+                    'memory_address': getattr(node, 'memory_address', None),
+                }
+            return iter_json(self.ast_root, ast_children, fields, self.diagram_limits)
+
+        def node_line(node):
+            # Determinar clase CSS basada en tipo y modo
+            if "ERROR" in node_type(node):
+                style_class = "error"
+            elif getattr(node, 'addressing_mode', '') == 'immediate':
+                style_class = "immediate"
+            else:
+                style_class = "default"
+
+            addressing_info = f"<br/>Modo: {getattr(node, 'addressing_mode', 'N/A')}"
+            if hasattr(node, 'memory_address'):
+                addressing_info += f"<br/>Addr: {node.memory_address}"
+
+            label = f'["<b>{node.value}</b><br/><i>{node_type(node)}</i>{addressing_info}"]'
+            return f"{node.id}{label}:::{style_class}"
+
+        header = (
+            "classDef error fill:#ffdddd,stroke:#d44,stroke-width:2px;",
+            "classDef default fill:#ddffdd,stroke:#4d4,stroke-width:2px;",
+            "classDef immediate fill:#ddddff,stroke:#44d,stroke-width:2px;",
+        )
+        return iter_mermaid(self.ast_root, ast_children, node_line, self.diagram_limits, header=header)
+
     def _generate_markdown(self):
-        """Genera el reporte Markdown con el árbol semántico anotado."""
+        """
+        Genera el reporte Markdown con el árbol semántico anotado.
+        El diagrama es perezoso: solo se genera al acceder al texto del reporte.
+        """
         md = "## 1.3. Análisis Semántico\n\n"
         
         if self.errors:
@@ -120,59 +215,16 @@ class SemanticAnalyzer:
             md += "\n"
         
         md += "Se verifica la compatibilidad de tipos recorriendo el AST. Cada nodo se anota con su tipo inferido o con un error.\n\n"
-        md += "```mermaid\n"
-        md += "graph TD\n"
-        md += "    classDef error fill:#ffdddd,stroke:#d44,stroke-width:2px;\n"
-        md += "    classDef default fill:#ddffdd,stroke:#4d4,stroke-width:2px;\n"
-        md += "    classDef immediate fill:#ddddff,stroke:#44d,stroke-width:2px;\n"
-        
-        def traverse(node):
-            lines = []
-            node_type = node.type if node.type else "indefinido"
-            
-            # Determinar clase CSS basada en tipo y modo
-            if "ERROR" in node_type:
-                style_class = "error"
-            elif getattr(node, 'addressing_mode', '') == 'immediate':
-                style_class = "immediate"
-            else:
-                style_class = "default"
-                
-            addressing_info = f"<br/>Modo: {getattr(node, 'addressing_mode', 'N/A')}"
-            if hasattr(node, 'memory_address'):
-                addressing_info += f"<br/>Addr: {node.memory_address}"
-                
-            label = f'["<b>{node.value}</b><br/><i>{node_type}</i>{addressing_info}"]'
-            lines.append(f"    {node.id}{label}:::{style_class}")
-
-            if node.left:
-                lines.extend(traverse(node.left))
-                lines.append(f"    {node.id} --> {node.left.id}")
-            if node.right:
-                lines.extend(traverse(node.right))
-                lines.append(f"    {node.id} --> {node.right.id}")
-            return lines
-
-        mermaid_lines = traverse(self.ast_root)
-        md += "\n".join(mermaid_lines)
-        md += "\n```\n"
-
-        md += "\n" + TypeSystem.get_operator_tables_markdown(['+', '*']) + "\n"
+        diagram = LazySection(lambda: render_block(self.iter_diagram(), self.diagram_format))
+
+        if self.tables_ref:
+            summary = f"\nTablas de operadores: ver [Tablas del Lenguaje]({self.tables_ref}).\n"
+        else:
+            summary = "\n" + TypeSystem.get_operator_tables_markdown(['+', '*']) + "\n"
         
         # Agregar resumen de tipos
-        md += "\n### Resumen de Tipos en la Expresión\n\n"
-        type_count = {}
-        def count_types(node):
-            if hasattr(node, 'type') and node.type:
-                if "ERROR" not in node.type:
-                    type_count[node.type] = type_count.get(node.type, 0) + 1
-            if node.left:
-                count_types(node.left)
-            if node.right:
-                count_types(node.right)
-        
-        count_types(self.ast_root)
-        for type_name, count in type_count.items():
-            md += f"- **{type_name}**: {count} ocurrencias\n"
+        summary += "\n### Resumen de Tipos en la Expresión\n\n"
+        for type_name, count in self.type_count.items():
+            summary += f"- **{type_name}**: {count} ocurrencias\n"
         
-        return md
\ No newline at end of file
+        return Report(md, diagram, summary)
\ No newline at end of file
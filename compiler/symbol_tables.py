@@ -1,9 +1,12 @@
 # compiler/symbol_tables.py
 
+import re
+from collections import ChainMap
+
 # Tablas Fijas
 RESERVED_WORDS = {
     'var': 1, 'proc': 2, 'begin': 3, 'end': 4, 
-    'integer': 5, 'char': 6, 'real': 7
+    'integer': 5, 'char': 6, 'real': 7, 'string': 8, 'boolean': 9
 }
 
 OPERATORS = {
@@ -14,30 +17,275 @@ OPERATORS = {
 }
 
 DELIMITERS = {
-    ':': 201, ';': 202, '(': 203, ')': 204
+    ':': 201, ';': 202, '(': 203, ')': 204, ',': 205
 }
 
 
+class ConstantPool:
+    """
+    Tabla de constantes (literales enteros, reales, caracteres y cadenas).
+    Cada literal distinto se guarda una sola vez, con su valor ya convertido,
+    y se referencia por su índice en la tabla.
+    """
+    def __init__(self):
+        self.constants = []  # Lista de {'lexeme', 'type', 'value'}
+        self._index = {}     # lexema -> índice
+
+    @staticmethod
+    def literal_type(lexeme):
+        """Devuelve el tipo del literal, o None si el lexema no es un literal."""
+        if lexeme.isdigit():
+            return 'integer'
+        if re.fullmatch(r'\d+\.\d+', lexeme):
+            return 'real'
+        if len(lexeme) >= 2 and lexeme[0] == lexeme[-1] and lexeme[0] in ('"', "'"):
+            # 'a' es un carácter; cualquier otro texto entre comillas es una cadena
+            return 'char' if lexeme[0] == "'" and len(lexeme) == 3 else 'string'
+        return None
+
+    @staticmethod
+    def _parse_value(lexeme, constant_type):
+        if constant_type == 'integer':
+            return int(lexeme)
+        if constant_type == 'real':
+            return float(lexeme)
+        return lexeme[1:-1]  # Quitar las comillas
+
+    def add_constant(self, lexeme):
+        """Agrega el literal (si no existe) y devuelve su índice."""
+        index = self._index.get(lexeme)
+        if index is None:
+            constant_type = self.literal_type(lexeme)
+            if constant_type is None:
+                raise ValueError(f"'{lexeme}' no es un literal válido")
+            index = len(self.constants)
+            self.constants.append({
+                'lexeme': lexeme,
+                'type': constant_type,
+                'value': self._parse_value(lexeme, constant_type),
+            })
+            self._index[lexeme] = index
+        return index
+
+    def add_value(self, value):
+        """
+        Agrega un valor ya calculado (por ejemplo, al plegar constantes)
+        y devuelve su índice.
+        """
+        if isinstance(value, bool):
+            lexeme, constant_type = ('true' if value else 'false'), 'boolean'
+        elif isinstance(value, int):
+            lexeme, constant_type = str(value), 'integer'
+        elif isinstance(value, float):
+            lexeme, constant_type = repr(value), 'real'
+        elif isinstance(value, str):
+            lexeme, constant_type = f'"{value}"', 'string'
+        else:
+            raise ValueError(f"Valor no soportado en la tabla de constantes: {value!r}")
+        index = self._index.get(lexeme)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append({'lexeme': lexeme, 'type': constant_type, 'value': value})
+            self._index[lexeme] = index
+        return index
+
+    def find(self, lexeme):
+        """Devuelve el índice del literal o None si no está en la tabla."""
+        return self._index.get(lexeme)
+
+    def get(self, index):
+        return self.constants[index]
+
+    def __len__(self):
+        return len(self.constants)
+
+    def generate_markdown_report(self):
+        md = "| Índice | Lexema | Tipo | Valor |\n"
+        md += "|:------:|:------:|:----:|:-----:|\n"
+        for index, constant in enumerate(self.constants):
+            md += f"| #{index} | `{constant['lexeme']}` | {constant['type']} | {constant['value']!r} |\n"
+        return md
+
+
+def _check_range(name, value_range):
+    """Valida un rango declarado (mínimo, máximo) y lo devuelve como tupla."""
+    if value_range is None:
+        return None
+    low, high = value_range
+    if low > high:
+        raise ValueError(f"Rango inválido para '{name}': {low} > {high}")
+    return (low, high)
+
+
 class VariableSymbolTable:
     def __init__(self):
         self.symbols = {}
         self.address_counter = 0x1000  # Dirección base en RAM
         self.scope_stack = [0]  # Scope global inicial
+        # nombre -> pila de IDs (el último es el del scope más interno), búsqueda en O(1)
+        self._names = {}
+        # Un marco por scope abierto: (scope, dirección al entrar, IDs declarados en él)
+        self._frames = []
+        self._next_scope = 1
+        self.frozen = False
         
-    def add_symbol(self, name, symbol_type, value=None, scope=None):
+    def add_symbol(self, name, symbol_type, value=None, scope=None, value_range=None, column=None):
+        """
+        Agrega un símbolo. 'value_range' es un rango declarado opcional
+        (mínimo, máximo) para variables numéricas; lo usa el análisis de rangos.
+        'column' es la columna de los archivos de entrada/salida de la
+        evaluación por columnas (por omisión, el nombre de la variable).
+        Los símbolos se declaran en el scope más interno: exit_scope() libera
+        las direcciones como una pila, así que declarar en un scope externo
+        mientras hay uno interno abierto dejaría direcciones en uso liberadas.
+        """
+        if self.frozen:
+            raise ValueError(f"La tabla de símbolos está congelada: no se puede agregar '{name}' (use overlay())")
         if scope is None:
             scope = self.scope_stack[-1]
+        elif scope != self.scope_stack[-1]:
+            raise ValueError(f"No se puede declarar '{name}' en el scope {scope}: "
+                             f"el scope abierto es {self.scope_stack[-1]}")
         symbol_id = self._generate_hash(name, scope)
+        # Colisión con otro símbolo: probar el siguiente ID libre
+        while symbol_id in self.symbols and (self.symbols[symbol_id]['name'], self.symbols[symbol_id]['scope']) != (name, scope):
+            symbol_id += 1000
+        # Una redeclaración en el mismo scope reemplaza al símbolo (ya está en
+        # su marco) y conserva su dirección
+        is_new = symbol_id not in self.symbols
+        address = self.symbols[symbol_id]['address'] if not is_new else f"{self.address_counter:04X}"
+        value_range = _check_range(name, value_range)
         self.symbols[symbol_id] = {
             'name': name,
             'type': symbol_type,
             'value': value,
             'scope': scope,
-            'address': f"{self.address_counter:04X}",
-            'mode': 'direct'  # Modo de direccionamiento
+            'address': address,
+            'mode': 'direct',  # Modo de direccionamiento
+            'range': value_range,
+            'column': column
         }
-        self.address_counter += 4  # Incremento para siguiente símbolo
+        self._push_name(name, symbol_id)
+        if is_new:
+            if self._frames:
+                self._frames[-1][2].append(symbol_id)
+            self.address_counter += 4  # Incremento para siguiente símbolo
         return symbol_id
+
+    def add_symbols(self, declarations):
+        """
+        Carga masiva: agrega en una pasada los símbolos de 'declarations'
+        (diccionarios con 'name', 'type' y opcionalmente 'range' y 'column',
+        como los de compiler.declarations) en el scope actual, con
+        direcciones consecutivas. Devuelve la cantidad de símbolos agregados.
+
+        Los IDs son los mismos que daría add_symbol() uno por uno, pero cada
+        cubeta del hash recuerda su siguiente ID libre: con cientos de miles
+        de símbolos no se vuelve a recorrer la cadena de colisiones entera.
+        Un nombre repetido dentro de 'declarations' es un error.
+        """
+        if self.frozen:
+            raise ValueError("La tabla de símbolos está congelada: no se pueden agregar símbolos (use overlay())")
+        scope = self.scope_stack[-1]
+        symbols = self.symbols
+        names = self._names
+        frame = self._frames[-1][2] if self._frames else None
+        address = self.address_counter
+        generate_hash = self._generate_hash
+        cursors = {}   # ID base de la cubeta -> siguiente ID a probar
+        declared = set()
+        for declaration in declarations:
+            name = declaration['name']
+            if name in declared:
+                raise ValueError(f"La variable '{name}' está declarada dos veces")
+            declared.add(name)
+            shadow = names.get(name)
+            if shadow is not None and symbols[shadow[-1]]['scope'] == scope:
+                symbol_id = shadow[-1]  # Redeclaración de un símbolo que ya estaba: se reemplaza
+                is_new = False          # (ya está en el marco del scope y conserva su dirección)
+                symbol_address = symbols[symbol_id]['address']
+            else:
+                is_new = True
+                symbol_address = f"{address:04X}"
+                base = generate_hash(name, scope)
+                symbol_id = cursors.get(base, base)
+                while symbol_id in symbols:
+                    symbol_id += 1000
+                cursors[base] = symbol_id + 1000
+            value_range = declaration.get('range')
+            symbols[symbol_id] = {
+                'name': name,
+                'type': declaration['type'],
+                'value': declaration.get('value'),
+                'scope': scope,
+                'address': symbol_address,
+                'mode': 'direct',
+                'range': _check_range(name, value_range) if value_range is not None else None,
+                'column': declaration.get('column')
+            }
+            if shadow is None:
+                names[name] = [symbol_id]  # Nombre nuevo (caso habitual): sin pasar por _push_name
+            else:
+                self._push_name(name, symbol_id)
+            if is_new:
+                if frame is not None:
+                    frame.append(symbol_id)
+                address += 4
+        self.address_counter = address
+        return len(declared)
+
+    def _push_name(self, name, symbol_id):
+        shadow = self._names.get(name)
+        if shadow is None:
+            self._names[name] = [symbol_id]
+        elif shadow[-1] != symbol_id:  # Redeclaración en el mismo scope: ya está arriba
+            shadow.append(symbol_id)
+
+    def enter_scope(self):
+        """
+        Abre un scope anidado (por ejemplo, el cuerpo begin/end de un proc).
+        Los símbolos declarados a partir de aquí ocultan a los de scopes externos.
+        """
+        if self.frozen:
+            raise ValueError("La tabla de símbolos está congelada (use overlay())")
+        scope = self._next_scope
+        self._next_scope += 1
+        self.scope_stack.append(scope)
+        self._frames.append((scope, self.address_counter, []))
+        return scope
+
+    def exit_scope(self):
+        """
+        Cierra el scope actual en O(k), con k = símbolos declarados en él:
+        se quitan sus símbolos y se liberan sus direcciones (asignación tipo pila).
+        """
+        if not self._frames:
+            raise ValueError("No hay un scope abierto para cerrar (el scope global no se puede cerrar)")
+        scope, saved_address, declared = self._frames.pop()
+        for symbol_id in reversed(declared):
+            info = self.symbols.pop(symbol_id)
+            self._pop_name(info['name'])
+        self.scope_stack.pop()
+        self.address_counter = saved_address
+        return scope
+
+    def _pop_name(self, name):
+        shadow = self._names[name]
+        shadow.pop()
+        if not shadow:
+            del self._names[name]
+
+    def freeze(self):
+        """
+        Marca la tabla como inmutable para usarla como base compartida de
+        varias compilaciones (cada una trabaja sobre su propio overlay()).
+        """
+        self.frozen = True
+        return self
+
+    def overlay(self):
+        """Crea una capa copy-on-write sobre esta tabla (ver SymbolTableOverlay)."""
+        return SymbolTableOverlay(self)
     
     def _generate_hash(self, name, scope):
         # Función hash simple para generar IDs únicos considerando el scope
@@ -58,30 +306,97 @@ class VariableSymbolTable:
         
         return md
     
+    def find_symbol_id(self, name):
+        """
+        Devuelve el ID del símbolo con ese nombre en el scope más interno
+        donde esté declarado, o None si no existe.
+        """
+        shadow = self._names.get(name)
+        return shadow[-1] if shadow else None
+
     def find_symbol_by_name(self, name):
         """
         Busca un símbolo por nombre en la tabla.
         Retorna la información del símbolo o None si no existe.
         """
-        for symbol_id, symbol_info in self.symbols.items():
-            if symbol_info['name'] == name:
-                # Crear un objeto simple con los atributos necesarios
-                class Symbol:
-                    pass
-                symbol = Symbol()
-                symbol.type = symbol_info['type']
-                symbol.mode = symbol_info['mode']
-                symbol.address = symbol_info['address']
-                return symbol
-        return None
+        symbol_id = self.find_symbol_id(name)
+        if symbol_id is None:
+            return None
+        symbol_info = self.symbols[symbol_id]
+        # Crear un objeto simple con los atributos necesarios
+        class Symbol:
+            pass
+        symbol = Symbol()
+        symbol.type = symbol_info['type']
+        symbol.mode = symbol_info['mode']
+        symbol.address = symbol_info['address']
+        symbol.value_range = symbol_info.get('range')
+        symbol.column = symbol_info.get('column') or symbol_info['name']
+        return symbol
 
-class TypeSystem:
+
+class SymbolTableOverlay(VariableSymbolTable):
     """
-    Sistema de tipos para verificar compatibilidad y determinar tipos resultantes.
+    Capa copy-on-write sobre una tabla de símbolos base congelada.
+
+    Las búsquedas consultan primero la capa y después la base; los símbolos
+    nuevos (identificadores agregados durante una compilación) solo se guardan
+    en la capa, que se descarta al terminar. Crear la capa cuesta lo mismo sin
+    importar el tamaño de la base, y como la base nunca se modifica, se puede
+    compartir entre procesos creados con fork.
     """
-    
-    # Tabla de compatibilidad de tipos para operaciones
-    TYPE_COMPATIBILITY = {
+    def __init__(self, base):
+        if not base.frozen:
+            raise ValueError("La tabla base de un overlay debe estar congelada (use freeze())")
+        self.base = base
+        self.symbols = ChainMap({}, base.symbols)
+        self._names = ChainMap({}, base._names)
+        self.address_counter = base.address_counter  # Las direcciones nuevas siguen a las de la base
+        self.scope_stack = list(base.scope_stack)
+        self._frames = []
+        self._next_scope = base._next_scope
+        self.frozen = False
+
+    def _push_name(self, name, symbol_id):
+        # Las pilas de la base no se modifican: se copian a la capa antes de agregar
+        own_names = self._names.maps[0]
+        if name not in own_names and name in self.base._names:
+            own_names[name] = list(self.base._names[name])
+        super()._push_name(name, symbol_id)
+
+    @property
+    def own_symbols(self):
+        """Símbolos agregados en esta capa (sin los de la base)."""
+        return self.symbols.maps[0]
+
+# Operadores cuyas tablas se muestran cuando no se indica una lista
+DEFAULT_TABLE_OPERATORS = ['+', '-', '*', '/', '=', '<>', '<', '>', '<=', '>=', 'and', 'or']
+
+# Tablas de operadores ya generadas, por tupla de operadores
+_OPERATOR_TABLES_CACHE = {}
+
+
+class _LazyClassTable:
+    """
+    Atributo de clase que se construye la primera vez que se consulta. Después
+    de construirlo se reemplaza a sí mismo por la tabla, así que el resto de
+    las consultas son accesos normales.
+    """
+    def __init__(self, build):
+        self.build = build
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        table = self.build()
+        setattr(owner, self.name, table)
+        return table
+
+
+def _build_type_compatibility():
+    return {
         # Operaciones aritméticas
         '+': {
             ('integer', 'integer'): 'integer',
@@ -162,7 +477,16 @@ class TypeSystem:
             ('boolean',): 'boolean',  # 'not' aplicado a boolean devuelve boolean
         }
     }
+
+
+class TypeSystem:
+    """
+    Sistema de tipos para verificar compatibilidad y determinar tipos resultantes.
+    """
     
+    # Tabla de compatibilidad de tipos para operaciones (se construye al primer uso)
+    TYPE_COMPATIBILITY = _LazyClassTable(_build_type_compatibility)
+
     # Tabla de conversiones permitidas
     CONVERSIONS = {
         'integer': ['real'],  # integer se puede convertir a real
@@ -223,12 +547,20 @@ class TypeSystem:
         """
         Genera markdown con las tablas de compatibilidad de tipos para operadores.
         Si no se especifican operadores, genera todas las tablas disponibles.
+        Las tablas no cambian, así que cada combinación se genera una sola vez.
         """
+        key = tuple(operators) if operators is not None else None
+        if key not in _OPERATOR_TABLES_CACHE:
+            _OPERATOR_TABLES_CACHE[key] = TypeSystem._render_operator_tables(operators)
+        return _OPERATOR_TABLES_CACHE[key]
+
+    @staticmethod
+    def _render_operator_tables(operators):
         md = "### Tablas de operadores\n\n"
         
         # Si no se especifican operadores, usar algunos comunes
         if operators is None:
-            operators = ['+', '-', '*', '/', '=', '<>', '<', '>', '<=', '>=', 'and', 'or']
+            operators = DEFAULT_TABLE_OPERATORS
         
         # Tipos base para las tablas
         base_types = ['integer', 'real', 'char', 'boolean', 'string']
@@ -260,7 +592,7 @@ class TypeSystem:
         
         return md
 
-def generate_fixed_tables_report():
+def _render_fixed_tables_report():
     md = "## Tablas Fijas del Lenguaje\n\n"
     
     md += "### Palabras Reservadas\n"
@@ -278,4 +610,37 @@ def generate_fixed_tables_report():
     for delim, id_val in DELIMITERS.items():
         md += f"| {id_val} | {delim} |\n"
         
-    return md
\ No newline at end of file
+    return md
+
+
+# Secciones estáticas ya generadas (se generan la primera vez que se piden)
+_STATIC_SECTIONS = {}
+
+
+def _static_section(name, render):
+    if name not in _STATIC_SECTIONS:
+        _STATIC_SECTIONS[name] = render()
+    return _STATIC_SECTIONS[name]
+
+
+def generate_fixed_tables_report():
+    return _static_section('tablas_fijas', _render_fixed_tables_report)
+
+
+def _render_language_tables_document():
+    return (
+        "# Tablas del Lenguaje\n\n"
+        + generate_fixed_tables_report() + "\n"
+        + "## Tablas de Compatibilidad de Tipos\n\n"
+        + TypeSystem.get_operator_tables_markdown(DEFAULT_TABLE_OPERATORS)
+    )
+
+
+def generate_language_tables_document():
+    """
+    Documento único con todas las tablas del lenguaje (tablas fijas y tablas
+    de operadores), para que los reportes de un lote lo referencien en lugar
+    de repetirlo.
+    """
+    return _static_section('tablas_del_lenguaje', _render_language_tables_document)
+
@@ -1,163 +1,265 @@
 # compiler/syntactic_checking.py
 
 from .structures import Node
+from .diagrams import DIAGRAM_FORMATS, derivation_children, iter_mermaid, iter_dot, iter_json, render_block
+from .grammar import END, EXPRESSION, GRAMMAR, START, LALRTables, NO_ACTION, OperatorHierarchy, language_tables
+from .report import LazySection, Report
+from .symbol_tables import DELIMITERS
+from .tokens import DELIMITER, KINDS, TokenStream, describe_span
+from .diagnostics import Diagnostics
+
+# (izquierda, longitud de la derecha, nodo) de cada producción; la 0 es la aumentada
+PRODUCTIONS = [(START + "'", 1, None)] + [(left, len(right), node) for left, right, node in GRAMMAR]
+
+# Producciones con delimitadores en la derecha: sus hijos None (delimitadores) se filtran
+HAS_DELIMITERS = [False] + [any(symbol in DELIMITERS for symbol in right) for _, right, _ in GRAMMAR]
+PRODUCTION_NODES = [node for _, _, node in PRODUCTIONS]
+
+# Tokens que hay que desplazar después de un error antes de informar otro
+RECOVERY_SHIFTS = 3
+
+# Tokens que se muestran como un nodo con el lexema como hijo: ID -> x
+LEAF_NODES = {'IDENTIFIER': 'ID', 'CONSTANT': 'NUM', 'STRING': 'STRING', 'CHAR': 'CHAR'}
+LEAF_BY_KIND = [LEAF_NODES.get(kind) for kind in KINDS]  # Por código de tipo de token
+
+# Tablas de _Expressions (numeradas como las tablas densas); se arman la primera vez que se analiza algo
+_EXPRESSION_TABLES = []
+
+
+def _expression_tables(dense):
+    if not _EXPRESSION_TABLES:
+        hierarchy = OperatorHierarchy()
+        ids = dense.terminal_ids
+        precedence = [None] * dense.width  # Nivel de cada operador binario (0: el de menor precedencia)
+        for level, (_, operators) in enumerate(hierarchy.levels):
+            for operator in operators:
+                precedence[ids[operator]] = level
+        prefixes = [None] * dense.width
+        for operator, node in hierarchy.prefixes.items():
+            prefixes[ids[operator]] = node
+        operands = [None] * dense.width
+        for terminal, node in hierarchy.operands.items():
+            operands[ids[terminal]] = node
+        opening, closing, group = hierarchy.group or (None, None, None)
+        expression = dense.nonterminal_ids[EXPRESSION]
+        # Estados que esperan una expresión (tienen goto con EXPRESSION)
+        starts = [dense.goto[state * dense.goto_width + expression] >= 0 for state in range(dense.state_count)]
+        _EXPRESSION_TABLES.append((precedence, [node for node, _ in hierarchy.levels], prefixes, operands,
+                                   ids.get(opening, -1), ids.get(closing, -1), group, expression, starts))
+    return _EXPRESSION_TABLES[0]
+
+
+class _Expressions:
+    """
+    Análisis por precedencia de la jerarquía de operadores de la gramática
+    (OperatorHierarchy) sobre los terminales numerados de los tokens. Arma
+    el mismo árbol que el bucle LR, con una llamada por operando y por
+    operador en lugar de un paso por cada nivel (E -> T -> F -> ...).
+    parse() devuelve (None, pos) ante cualquier error: el bucle LR vuelve a
+    analizar la expresión y lo informa como siempre.
+    """
+    def __init__(self, tables, terminals, kinds, lexemes):
+        (self.precedence, self.level_nodes, self.prefixes, self.operands,
+         self.opening, self.closing, self.group) = tables[:7]
+        self.terminals = terminals
+        self.kinds = kinds
+        self.lexemes = lexemes
+
+    def parse(self, pos):
+        """(nodo, posición siguiente) de la expresión que empieza en 'pos'."""
+        try:
+            return self._binary(pos, 0)
+        except RecursionError:
+            return None, pos  # Anidamiento muy profundo: lo analiza el bucle LR, que no usa la pila
+
+    def _binary(self, pos, minimum):
+        # Operadores binarios de nivel >= minimum, asociativos por la izquierda
+        terminals, precedence = self.terminals, self.precedence
+        left, pos = self._operand(pos)
+        while left is not None:
+            level = precedence[terminals[pos]]
+            if level is None or level < minimum:
+                break
+            operator = Node(self.lexemes[pos])
+            right, pos = self._binary(pos + 1, level + 1)
+            if right is None:
+                return None, pos
+            node = Node(self.level_nodes[level])
+            node.children = [left, operator, right]
+            left = node
+        return left, pos
+
+    def _operand(self, pos):
+        terminal = self.terminals[pos]
+        symbol = self.operands[terminal]
+        if symbol is not None:  # I -> ID -> x
+            leaf = Node(LEAF_BY_KIND[self.kinds[pos]])
+            leaf.children.append(Node(self.lexemes[pos]))
+            node = Node(symbol)
+            node.children.append(leaf)
+            return node, pos + 1
+        if terminal == self.opening:  # I -> ( E )
+            inner, pos = self._binary(pos + 1, 0)
+            if inner is None or self.terminals[pos] != self.closing:
+                return None, pos
+            node = Node(self.group)
+            node.children.append(inner)
+            return node, pos + 1
+        symbol = self.prefixes[terminal]
+        if symbol is not None:  # H -> not H
+            operator = Node(self.lexemes[pos])
+            operand, pos = self._operand(pos + 1)
+            if operand is None:
+                return None, pos
+            node = Node(symbol)
+            node.children = [operator, operand]
+            return node, pos
+        return None, pos
 
 class SyntacticChecking:
     """Construye el árbol de derivación y genera un reporte."""
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, diagram_limits=None, diagram_format='mermaid', diagnostics=None):
+        self.tokens = TokenStream.from_tokens(tokens)
         self.pos = 0
+        # Colector de errores; sin él, el primer error se lanza como ValueError
+        self.diagnostics = Diagnostics.for_phase(diagnostics)
+        self.errors = []  # Mensajes de los errores de esta fase
+        if diagram_format not in DIAGRAM_FORMATS:
+            raise ValueError(f"Formato de diagrama no soportado: '{diagram_format}'")
+        self.diagram_limits = diagram_limits
+        self.diagram_format = diagram_format
 
     def analyze(self):
         """Realiza el análisis y devuelve el árbol y el reporte."""
         try:
             parse_tree = self._parse()
-            report = self._generate_markdown(parse_tree)
-            return parse_tree, report
-        except Exception as e:
+        except ValueError as e:
+            self.errors = [str(e)]
+        if self.errors:
             # Si hay error, generar un reporte de error (sin título duplicado)
-            error_report = f"**Error de sintaxis:** {str(e)}\n\n"
+            error_report = "".join(f"**Error de sintaxis:** {message}\n\n" for message in self.errors)
             error_report += "La secuencia de tokens no pudo ser validada completamente por la gramática.\n"
             return None, error_report
-
-    def _current_token(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else ('EOF', None)
-
-    def _consume(self, expected_type=None):
-        kind, val = self._current_token()
-        if expected_type and kind != expected_type:
-            raise ValueError(f"Error de sintaxis: Se esperaba {expected_type} pero se encontró {kind} ('{val}')")
-        self.pos += 1
-        return kind, val
+        return parse_tree, self._generate_markdown(parse_tree)
 
     def _parse(self):
-        # La gramática sigue siendo S -> ID := E
-        root = Node("S")
-        
-        id_val = self._consume('IDENTIFIER')[1]
-        id_node = Node("ID")
-        id_node.add_child(Node(id_val))
-        root.add_child(id_node)
-
-        assign_kind, assign_val = self._consume()
-        if assign_kind != 'OPERATOR' or assign_val != ':=':
-            raise ValueError(f"Error de sintaxis: Se esperaba operador ':=' pero se encontró {assign_kind} ('{assign_val}')")
-        root.add_child(Node(assign_val))
-        
-        root.add_child(self._e())
-
-        # Verificar que no queden tokens por consumir
-        if self._current_token()[0] != 'EOF':
-            raise ValueError(f"Error de sintaxis: Tokens extra al final de la expresión: {self._current_token()}")
-        return root
-    
-    def _e(self):
-        node_e = self._t()
-        # Operadores lógicos binarios
-        while (self._current_token()[0] == 'OPERATOR' and 
-               self._current_token()[1] in ('and', 'or')):
-            op_val = self._consume('OPERATOR')[1]
-            parent_e = Node("E")
-            parent_e.add_child(node_e)
-            parent_e.add_child(Node(op_val))
-            parent_e.add_child(self._t())
-            node_e = parent_e
-        return node_e
-
-    def _t(self):
-        node_t = self._f()
-        # Operadores de comparación
-        while (self._current_token()[0] == 'OPERATOR' and 
-               self._current_token()[1] in ('=', '<', '>', '<=', '>=', '<>')):
-            op_val = self._consume('OPERATOR')[1]
-            parent_t = Node("T")
-            parent_t.add_child(node_t)
-            parent_t.add_child(Node(op_val))
-            parent_t.add_child(self._f())
-            node_t = parent_t
-        return node_t
-
-    def _f(self):
-        node_f = self._g()
-        # Operadores + y -
-        while (self._current_token()[0] == 'OPERATOR' and 
-               self._current_token()[1] in ('+', '-')):
-            op_val = self._consume('OPERATOR')[1]
-            parent_f = Node("F")
-            parent_f.add_child(node_f)
-            parent_f.add_child(Node(op_val))
-            parent_f.add_child(self._g())
-            node_f = parent_f
-        return node_f
-
-    def _g(self):
-        node_g = self._h()
-        # Operadores * y /
-        while (self._current_token()[0] == 'OPERATOR' and 
-               self._current_token()[1] in ('*', '/')):
-            op_val = self._consume('OPERATOR')[1]
-            parent_g = Node("G")
-            parent_g.add_child(node_g)
-            parent_g.add_child(Node(op_val))
-            parent_g.add_child(self._h())
-            node_g = parent_g
-        return node_g
-
-    def _h(self):
-        # Manejar operador unario 'not'
-        if (self._current_token()[0] == 'OPERATOR' and 
-            self._current_token()[1] == 'not'):
-            op_val = self._consume('OPERATOR')[1]
-            node_h = Node("H")
-            node_h.add_child(Node(op_val))
-            node_h.add_child(self._h())  # Aplicar 'not' a la siguiente expresión
-            return node_h
-        
-        return self._i()
-
-    def _i(self):
-        kind, val = self._current_token()
-        node_i = Node("I")
-        if val == '(':
-            self._consume()  # Consumir '('
-            node_i.add_child(self._e())  # IMPORTANTE: llamar a _e() no a _i()
-            if self._current_token()[1] != ')':
-                raise ValueError(f"Error de sintaxis: Se esperaba ')' pero se encontró {self._current_token()}")
-            self._consume()  # Consumir ')'
-        elif kind == 'IDENTIFIER':
-            self._consume('IDENTIFIER')
-            id_node = Node("ID")
-            id_node.add_child(Node(val))
-            node_i.add_child(id_node)
-        elif kind == 'CONSTANT':
-            self._consume('CONSTANT')
-            num_node = Node("NUM")
-            num_node.add_child(Node(val))
-            node_i.add_child(num_node)
-        elif kind == 'STRING':
-            self._consume('STRING')
-            str_node = Node("STRING")
-            str_node.add_child(Node(val))
-            node_i.add_child(str_node)
+        # Análisis LR dirigido por las tablas LALR(1) de compiler.grammar, en
+        # su forma densa (listas de enteros indexadas por estado y terminal).
+        # Al llegar a un estado que espera una expresión, la expresión se
+        # analiza por precedencia (_Expressions) y se apila ya reducida: el
+        # bucle LR recorre la estructura del programa y solo vuelve a pasar
+        # token por token por una expresión con errores, para informarlos.
+        tables = language_tables()
+        dense = tables.dense()
+        action, width, goto_width = dense.action, dense.width, dense.goto_width
+        lefts, lengths, passes, targets = dense.lefts, dense.lengths, dense.passes, dense.targets
+        symbols, has_delimiters, leaf_by_kind = PRODUCTION_NODES, HAS_DELIMITERS, LEAF_BY_KIND
+        kinds, lexemes = self.tokens.kinds, self.tokens.lexemes
+        terminals = dense.terminal_sequence(kinds, lexemes, KINDS)
+        expression_tables = _expression_tables(dense)
+        expression, starts = expression_tables[-2:]
+        expressions = _Expressions(expression_tables, terminals, kinds, lexemes)
+        end = terminals[-1]
+        states = [0]
+        values = []
+        pos = 0
+        self.errors = []
+        shifted = RECOVERY_SHIFTS  # Tokens desplazados desde el último error
+        while True:
+            state = states[-1]
+            terminal = terminals[pos]
+            entry = action[state * width + terminal]
+            if entry >= 0:  # Desplazar
+                states.append(entry)
+                kind = kinds[pos]
+                if kind == DELIMITER:
+                    values.append(None)  # Los delimitadores no aparecen en el árbol
+                elif leaf_by_kind[kind] is None:
+                    values.append(Node(lexemes[pos]))
+                else:
+                    leaf = Node(leaf_by_kind[kind])  # ID -> x
+                    leaf.children.append(Node(lexemes[pos]))
+                    values.append(leaf)
+                pos += 1
+                shifted += 1
+                if starts[entry]:
+                    node, after = expressions.parse(pos)
+                    if node is not None:
+                        # La expresión ya reducida: goto con EXPRESSION, si el token que sigue es válido ahí
+                        target = dense.reduce_target(entry, expression, terminals[after])
+                        if action[target * width + terminals[after]] != NO_ACTION:
+                            values.append(node)
+                            states.append(target)
+                            shifted += after - pos
+                            pos = after
+                continue
+            if entry == NO_ACTION:
+                # Recuperación: se descarta el token; no se informan errores
+                # nuevos hasta desplazar RECOVERY_SHIFTS tokens (evita cascadas)
+                self.pos = pos
+                if shifted >= RECOVERY_SHIFTS:
+                    self._report_error(tables.action[state])
+                if terminal == end:
+                    return None
+                shifted = 0
+                pos += 1
+                continue
+            if entry == LALRTables.ACCEPT:
+                self.pos = pos
+                return values[-1]
+            # Reducir
+            production = -entry - 1
+            if passes[production]:
+                # Producción de paso (E -> T) que no siguió a otra reducción: no agrega un nivel
+                states[-1] = dense.reduce_target(states[-2], lefts[production], terminal)
+                continue
+            length = lengths[production]
+            if has_delimiters[production]:
+                children = [child for child in values[-length:] if child is not None]
+            else:
+                children = values[-length:]
+            del values[-length:]
+            del states[-length:]
+            symbol = symbols[production]
+            if symbol is None:
+                node = children[0]
+            else:
+                node = Node(symbol)
+                node.children = children
+            values.append(node)
+            # Goto más las reducciones de paso que siguen (calculado una vez por combinación)
+            below = states[-1]
+            target = targets.get((below * goto_width + lefts[production]) * width + terminal)
+            if target is None:
+                target = dense.reduce_target(below, lefts[production], terminal)
+            states.append(target)
+
+    def _report_error(self, expected_actions):
+        span = None
+        if self.pos < len(self.tokens):
+            kind, val, _ = self.tokens[self.pos]
+            found = f"{kind} ('{val}')"
+            span = self.tokens.span(self.pos)
         else:
-            raise ValueError(f"Sintaxis inválida, se esperaba IDENTIFIER, CONSTANT, STRING o '(', se encontró {kind} ('{val}')")
-        return node_i
+            found = "el final de la expresión"
+        expected = ", ".join("fin" if terminal == END else terminal for terminal in sorted(expected_actions))
+        message = f"Error de sintaxis: Se encontró {found}; se esperaba uno de: {expected}"
+        self.diagnostics.error('G001', message, span, 'gramática')
+        self.errors.append(message + describe_span(span))
+
+    def iter_diagram(self, root_node, diagram_format=None):
+        """Genera el árbol de derivación (recorrido por niveles) en el formato indicado."""
+        diagram_format = diagram_format or self.diagram_format
+        if diagram_format == 'dot':
+            return iter_dot(root_node, derivation_children, lambda node: node.symbol,
+                            self.diagram_limits, breadth_first=True, name='Derivacion')
+        if diagram_format == 'json':
+            return iter_json(root_node, derivation_children, lambda node: {'symbol': node.symbol},
+                             self.diagram_limits, breadth_first=True)
+        return iter_mermaid(root_node, derivation_children, lambda node: f"{node.id}['{node.symbol}']",
+                            self.diagram_limits, breadth_first=True, edge='---')
 
     def _generate_markdown(self, root_node):
         md = "La secuencia de tokens es válida según la gramática. Se genera el siguiente árbol de derivación:\n\n"
-        md += "```mermaid\n"
-        md += "graph TD\n"
-        
-        connections = []
-        q = [root_node]
-        visited = {root_node.id}
-        while q:
-            node = q.pop(0)
-            for child in node.children:
-                if child.id not in visited:
-                    connections.append(f"    {node.id}['{node.symbol}'] --- {child.id}['{child.symbol}']")
-                    visited.add(child.id)
-                    q.append(child)
-        md += "\n".join(connections)
-        md += "\n```\n"
-        return md
\ No newline at end of file
+        diagram = LazySection(lambda: render_block(self.iter_diagram(root_node), self.diagram_format))
+        return Report(md, diagram)
@@ -1,6 +1,10 @@
 # compiler/syntax_analizer.py
 
 import re
+from .diagrams import DIAGRAM_FORMATS, ast_children, iter_mermaid, iter_dot, iter_json, render_block
+from .report import LazySection, Report
+from .tokens import TokenStream, CHAR, CONSTANT, DELIMITER, IDENTIFIER, RESERVED_WORD, STRING
+from .diagnostics import Diagnostics, ERROR_OPERAND
 
 # --- Definiciones de Operadores ---
 precedence = {
@@ -21,16 +25,20 @@ associativity = {
     '*': 'left', '/': 'left'
 }
 
+# Palabras reservadas que delimitan un bloque (se ignoran al armar la expresión)
+BLOCK_DELIMITERS = ('begin', 'end')
+
 # --- Estructura de Datos para el AST ---
 class Node:
     """Nodo para un Árbol de Sintaxis Abstracta (AST)."""
     # Usamos un contador simple para los IDs de Mermaid
     _counter = 0
     
-    def __init__(self, value, left=None, right=None):
+    def __init__(self, value, left=None, right=None, span=None):
         self.value = value
         self.left = left
         self.right = right
+        self.span = span  # (inicio, fin) del token en el código fuente, si se conoce
         self.id = f"N{Node._counter}"
         Node._counter += 1
 
@@ -38,9 +46,16 @@ class SyntaxAnalyzer:
     """
     Genera un Árbol de Sintaxis Abstracta (AST) usando Shunting-yard.
     """
-    def __init__(self, tokens):
-        # Tokens recibidos del analizador léxico
-        self.tokens = tokens
+    def __init__(self, tokens, diagram_limits=None, diagram_format='mermaid', diagnostics=None):
+        # Tokens recibidos del analizador léxico (TokenStream o lista de tuplas)
+        self.tokens = TokenStream.from_tokens(tokens)
+        # Colector de errores; sin él, el primer error se lanza como ValueError
+        self.diagnostics = Diagnostics.for_phase(diagnostics)
+        self.postfix_spans = []  # Posición en el código de cada elemento de la notación postfija
+        if diagram_format not in DIAGRAM_FORMATS:
+            raise ValueError(f"Formato de diagrama no soportado: '{diagram_format}'")
+        self.diagram_limits = diagram_limits
+        self.diagram_format = diagram_format
         Node._counter = 0 # Reiniciar contador de nodos para cada análisis
 
     def analyze(self):
@@ -50,94 +65,191 @@ class SyntaxAnalyzer:
         report = self._generate_markdown(ast_root, postfix_tokens)
         return ast_root, report
 
+    def build_ast(self):
+        """Construye el AST sin generar el reporte."""
+        return self._build_tree(self._infix_to_postfix())
+
+    def _operand_end(self, index):
+        """
+        Índice siguiente al operando que empieza en 'index' ('not' repetidos,
+        un operando simple o un grupo entre paréntesis completo).
+        """
+        kinds, lexemes = self.tokens.kinds, self.tokens.lexemes
+        while index < len(kinds) and lexemes[index] == 'not':
+            index += 1
+        if index < len(kinds) and lexemes[index] == '(':
+            depth = 0
+            while index < len(kinds):
+                if lexemes[index] == '(':
+                    depth += 1
+                elif lexemes[index] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                index += 1
+        return index + 1
+
+    def _statement_end(self):
+        """
+        Fin de la primera sentencia. Un ';' final (o antes de 'end') se
+        ignora; si después hay otra sentencia se informa S006.
+        """
+        kinds, lexemes = self.tokens.kinds, self.tokens.lexemes
+        for index in range(len(kinds)):
+            if kinds[index] != DELIMITER or lexemes[index] != ';':
+                continue
+            for rest in range(index + 1, len(kinds)):
+                if lexemes[rest] != ';' and not (kinds[rest] == RESERVED_WORD and
+                                                 lexemes[rest].lower() in BLOCK_DELIMITERS):
+                    self.diagnostics.error('S006', "Error de sintaxis: La expresión tiene varias sentencias; "
+                                                   "un programa se compila con compiler.program",
+                                           self.tokens.span(index), 'sintaxis')
+                    return index
+            return index
+        return len(kinds)
+
     def _infix_to_postfix(self):
-        """Convierte la lista de tokens infijos a postfijos."""
+        """
+        Convierte la lista de tokens infijos a postfijos. Los errores se
+        informan a self.diagnostics y se recupera así:
+        - falta un operador: se descarta el operando sobrante completo;
+        - falta un operando: se inserta ERROR_OPERAND en su lugar;
+        - paréntesis sin pareja: se descarta;
+        - varias sentencias separadas por ';': se analiza solo la primera
+          (un programa completo se compila con compiler.program).
+        """
         output = []
-        stack = []
+        spans = []
+        stack = []  # (valor, span)
+        tokens = self.tokens
+        kinds, lexemes = tokens.kinds, tokens.lexemes
+        diagnostics = self.diagnostics
+        after_operand = False  # El token anterior cerró un operando (operando o ')')
+        stop = self._statement_end()
         
-        for kind, value in self.tokens:
+        index = 0
+        while index < stop:
+            value = lexemes[index]
+            # 'begin'/'end' delimitan el bloque: no forman parte de la expresión
+            if kinds[index] == RESERVED_WORD and value.lower() in BLOCK_DELIMITERS:
+                index += 1
+                continue
+            span = tokens.span(index)
+            is_operand = kinds[index] in (IDENTIFIER, CONSTANT, STRING, CHAR)
+            if after_operand and (is_operand or value in ('(', 'not')):
+                diagnostics.error('S001', f"Error de sintaxis: Falta un operador antes de '{value}'", span, 'sintaxis')
+                index = self._operand_end(index)
+                continue
+            if not after_operand and ((value in precedence and value != 'not') or value == ')'):
+                diagnostics.error('S002', f"Error de sintaxis: Falta un operando antes de '{value}'", span, 'sintaxis')
+                output.append(ERROR_OPERAND)
+                spans.append(span)
+            after_operand = is_operand or value == ')'
+            index += 1
             # ACTUALIZADO: Incluir 'STRING' como operando
-            if kind in ['IDENTIFIER', 'CONSTANT', 'STRING']:
+            if is_operand:
                 output.append(value)
+                spans.append(span)
             elif value in precedence:  # Es un operador
                 # Manejar operadores unarios (como 'not')
-                if value == 'not':
-                    stack.append(value)
-                else:
-                    while (stack and stack[-1] in precedence and
-                           ((associativity[value] == 'left' and precedence[stack[-1]] >= precedence[value]) or
-                            (associativity[value] == 'right' and precedence[stack[-1]] > precedence[value]))):
-                        output.append(stack.pop())
-                    stack.append(value)
+                if value != 'not':
+                    while (stack and stack[-1][0] in precedence and
+                           ((associativity[value] == 'left' and precedence[stack[-1][0]] >= precedence[value]) or
+                            (associativity[value] == 'right' and precedence[stack[-1][0]] > precedence[value]))):
+                        top, top_span = stack.pop()
+                        output.append(top)
+                        spans.append(top_span)
+                stack.append((value, span))
             elif value == '(':
-                stack.append(value)
+                stack.append((value, span))
             elif value == ')':
-                while stack and stack[-1] != '(':
-                    output.append(stack.pop())
-                if stack and stack[-1] == '(':
+                while stack and stack[-1][0] != '(':
+                    top, top_span = stack.pop()
+                    output.append(top)
+                    spans.append(top_span)
+                if stack and stack[-1][0] == '(':
                     stack.pop()  # Quitar '(' de la pila
                 else:
-                    raise ValueError("Paréntesis de cierre sin apertura correspondiente")
+                    diagnostics.error('S003', "Paréntesis de cierre sin apertura correspondiente", span, 'sintaxis')
         
+        last = stop - 1
+        while last >= 0 and kinds[last] == RESERVED_WORD and lexemes[last].lower() in BLOCK_DELIMITERS:
+            last -= 1
+        if last >= 0 and not after_operand:
+            diagnostics.error('S002', f"Error de sintaxis: Falta un operando después de '{lexemes[last]}'",
+                              tokens.span(last), 'sintaxis')
+            output.append(ERROR_OPERAND)
+            spans.append(tokens.span(last))
+
         while stack:
-            token = stack.pop()
+            token, span = stack.pop()
             if token == '(':
-                raise ValueError("Paréntesis de apertura sin cierre correspondiente")
+                diagnostics.error('S004', "Paréntesis de apertura sin cierre correspondiente", span, 'sintaxis')
+                continue
             output.append(token)
+            spans.append(span)
             
+        self.postfix_spans = spans
         return output
 
     def _build_tree(self, postfix_tokens):
         """Construye el AST a partir de una lista de tokens postfijos."""
+        postfix_spans = self.postfix_spans if len(self.postfix_spans) == len(postfix_tokens) \
+            else [None] * len(postfix_tokens)
+        diagnostics = self.diagnostics
         stack = []
         operators = precedence.keys()
         
-        for token in postfix_tokens:
+        for token, span in zip(postfix_tokens, postfix_spans):
             if token in operators:
                 if token == 'not':  # Operador unario
                     if len(stack) < 1:
-                        raise ValueError(f"Error de sintaxis: Operador unario '{token}' sin operando. Stack: {stack}")
+                        diagnostics.error('S005', f"Error de sintaxis: Operador unario '{token}' sin operando",
+                                          span, 'sintaxis')
+                        stack.append(Node(ERROR_OPERAND, span=span))
                     operand = stack.pop()
-                    stack.append(Node(token, operand, None))  # Solo hijo izquierdo
+                    stack.append(Node(token, operand, None, span))  # Solo hijo izquierdo
                 else:  # Operador binario
                     if len(stack) < 2:
-                        raise ValueError(f"Error de sintaxis: Operador '{token}' sin suficientes operandos. Stack: {stack}")
+                        diagnostics.error('S005', f"Error de sintaxis: Operador '{token}' sin suficientes operandos",
+                                          span, 'sintaxis')
+                        while len(stack) < 2:
+                            stack.insert(0, Node(ERROR_OPERAND, span=span))
                     right = stack.pop()
                     left = stack.pop()
-                    stack.append(Node(token, left, right))
+                    stack.append(Node(token, left, right, span))
             else:  # Es un operando
-                stack.append(Node(token))
+                stack.append(Node(token, span=span))
         
+        if not stack:
+            diagnostics.error('S005', "Error de sintaxis: Expresión vacía", None, 'sintaxis')
+            return Node(ERROR_OPERAND)
         if len(stack) != 1:
-            raise ValueError(f"Error de sintaxis: Expresión inválida. Stack final: {stack}")
+            # Sobra un operando: se señala el primero que quedó sin operador
+            diagnostics.error('S005', f"Error de sintaxis: Expresión inválida, falta un operador antes de "
+                                      f"'{stack[1].value}'", stack[1].span, 'sintaxis')
         return stack[0]
 
+    def iter_diagram(self, root, diagram_format=None):
+        """Genera el diagrama del AST línea por línea en el formato indicado."""
+        diagram_format = diagram_format or self.diagram_format
+        if diagram_format == 'dot':
+            return iter_dot(root, ast_children, lambda node: node.value, self.diagram_limits, name='AST')
+        if diagram_format == 'json':
+            return iter_json(root, ast_children, lambda node: {'value': node.value}, self.diagram_limits)
+
+        def node_line(node):
+            if node.value in precedence:
+                return f"{node.id}(('{node.value}'))"  # Círculo para operadores
+            return f"{node.id}(['{node.value}'])"  # Rectángulo para operandos
+        return iter_mermaid(root, ast_children, node_line, self.diagram_limits)
+
     def _generate_markdown(self, root, postfix_tokens):
-        """Genera el reporte Markdown con el diagrama Mermaid del AST."""
+        """
+        Genera el reporte Markdown del AST. El diagrama es perezoso:
+        solo se genera cuando se accede al texto del reporte.
+        """
         md = "La expresión se ha validado y convertido en un Árbol de Sintaxis Abstracta (AST), que representa su estructura operativa.\n\n"
         md += f"**Notación Postfija intermedia:** `{' '.join(postfix_tokens)}`\n\n"
-        md += "```mermaid\n"
-        md += "graph TD\n"
-        
-        # Función interna para recorrer el árbol y generar las líneas de Mermaid
-        def traverse(node):
-            lines = []
-            # Estilo para el nodo actual
-            if node.value in precedence:
-                lines.append(f"    {node.id}(('{node.value}'))")  # Círculo para operadores
-            else:
-                lines.append(f"    {node.id}(['{node.value}'])")  # Rectángulo para operandos
-            
-            # Conexiones con los hijos
-            if node.left:
-                lines.extend(traverse(node.left))
-                lines.append(f"    {node.id} --> {node.left.id}")
-            if node.right:
-                lines.extend(traverse(node.right))
-                lines.append(f"    {node.id} --> {node.right.id}")
-            return lines
-
-        mermaid_lines = traverse(root)
-        md += "\n".join(mermaid_lines)
-        md += "\n```\n"
-        return md
\ No newline at end of file
+        diagram = LazySection(lambda: render_block(self.iter_diagram(root), self.diagram_format))
+        return Report(md, diagram)
@@ -0,0 +1,90 @@
+# compiler/tokens.py
+
+import sys
+from array import array
+
+# Secuencia de tokens en columnas: en lugar de una tupla por token
+# ('IDENTIFIER', 'x', 10818) se guardan arreglos paralelos con el código del
+# tipo, el ID en su tabla y la posición en el código fuente, más la lista de
+# lexemas (internados con sys.intern: 'x' es el mismo objeto en todas sus
+# apariciones). Todas las fases leen la misma TokenStream, sin copiarla.
+
+KINDS = ('RESERVED_WORD', 'OPERATOR', 'DELIMITER', 'CONSTANT', 'STRING', 'IDENTIFIER', 'CHAR')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+RESERVED_WORD, OPERATOR, DELIMITER, CONSTANT, STRING, IDENTIFIER, CHAR = range(len(KINDS))
+
+NO_TABLE_ID = -1
+NO_POSITION = -1
+
+
+def describe_span(span):
+    """Texto con la columna (desde 1) de un span, para los mensajes de error."""
+    if span is None:
+        return ""
+    return f" (columna {span[0] + 1})"
+
+
+class TokenStream:
+    """
+    Tokens en arreglos paralelos: 'kinds' (código en KINDS), 'table_ids',
+    'starts' y 'ends' (posiciones en el código fuente, 'end' excluido) y
+    'lexemes'. Indexar o iterar devuelve tuplas (tipo, lexema, ID) como antes.
+    """
+    __slots__ = ('kinds', 'table_ids', 'starts', 'ends', 'lexemes')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.table_ids = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.lexemes = []
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """
+        Devuelve 'tokens' si ya es una TokenStream; si es una lista de tuplas
+        (tipo, lexema) o (tipo, lexema, ID) la convierte (sin posiciones).
+        """
+        if isinstance(tokens, cls):
+            return tokens
+        stream = cls()
+        for token in tokens:
+            stream.append(token[0], token[1], token[2] if len(token) > 2 else None)
+        return stream
+
+    def append(self, kind, lexeme, table_id=None, span=None):
+        self.kinds.append(KIND_CODES[kind])
+        self.lexemes.append(sys.intern(lexeme))
+        self.table_ids.append(NO_TABLE_ID if table_id is None else table_id)
+        start, end = span if span is not None else (NO_POSITION, NO_POSITION)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        table_id = self.table_ids[index]
+        return KINDS[self.kinds[index]], self.lexemes[index], None if table_id == NO_TABLE_ID else table_id
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def kind(self, index):
+        return KINDS[self.kinds[index]]
+
+    def span(self, index):
+        """(inicio, fin) del token en el código fuente, o None si no se conoce."""
+        start = self.starts[index]
+        return None if start == NO_POSITION else (start, self.ends[index])
+
+    def column(self, index):
+        """Columna (desde 1) del token, o None si no se conoce."""
+        start = self.starts[index]
+        return None if start == NO_POSITION else start + 1
+
+    @property
+    def nbytes(self):
+        """Memoria de los arreglos de la secuencia (sin contar los lexemas compartidos)."""
+        return sum(column.itemsize * len(column) for column in (self.kinds, self.table_ids, self.starts, self.ends))
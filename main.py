@@ -1,43 +1,24 @@
 # main.py
 
 from compiler.pipeline import CompilationPipeline
-from compiler.symbol_tables import VariableSymbolTable
+from compiler.declarations import symbol_table_from_var_section
 
 if __name__ == "__main__":
-    # Ejemplo con diferentes tipos
-    expressions = [
-        "x := 1 + a + (b * c) + 3",  # Enteros
-        # "result := 3.14 * radius + 2.5",  # Reales
-        # "message := 'Hola ' + 'Mundo'",  # Strings
-        # "flag := (x > 5) and (y < 10)",  # Booleanos
-        # "mixed := 10 + 3.14"  # Mixed types
+    # Ejemplo con diferentes tipos: cada expresión con su sección de declaraciones
+    examples = [
+        ("x := 1 + a + (b * c) + 3", "var x, a, b, c : integer;"),  # Enteros
+        # ("result := 3.14 * radius + 2.5", "var result, radius : real;"),  # Reales
+        # ("message := 'Hola ' + 'Mundo'", "var message : string;"),  # Strings
+        # ("flag := (x > 5) and (y < 10)", "var flag : boolean; x, y : integer;"),  # Booleanos
+        # ("mixed := 10 + 3.14", "var mixed : real;"),  # Mixed types
     ]
     
-    for expression in expressions:
+    for expression, declarations in examples:
         print(f"\n{'='*50}")
         print(f"Compilando: {expression}")
         print(f"{'='*50}")
         
-        symbol_table = VariableSymbolTable()
-        
-        # Definir símbolos según la expresión
-        if "message :=" in expression:
-            symbol_table.add_symbol('message', 'string')
-        elif "result :=" in expression:
-            symbol_table.add_symbol('result', 'real')
-            symbol_table.add_symbol('radius', 'real')
-        elif "flag :=" in expression:
-            symbol_table.add_symbol('flag', 'boolean')
-            symbol_table.add_symbol('x', 'integer')
-            symbol_table.add_symbol('y', 'integer')
-        elif "mixed :=" in expression:
-            symbol_table.add_symbol('mixed', 'real')
-        else:
-            # Default: enteros
-            symbol_table.add_symbol('x', 'integer')
-            symbol_table.add_symbol('a', 'integer')
-            symbol_table.add_symbol('b', 'integer') 
-            symbol_table.add_symbol('c', 'integer')
+        symbol_table = symbol_table_from_var_section(declarations)
         
         pipeline = CompilationPipeline(expression, symbol_table)
         
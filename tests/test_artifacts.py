@@ -0,0 +1,95 @@
+# tests/test_artifacts.py
+
+import pytest
+
+from compiler.artifacts import FORMAT_VERSION, ast_structure, load_artifact
+from compiler.pipeline import CompilationPipeline
+from compiler.symbol_tables import VariableSymbolTable
+
+
+def _symbol_table():
+    table = VariableSymbolTable()
+    table.add_symbol('a', 'integer', value_range=(-10, 10), column='columna_a')
+    table.add_symbol('r', 'real', value=2.5, value_range=(0.5, 99.25))
+    table.add_symbol('c', 'char')
+    table.add_symbol('x', 'real')
+    return table
+
+
+def _compile_and_load(tmp_path, expression):
+    pipeline = CompilationPipeline(expression, _symbol_table(), verbose=False)
+    pipeline.run()
+    filename = tmp_path / 'artefacto.cexa'
+    pipeline.save_artifact(str(filename))
+    return pipeline, load_artifact(str(filename))
+
+
+@pytest.mark.parametrize('expression', [
+    'x := a * 2 + r / 3.5',
+    'x := (a + 1) * (a + 1) - 7',
+    "c := 'z'",
+    'x := 99999999999999999999 + a',
+    'x := not (a < 3) and (r > 1.25)',
+])
+def test_round_trip(tmp_path, expression):
+    pipeline, artifact = _compile_and_load(tmp_path, expression)
+    with artifact:
+        assert artifact.version == FORMAT_VERSION
+        assert list(artifact.tokens) == list(pipeline.tokens)
+        stream = artifact.token_stream()
+        assert [stream.span(i) for i in range(len(stream))] == \
+            [pipeline.tokens.span(i) for i in range(len(pipeline.tokens))]
+        assert [list(triple) for triple in artifact.triples] == \
+            [[None if field is None else str(field) for field in triple] for triple in pipeline.triples]
+        assert list(artifact.constants) == [
+            {'lexeme': constant['lexeme'], 'type': constant['type'], 'value': constant['value']}
+            for constant in pipeline.constant_pool.constants
+        ]
+        assert artifact.symbol_dict() == dict(pipeline.symbol_table.symbols.items())
+        assert ast_structure(artifact.build_ast()) == ast_structure(pipeline.ast_root)
+
+
+def test_char_literal_kind(tmp_path):
+    _, artifact = _compile_and_load(tmp_path, "c := 'z'")
+    with artifact:
+        assert ('CHAR', "'z'", 0) in list(artifact.tokens)
+        assert list(artifact.constants) == [{'lexeme': "'z'", 'type': 'char', 'value': 'z'}]
+
+
+def test_integer_outside_int64(tmp_path):
+    _, artifact = _compile_and_load(tmp_path, 'x := 99999999999999999999 + a')
+    with artifact:
+        assert artifact.constants[0]['value'] == 99999999999999999999
+
+
+def test_rejects_other_files(tmp_path):
+    filename = tmp_path / 'no_es_artefacto.cexa'
+    filename.write_bytes(b'XXXX' + bytes(12))
+    with pytest.raises(ValueError):
+        load_artifact(str(filename))
+
+
+def test_typed_symbol_values(tmp_path):
+    table = VariableSymbolTable()
+    table.add_symbol('n', 'integer', value=2 ** 70)
+    table.add_symbol('f', 'boolean', value=True)
+    table.add_symbol('s', 'string', value='hola')
+    pipeline = CompilationPipeline('f := not f', table, verbose=False)
+    pipeline.run()
+    filename = tmp_path / 'artefacto.cexa'
+    pipeline.save_artifact(str(filename))
+    with load_artifact(str(filename)) as artifact:
+        values = {info['name']: info['value'] for info in artifact.symbol_dict().values()}
+    assert values == {'n': 2 ** 70, 'f': True, 's': 'hola'}
+    assert type(values['f']) is bool
+
+
+@pytest.mark.parametrize('keep', [0, 10, 40, -5])
+def test_truncated_file(tmp_path, keep):
+    _, artifact = _compile_and_load(tmp_path, 'x := a * 2 + r / 3.5')
+    artifact.close()
+    data = (tmp_path / 'artefacto.cexa').read_bytes()
+    truncated = tmp_path / 'truncado.cexa'
+    truncated.write_bytes(data[:keep])
+    with pytest.raises(ValueError):
+        load_artifact(str(truncated))
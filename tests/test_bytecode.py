@@ -0,0 +1,26 @@
+# tests/test_bytecode.py
+
+import pytest
+
+from compiler.bytecode import encode_triples, execute
+from compiler.declarations import symbol_table_from_var_section
+from compiler.pipeline import compile_expression
+
+
+def _program(expression):
+    table = symbol_table_from_var_section('var a, b, x: integer; var f: boolean;')
+    compiled = compile_expression(expression, table)
+    return encode_triples(compiled.triples, compiled.constant_pool, table)
+
+
+def test_execute():
+    assert execute(_program('x := a * 2 + b'), {'a': 3, 'b': 1}) == {'x': 7}
+
+
+def test_missing_input_names_the_variable():
+    with pytest.raises(ValueError, match="'b'"):
+        execute(_program('x := a + b'), {'a': 1})
+
+
+def test_boolean_literals_need_no_input():
+    assert execute(_program('f := true and (a > 1)'), {'a': 3}) == {'f': True}
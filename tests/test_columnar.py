@@ -0,0 +1,31 @@
+# tests/test_columnar.py
+
+import csv
+
+from compiler.columnar import ColumnarEvaluator
+from compiler.declarations import symbol_table_from_var_section
+from compiler.pipeline import compile_expression
+
+
+def _evaluator(workers):
+    table = symbol_table_from_var_section('var a, b, x, y: integer; var z: real;')
+    compiled = [compile_expression(expression, table)
+                for expression in ('x := a * 2 + b', 'y := x - a', 'z := x / 2')]
+    return ColumnarEvaluator(compiled, table, chunk_size=3, workers=workers)
+
+
+def test_worker_processes_match_serial_evaluation(tmp_path):
+    source = tmp_path / 'entrada.csv'
+    with open(source, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['a', 'b'])
+        writer.writerows((i, 10 - i) for i in range(10))
+
+    serial = _evaluator(None).run_csv(str(source), str(tmp_path / 'serie.csv'))
+    evaluator = _evaluator(2)
+    parallel = evaluator.run_csv(str(source), str(tmp_path / 'paralelo.csv'))
+
+    assert open(parallel, encoding='utf-8').read() == open(serial, encoding='utf-8').read()
+    assert (evaluator.rows, evaluator.chunks) == (10, 4)
+    with open(parallel, newline='', encoding='utf-8') as f:
+        assert next(csv.reader(f)) == ['x', 'y', 'z']
@@ -0,0 +1,35 @@
+# tests/test_dependency_graph.py
+
+import pytest
+
+from compiler.dependency_graph import compile_program
+
+
+def test_dependencies_decide_the_evaluation_order():
+    # Las asignaciones aparecen antes que las variables que leen
+    graph = compile_program('d := c + b; c := b + 1; b := a * 2')
+    assert graph.levels == [['b'], ['c'], ['d']]
+    assert graph.inputs() == ['a']
+    env = graph.evaluate({'a': 3})
+    assert (env['b'], env['c'], env['d']) == (6, 7, 13)
+
+
+def test_update_reevaluates_only_the_affected_assignments():
+    graph = compile_program('b := a * 2; c := b + 1; y := x - 1')
+    graph.evaluate({'a': 1, 'x': 10})
+    graph.evaluations = 0
+    assert graph.update({'a': 5}) == {'b', 'c'}
+    assert graph.evaluations == 2
+    assert (graph.env['c'], graph.env['y']) == (11, 9)
+
+
+def test_block_variables_are_separate_nodes():
+    graph = compile_program('var x : integer; var y : integer; x := a + 1; begin var x : integer; x := 10; y := x * 2 end; '
+                            'z := x * 2')
+    env = graph.evaluate({'a': 1})
+    assert (env['x'], env['x@1'], env['y'], env['z']) == (2, 10, 20, 4)
+
+
+def test_circular_dependencies_are_rejected():
+    with pytest.raises(ValueError):
+        compile_program('a := b + 1; b := a + 1')
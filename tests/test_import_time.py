@@ -0,0 +1,38 @@
+# tests/test_import_time.py
+
+import importlib.util
+import os
+
+import pytest
+
+# Reutiliza los escenarios y la medición de tools/check_import_time.py
+_TOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools', 'check_import_time.py')
+_spec = importlib.util.spec_from_file_location('check_import_time', _TOOL)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+# Margen sobre los presupuestos de la herramienta: el tiempo de importación
+# varía con la carga de la máquina; esta prueba solo detecta regresiones
+# grandes (una fase pesada importada de más). Se ajusta con IMPORT_TIME_SCALE.
+SCALE = float(os.environ.get('IMPORT_TIME_SCALE', '3.0'))
+REPEAT = 5
+
+SCENARIOS = [pytest.param(code, budget, forbidden, id=name)
+             for name, code, budget, forbidden in check_import_time.SCENARIOS]
+
+
+def _compiler_time(times):
+    return sum(value for module, value in times.items() if module.split('.')[0] == 'compiler')
+
+
+@pytest.mark.parametrize('code, budget, forbidden', SCENARIOS)
+def test_does_not_load_unneeded_modules(code, budget, forbidden):
+    _, loaded = check_import_time.measure(code)
+    assert not loaded & set(forbidden), f"módulos cargados sin necesidad: {sorted(loaded & set(forbidden))}"
+
+
+@pytest.mark.parametrize('code, budget, forbidden', SCENARIOS)
+def test_import_time_within_budget(code, budget, forbidden):
+    check_import_time.measure(code)  # Calentamiento: genera los .pyc
+    best = min(_compiler_time(check_import_time.measure(code)[0]) for _ in range(REPEAT))
+    assert best <= budget * SCALE, f"{best} µs (presupuesto {budget} µs x {SCALE})"
@@ -0,0 +1,36 @@
+# tests/test_optimizer.py
+
+from compiler.program import compile_source
+
+
+def _constant(program, operand):
+    return program.constant_pool.get(int(operand[1:]))['value']
+
+
+def test_copy_propagation():
+    program = compile_source('b := a; c := b + 1')
+    assert program.optimized == [[':=', 'b', 'a'], ['+', 'a', '#0'], [':=', 'c', '(1)']]
+    assert program.optimizer.propagated == 1
+
+
+def test_constant_folding_across_statements():
+    program = compile_source('x := 2; y := x * 3')
+    (_, x, two), (_, y, product) = program.optimized
+    assert (x, y) == ('x', 'y')
+    assert _constant(program, two) == 2
+    assert _constant(program, product) == 6
+    assert program.optimizer.folded == [1]
+
+
+def test_dead_assignment_elimination():
+    program = compile_source('x := a + 1; x := 2')
+    assert program.optimizer.eliminated_statements == [0]
+    assert program.optimized == [[':=', 'x', '#1']]
+
+
+def test_block_variables_are_dead_after_the_block():
+    program = compile_source('var a : integer; var y : integer; begin var t : integer; t := a * 2; y := t + 1 end; '
+                             'begin var u : integer; u := a end')
+    assert program.optimizer.eliminated_statements == [2]
+    assert [triple for triple in program.optimized if triple[0] == ':='] == \
+        [[':=', 't@1', '(0)'], [':=', 'y', '(2)']]
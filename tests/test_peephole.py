@@ -0,0 +1,25 @@
+# tests/test_peephole.py
+
+from compiler.declarations import symbol_table_from_var_section
+from compiler.peephole import PeepholeOptimizer, lower_triples
+from compiler.pipeline import compile_expression
+
+
+def _optimize(expression, declarations):
+    table = symbol_table_from_var_section(declarations)
+    compiled = compile_expression(expression, table)
+    assert not compiled.errors
+    optimizer = PeepholeOptimizer()
+    code = optimizer.optimize(lower_triples(compiled.triples, compiled.constant_pool, table))
+    return code, optimizer
+
+
+def test_user_variable_named_like_a_temporary_keeps_its_store():
+    code, optimizer = _optimize('t1 := a + b', 'var t1, a, b: integer;')
+    assert ('STORE', 't1', 'R') in code
+    assert optimizer.fired['temporal_sin_uso'] == 1  # Solo el temporal del resultado de ':='
+
+
+def test_unread_temporaries_are_removed():
+    code, _ = _optimize('x := a * 2 + b', 'var x, a, b: integer;')
+    assert [instruction for instruction in code if instruction[0] == 'STORE'] == [('STORE', 'x', 'R')]
@@ -0,0 +1,66 @@
+# tests/test_program.py
+
+import pytest
+
+from compiler.diagnostics import Diagnostics
+from compiler.pipeline import compile_expression
+from compiler.program import compile_source
+
+
+def _leaf(root, name):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.value == name and not node.left and not node.right:
+            return node
+        stack.extend(child for child in (node.left, node.right) if child)
+    return None
+
+
+def test_statement_list_in_a_block():
+    program = compile_source('begin x := 1; y := 2 end')
+    assert [compiled.triples for compiled in program.statements] == [[[':=', 'x@1', '#0']], [[':=', 'y@1', '#1']]]
+    assert program.errors == []
+
+
+def test_inner_declaration_shadows_the_outer_one():
+    program = compile_source('var x : integer; var y : real; '
+                             'x := 1; begin var x : real; x := 2.5; y := x end; z := x + 1')
+    outer, inner, copy, after = program.statements
+    assert program.scopes == [0, 1, 1, 0]
+    assert program.errors == []
+    # Dentro del bloque 'x' es la real del bloque, con su propia dirección
+    assert inner.ast_root.left.type == 'real'
+    assert inner.ast_root.left.memory_address != outer.ast_root.left.memory_address
+    assert copy.triples == [[':=', 'y', 'x@1']]
+    # Al cerrar el bloque vuelve a verse la 'x' entera
+    assert _leaf(after.ast_root, 'x').memory_address == outer.ast_root.left.memory_address
+    assert after.triples == [['+', 'x', '#0'], [':=', 'z', '(0)']]
+    assert program.symbol_table.scope_stack == [0]
+    assert sorted(info['name'] for info in program.symbol_table.symbols.values()) == ['x', 'y', 'z']
+
+
+def test_names_resolve_before_the_scope_closes():
+    program = compile_source('var x : integer;\nproc p;\nbegin\n  var x : char;\n  x := \'a\'\nend;\nx := 2.5')
+    assert program.procedures == ['p']
+    assert program.statements[0].errors == []
+    assert program.errors == ['x := 2.5: ERROR: No se puede asignar real a integer (columna 3)']
+
+
+def test_unterminated_block_is_a_grammar_error():
+    with pytest.raises(ValueError):
+        compile_source('begin x := 1')
+
+
+def test_single_expression_rejects_several_statements():
+    diagnostics = Diagnostics()
+    compile_expression('begin x := 1; y := 2 end', diagnostics=diagnostics)
+    assert [diagnostic.code for diagnostic in diagnostics.items] == ['S006']
+
+
+def test_var_section_declares_lists_and_every_type():
+    program = compile_source("var x, a, b : integer; s : string; var f : boolean; "
+                             "a := 1; b := 2; x := a + b * 2; s := 'hola'; f := x > a")
+    assert program.errors == []
+    types = {info['name']: info['type'] for info in program.symbol_table.symbols.values()}
+    assert types == {'x': 'integer', 'a': 'integer', 'b': 'integer', 's': 'string', 'f': 'boolean'}
@@ -0,0 +1,44 @@
+# tests/test_symbol_tables.py
+
+import pytest
+
+from compiler.symbol_tables import VariableSymbolTable
+
+
+def test_exit_scope_reclaims_only_its_own_addresses():
+    table = VariableSymbolTable()
+    table.add_symbol('a', 'integer')
+    table.enter_scope()
+    table.add_symbol('b', 'integer')
+    table.exit_scope()
+    table.add_symbol('c', 'integer')
+    addresses = [info['address'] for info in table.symbols.values()]
+    assert addresses == ['1000', '1004']
+
+
+def test_declaring_into_an_outer_scope_is_rejected():
+    table = VariableSymbolTable()
+    table.enter_scope()
+    with pytest.raises(ValueError):
+        table.add_symbol('x', 'integer', scope=0)
+
+
+def test_redeclaration_keeps_its_address():
+    table = VariableSymbolTable()
+    table.add_symbol('x', 'integer')
+    table.add_symbol('x', 'real')
+    table.add_symbols([{'name': 'x', 'type': 'char'}, {'name': 'y', 'type': 'integer'}])
+    assert {info['name']: info['address'] for info in table.symbols.values()} == {'x': '1000', 'y': '1004'}
+    assert table.find_symbol_by_name('x').type == 'char'
+    assert table.address_counter == 0x1008
+
+
+def test_shadowing_is_undone_on_exit():
+    table = VariableSymbolTable()
+    outer = table.add_symbol('x', 'integer')
+    table.enter_scope()
+    inner = table.add_symbol('x', 'real')
+    assert table.find_symbol_id('x') == inner
+    table.exit_scope()
+    assert table.find_symbol_id('x') == outer
+    assert table.address_counter == 0x1004
@@ -0,0 +1,63 @@
+# tests/test_syntactic_checking.py
+
+import pytest
+
+from compiler.grammar import GRAMMAR, OperatorHierarchy
+from compiler.lexical_analyzer import LexicalAnalyzer
+from compiler.parser import Parser
+from compiler.syntactic_checking import SyntacticChecking
+
+
+def _parse(source):
+    checker = SyntacticChecking(LexicalAnalyzer(Parser(source).parse()).tokenize())
+    tree, _ = checker.analyze()
+    return tree, checker.errors
+
+
+def _shape(node):
+    """(símbolo, hijos...) del árbol de derivación."""
+    if not node.children:
+        return node.symbol
+    return (node.symbol,) + tuple(_shape(child) for child in node.children)
+
+
+def test_operator_hierarchy_comes_from_the_grammar():
+    hierarchy = OperatorHierarchy()
+    assert [node for node, _ in hierarchy.levels] == ['E', 'T', 'F', 'G']
+    assert hierarchy.levels[2] == ('F', ['+', '-'])
+    assert hierarchy.prefixes == {'not': 'H'}
+    assert hierarchy.group == ('(', ')', 'I')
+
+
+def test_operator_hierarchy_rejects_other_productions():
+    grammar = GRAMMAR + (('F', ('F', 'F'), 'F'),)
+    with pytest.raises(ValueError):
+        OperatorHierarchy(grammar)
+
+
+def test_expressions_keep_precedence_and_left_associativity():
+    tree, errors = _parse('x := a - b - c * not d')
+    assert errors == []
+    value = _shape(tree)[3]
+    assert value == ('F',
+                     ('F', ('I', ('ID', 'a')), '-', ('I', ('ID', 'b'))),
+                     '-',
+                     ('G', ('I', ('ID', 'c')), '*', ('H', 'not', ('I', ('ID', 'd')))))
+
+
+def test_erroneous_expression_reports_the_grammar_error():
+    tree, errors = _parse('x := (a + * b)')
+    assert tree is None
+    assert errors == ["Error de sintaxis: Se encontró OPERATOR ('*'); se esperaba uno de: (, CHAR, CONSTANT, IDENTIFIER, STRING, not"]
+
+
+def test_deep_nesting_falls_back_to_the_tables():
+    tree, errors = _parse('x := ' + '(' * 600 + 'a' + ')' * 600)
+    assert errors == []
+    # Los paréntesis no quedan en el árbol: una 'I' por nivel y la del identificador
+    node = tree.children[2]
+    depth = 0
+    while node.symbol == 'I':
+        node = node.children[0]
+        depth += 1
+    assert (depth, node.symbol) == (601, 'ID')
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import timeit
+
+# Permite ejecutar el script desde la raíz del proyecto: python tools/benchmark_vm.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler.pipeline import compile_expression
+from compiler.evaluator import evaluate_ast
+from compiler.bytecode import encode_triples, execute
+
+
+def build_expression(terms):
+    """Expresión de prueba: x := a0 * 2 + a1 * 2 + ... (terms términos)."""
+    return "x := " + " + ".join(f"a{i} * {i % 7 + 1}" for i in range(terms))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara la evaluación con bytecode contra el recorrido del AST.")
+    parser.add_argument('--terms', type=int, default=50, help='Términos de la expresión (default: 50)')
+    parser.add_argument('--repeat', type=int, default=2000, help='Evaluaciones por medición (default: 2000)')
+    args = parser.parse_args()
+
+    compiled = compile_expression(build_expression(args.terms))
+    program = encode_triples(compiled.triples, compiled.constant_pool, compiled.symbol_table)
+    inputs = {name: i for i, name in enumerate(program.variables)}
+
+    # Ambos métodos deben dar el mismo resultado
+    env = dict(inputs)
+    expected = evaluate_ast(compiled.ast_root, env, compiled.constant_pool)
+    assert execute(program, inputs)['x'] == expected
+
+    ast_time = timeit.timeit(lambda: evaluate_ast(compiled.ast_root, dict(inputs), compiled.constant_pool),
+                             number=args.repeat)
+    vm_time = timeit.timeit(lambda: execute(program, inputs), number=args.repeat)
+
+    triples_size = sys.getsizeof(compiled.triples) + sum(
+        sys.getsizeof(triple) + sum(sys.getsizeof(field) for field in triple) for triple in compiled.triples)
+    bytecode_size = sys.getsizeof(program.code)
+
+    print(f"Expresión de {args.terms} términos, {program.instruction_count} instrucciones, {args.repeat} evaluaciones")
+    print(f"  Recorrido del AST: {ast_time * 1e6 / args.repeat:10.1f} µs por evaluación")
+    print(f"  Bytecode (VM):     {vm_time * 1e6 / args.repeat:10.1f} µs por evaluación")
+    print(f"  Aceleración:       {ast_time / vm_time:10.2f}x")
+    print(f"  Memoria tripletas: {triples_size:10d} bytes")
+    print(f"  Memoria bytecode:  {bytecode_size:10d} bytes")
+
+
+if __name__ == '__main__':
+    main()
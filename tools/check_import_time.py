@@ -0,0 +1,83 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Verifica el tiempo de arranque de los puntos de entrada más usados con
+# 'python -X importtime'. Para cada escenario se mide el tiempo propio (self)
+# de los módulos del paquete 'compiler' (el de la biblioteca estándar no
+# depende de nosotros) y se comprueba que no se carguen fases innecesarias.
+#
+# Uso: python tools/check_import_time.py [--repeat 5] [--scale 1.0]
+# Termina con código 1 si algún escenario excede su presupuesto.
+# tests/test_import_time.py corre los mismos escenarios con pytest, con un
+# margen amplio sobre los presupuestos (IMPORT_TIME_SCALE, por omisión 3).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (nombre, código, presupuesto en microsegundos, módulos que NO deben cargarse)
+SCENARIOS = [
+    ('import compiler', 'import compiler', 1000, [
+        'compiler.parser', 'compiler.lexical_analyzer', 'compiler.semantic_analyzer',
+        'compiler.intermediate_code_gen', 'compiler.symbol_tables',
+    ]),
+    ('solo análisis léxico', 'from compiler.lexical_analyzer import LexicalAnalyzer', 2000, [
+        'compiler.syntax_analizer', 'compiler.syntactic_checking', 'compiler.semantic_analyzer',
+        'compiler.intermediate_code_gen', 'compiler.diagrams',
+    ]),
+    ('import compiler.pipeline', 'import compiler.pipeline', 2500, [
+        'compiler.syntactic_checking', 'compiler.semantic_analyzer', 'compiler.intermediate_code_gen',
+        'compiler.diagrams', 'compiler.passes',
+    ]),
+]
+
+
+def _environment():
+    # Se mide con los .pyc ya generados, como en un uso normal: sin esto cada
+    # importación incluiría compilar el código fuente.
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def measure(code):
+    """Ejecuta 'code' con -X importtime y devuelve ({módulo: self µs}, módulos cargados)."""
+    probe = code + "\nimport sys\nprint(' '.join(sorted(m for m in sys.modules if m.startswith('compiler'))))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], cwd=ROOT, env=_environment(),
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_time)
+    return times, set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación del paquete compiler.")
+    parser.add_argument('--repeat', type=int, default=5, help='Mediciones por escenario; se usa la mínima')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplica los presupuestos (máquinas lentas)')
+    args = parser.parse_args()
+
+    failed = False
+    for name, code, budget, forbidden in SCENARIOS:
+        measure(code)  # Calentamiento: genera los .pyc
+        best, loaded = None, set()
+        for _ in range(args.repeat):
+            times, loaded = measure(code)
+            total = sum(value for module, value in times.items() if module.split('.')[0] == 'compiler')
+            best = total if best is None else min(best, total)
+        limit = int(budget * args.scale)
+        unexpected = sorted(loaded & set(forbidden))
+        ok = best <= limit and not unexpected
+        failed |= not ok
+        print(f"[{'OK' if ok else 'FALLA'}] {name}: {best} µs (presupuesto {limit} µs)")
+        if unexpected:
+            print(f"        módulos cargados sin necesidad: {', '.join(unexpected)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
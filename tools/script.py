@@ -1,5 +1,7 @@
 import os
 import argparse
+import hashlib
+import json
 
 # Directorios a ignorar (incluye caches de Python)
 IGNORE_DIRS = {'.web', 'venv', '__pycache__', 'tools'}
@@ -20,57 +22,86 @@ TREE_PREFIXES = {
 }
 
 
-def build_tree(root_path):
+class ScanEntry:
+    """Entrada del recorrido: archivo (con su stat) o directorio (con sus hijos)."""
+    __slots__ = ('name', 'path', 'is_dir', 'children', 'stat')
+
+    def __init__(self, name, path, is_dir, children=None, stat=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.children = children
+        self.stat = stat
+
+
+def scan(root_path):
+    """
+    Recorre el árbol una sola vez (os.scandir) ignorando IGNORE_DIRS y los
+    dot-files salvo INCLUDED_FILES. Devuelve las entradas de root_path, con
+    directorios y archivos ordenados por nombre; build_tree y collect_files
+    usan este mismo resultado.
+    """
+    entries = []
+    with os.scandir(root_path) as iterator:
+        for entry in iterator:
+            if entry.name in IGNORE_DIRS or (entry.name.startswith('.') and entry.name not in INCLUDED_FILES):
+                continue
+            if entry.is_dir():
+                entries.append(ScanEntry(entry.name, entry.path, True, scan(entry.path)))
+            elif entry.is_file():
+                entries.append(ScanEntry(entry.name, entry.path, False, stat=entry.stat()))
+    entries.sort(key=lambda entry: entry.name)
+    return entries
+
+
+def build_tree(root_path, entries=None):
     """
     Genera una lista de líneas representando la estructura de directorios,
     ignorando IGNORE_DIRS, pero incluyendo archivos en INCLUDED_FILES.
     """
+    if entries is None:
+        entries = scan(root_path)
     tree_lines = []
 
-    def _tree(dir_path, prefix=''):
-        entries = sorted(os.listdir(dir_path))
-        # Filtrar: ignora los directorios deseados; oculta dot-files salvo INCLUDED_FILES
-        entries = [
-            e for e in entries
-            if e not in IGNORE_DIRS
-               and (not e.startswith('.') or e in INCLUDED_FILES)
-        ]
-
-        dirs = [e for e in entries if os.path.isdir(os.path.join(dir_path, e))]
-        files = [e for e in entries if os.path.isfile(os.path.join(dir_path, e))]
-        total = len(dirs) + len(files)
-
-        for idx, name in enumerate(dirs + files):
-            path = os.path.join(dir_path, name)
+    def _tree(entries, prefix=''):
+        # Primero los directorios, después los archivos
+        ordered = [e for e in entries if e.is_dir] + [e for e in entries if not e.is_dir]
+        total = len(ordered)
+
+        for idx, entry in enumerate(ordered):
             connector = TREE_PREFIXES['last'] if idx == total - 1 else TREE_PREFIXES['branch']
-            tree_lines.append(f"{prefix}{connector}{name}")
-            if os.path.isdir(path):
+            tree_lines.append(f"{prefix}{connector}{entry.name}")
+            if entry.is_dir:
                 extension = TREE_PREFIXES['indent'] if idx == total - 1 else TREE_PREFIXES['pipe']
-                _tree(path, prefix + extension)
+                _tree(entry.children, prefix + extension)
 
     tree_lines.append(os.path.basename(root_path) or root_path)
-    _tree(root_path)
+    _tree(entries)
     return tree_lines
 
 
-def collect_files(root_path):
+def iter_code_files(entries):
+    """
+    Archivos con extensiones en ALLOWED_EXTS o listados en INCLUDED_FILES:
+    los de cada carpeta primero y después los de sus subcarpetas.
+    """
+    for entry in entries:
+        if not entry.is_dir and (os.path.splitext(entry.name)[1] in ALLOWED_EXTS or entry.name in INCLUDED_FILES):
+            yield entry
+    for entry in entries:
+        if entry.is_dir:
+            yield from iter_code_files(entry.children)
+
+
+def collect_files(root_path, entries=None):
     """
     Recorre el árbol e incluye:
     - Archivos con extensiones en ALLOWED_EXTS
     - Archivos listados en INCLUDED_FILES (en cualquier carpeta)
     """
-    paths = []
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        # Excluir carpetas no deseadas
-        dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
-
-        for fname in sorted(filenames):
-            rel = os.path.relpath(os.path.join(dirpath, fname), root_path)
-            ext = os.path.splitext(fname)[1]
-            if ext in ALLOWED_EXTS or fname in INCLUDED_FILES:
-                paths.append(os.path.join(dirpath, fname))
-
-    return paths
+    if entries is None:
+        entries = scan(root_path)
+    return [entry.path for entry in iter_code_files(entries)]
 
 
 def ext_to_lang(ext):
@@ -85,42 +116,149 @@ def ext_to_lang(ext):
     }.get(ext, 'text')
 
 
+class OverviewCache:
+    """
+    Caché persistente de la generación anterior: para cada archivo, su mtime,
+    tamaño y hash de contenido, y la posición (offset, longitud) de su
+    sección en el Markdown generado. Si el archivo no cambió y el Markdown
+    anterior sigue intacto, la sección se copia de ahí sin releer el archivo.
+    """
+    VERSION = 1
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.files = {}
+        self.output = None  # {'size', 'mtime_ns'} del Markdown generado
+        if filename is None:
+            return
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.files = data['files']
+                self.output = data['output']
+        except (OSError, ValueError, KeyError):
+            pass  # Sin caché o caché inválida: se regenera todo
+
+    def output_matches(self, output):
+        """True si el Markdown anterior es el que describe la caché (nadie lo modificó)."""
+        if self.output is None:
+            return False
+        try:
+            stat = os.stat(output)
+        except OSError:
+            return False
+        return stat.st_size == self.output['size'] and stat.st_mtime_ns == self.output['mtime_ns']
+
+    def reusable(self, rel_path, stat):
+        """Datos de la sección anterior del archivo si no cambió (mtime y tamaño), o None."""
+        cached = self.files.get(rel_path)
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return cached
+        return None
+
+    def save(self, output, files):
+        if self.filename is None:
+            return
+        stat = os.stat(output)
+        data = {'version': self.VERSION, 'output': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+                'files': files}
+        temporary = f"{self.filename}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temporary, self.filename)
+
+
+def _copy_range(source, target, offset, length, chunk_size=1 << 20):
+    """Copia 'length' bytes de 'source' desde 'offset' sin cargarlos enteros en memoria."""
+    source.seek(offset)
+    while length > 0:
+        chunk = source.read(min(chunk_size, length))
+        if not chunk:
+            raise OSError("El Markdown anterior es más corto de lo esperado")
+        target.write(chunk)
+        length -= len(chunk)
+
+
+def _read_section(entry, rel_path):
+    """Lee el archivo y arma su sección; devuelve (bytes de la sección, hash del contenido)."""
+    lang = ext_to_lang(os.path.splitext(entry.name)[1])
+    digest = None
+    try:
+        with open(entry.path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        # Mismos saltos de línea que al leer en modo texto
+        body = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    except Exception as e:
+        body = f"# Error al leer el archivo: {e}\n"
+    section = f"## `{rel_path}`\n\n```{lang}\n{body}```\n\n"
+    return section.encode('utf-8'), digest
+
+
+def write_overview(root, output, cache_file=None):
+    """
+    Escribe el Markdown por partes (la memoria no depende del tamaño del
+    proyecto). Devuelve (archivos incluidos, archivos leídos).
+    """
+    entries = scan(root)
+    cache = OverviewCache(cache_file)
+    previous = None
+    if cache.output_matches(output):
+        previous = open(output, 'rb')
+
+    files = {}
+    read = 0
+    temporary = f"{output}.tmp"
+    try:
+        with open(temporary, 'wb') as md:
+            # Título y árbol de directorios
+            md.write("# Estructura del proyecto\n\n```\n".encode('utf-8'))
+            md.write("\n".join(build_tree(root, entries)).encode('utf-8'))
+            md.write("\n```\n\n".encode('utf-8'))
+
+            # Contenido de cada archivo
+            for entry in iter_code_files(entries):
+                rel_path = os.path.relpath(entry.path, root)
+                offset = md.tell()
+                cached = cache.reusable(rel_path, entry.stat) if previous else None
+                if cached is not None and cached['sha256'] is not None:
+                    _copy_range(previous, md, cached['offset'], cached['length'])
+                    digest = cached['sha256']
+                else:
+                    section, digest = _read_section(entry, rel_path)
+                    md.write(section)
+                    read += 1
+                files[rel_path] = {'mtime_ns': entry.stat.st_mtime_ns, 'size': entry.stat.st_size,
+                                   'sha256': digest, 'offset': offset, 'length': md.tell() - offset}
+    finally:
+        if previous is not None:
+            previous.close()
+    os.replace(temporary, output)
+    cache.save(output, files)
+    return len(files), read
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Genera un Markdown con la estructura tipo tree y el código fuente.")
     parser.add_argument(
         'output', nargs='?', default='tools/project_overview.md',
         help='Nombre del archivo Markdown de salida. (default: project_overview.md)')
+    parser.add_argument(
+        '--cache', help='Archivo de caché (default: .<salida>.cache.json junto a la salida)')
+    parser.add_argument(
+        '--no-cache', action='store_true', help='Relee todos los archivos y no guarda la caché')
     args = parser.parse_args()
 
-    root = os.getcwd()
-    tree_lines = build_tree(root)
-    code_files = collect_files(root)
-
-    with open(args.output, 'w', encoding='utf-8') as md:
-        # Título
-        md.write("# Estructura del proyecto\n\n")
-
-        # Árbol de directorios
-        md.write("```\n")
-        md.write("\n".join(tree_lines))
-        md.write("\n```\n\n")
-
-        # Contenido de cada archivo
-        for path in code_files:
-            rel_path = os.path.relpath(path, root)
-            ext = os.path.splitext(path)[1]
-            lang = ext_to_lang(ext)
-            md.write(f"## `{rel_path}`\n\n")
-            md.write(f"```{lang}\n")
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    md.write(f.read())
-            except Exception as e:
-                md.write(f"# Error al leer el archivo: {e}\n")
-            md.write("```\n\n")
-
-    print(f"Archivo Markdown generado: {args.output}")
+    cache_file = None
+    if not args.no_cache:
+        directory, name = os.path.split(args.output)
+        cache_file = args.cache or os.path.join(directory, f".{name}.cache.json")
+
+    total, read = write_overview(os.getcwd(), args.output, cache_file)
+    print(f"Archivo Markdown generado: {args.output} ({total} archivos, {read} leídos, "
+          f"{total - read} reutilizados)")
 
 
 if __name__ == '__main__':